@@ -0,0 +1,9 @@
+'''
+Headless benchmarks of the sequencer, runnable without Pd:
+
+    python -m benchmark.allocations
+    python -m benchmark.timing
+
+benchmark.headless runs the Pd object of sequencer_pd with a stand-in for
+pyext, and Launchpad and Launchkey emulators fed with its MIDI output.
+'''
@@ -0,0 +1,119 @@
+'''
+Check that the steady-state tick path doesn't allocate memory.
+
+A song with every track playing at full polyphony is played until it
+reaches a steady state (row caches, output buffers and compiled rows are
+populated), then for several more loops under tracemalloc: the memory
+still allocated at the end of them must be the same as at the beginning.
+
+Requires Python 3.9 or newer (tracemalloc.reset_peak).
+'''
+from __future__ import print_function
+from array import array
+import gc
+import sys
+
+from sequencer.model import Song
+
+def buildSong(numTracks=8, numRows=2):
+    song = Song(numTracks)
+    for trackIndex, track in enumerate(song.tracks):
+        noteCols = track.getNoteColumns()
+        for patternIndex in range(numRows):
+            pattern = track.patterns[patternIndex]
+            pattern.setLength(16)
+            # staggered notes of various lengths, keeping every voice busy:
+            for col in range(len(noteCols)):
+                for row in range(col % 4, 16, 4):
+                    note = 36 + (trackIndex * 7 + patternIndex * 5 + col * 3 + row) % 60
+                    pattern.noteAdd(row, note, 1 + (row + col) % 3)
+            pattern.set(0, len(noteCols), 64 + patternIndex)
+        for row in range(numRows):
+            # two overlapping patterns per row, to exercise the merger:
+            song.set(row, trackIndex, [row, (row + 1) % numRows])
+    song.setLength(numRows)
+    for row in range(numRows):
+        song.setRowDuration(row, 4)
+    return song
+
+def getLoopTicks(song):
+    return sum(song.getRowDuration(row) * song.tpb * 4 for row in range(song.getLength()))
+
+def run(song, numTicks):
+    tick = song.tick
+    for i in range(numTicks):
+        tick()
+
+def getAllocatedMemory():
+    import tracemalloc
+    # a full collection also empties the interpreter free lists:
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+def measure(compiled, loops=4, maxWarmUpLoops=8):
+    '''
+    Return the number of ticks measured, the memory (in bytes) left
+    allocated by a loop once in steady state (0 if none did), the transient
+    peak, and the number of garbage collections triggered by the ticks.
+    '''
+    import tracemalloc
+    collections = [0]
+    def onCollect(phase, info):
+        if phase == 'start': collections[0] += 1
+    # tracing must include the warm up: blocks allocated before tracing
+    # starts and reallocated afterwards would be counted as new memory
+    tracemalloc.start()
+    gc.callbacks.append(onCollect)
+    try:
+        song = buildSong()
+        song.setCompiledPlayback(compiled)
+        loopTicks = getLoopTicks(song)
+        # the memory is measured the same way after every loop, and kept in
+        # an array rather than in int objects, so that the measurement
+        # itself doesn't show up in it
+        reference = array('q', [0])
+        growth = array('q', [0])
+        def runLoop():
+            collections[0] = 0
+            run(song, loopTicks)
+            numCollections = collections[0]
+            growth[0] = getAllocatedMemory() - reference[0]
+            reference[0] += growth[0]
+            return numCollections
+        # warm up until whole loops leave the allocated memory unchanged
+        # (row caches, output buffers, compiled rows and voice states settled):
+        steadyLoops = 0
+        for i in range(maxWarmUpLoops):
+            runLoop()
+            steadyLoops = steadyLoops + 1 if growth[0] == 0 else 0
+            if steadyLoops == 2: break
+        tracemalloc.reset_peak()
+        net = 0
+        total = 0
+        for i in range(loops):
+            total += runLoop()
+            if growth[0] != 0: net = growth[0]
+        peak = tracemalloc.get_traced_memory()[1] - reference[0]
+    finally:
+        gc.callbacks.remove(onCollect)
+        tracemalloc.stop()
+    return loops * loopTicks, net, peak, total
+
+def main():
+    if sys.version_info < (3, 9):
+        print('tracemalloc is not available: Python 3.9 or newer is required')
+        return 1
+    failed = False
+    for compiled in (False, True):
+        numTicks, net, peak, collections = measure(compiled)
+        mode = 'compiled' if compiled else 'interpreted'
+        print('%-11s %6d ticks: net %d bytes, transient peak %d bytes, %d garbage collections' % (mode, numTicks, net, peak, collections))
+        if net != 0:
+            failed = True
+    if failed:
+        print('FAIL: the steady-state tick path allocates memory')
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,149 @@
+'''
+Run the Pd object of sequencer_pd without Pd.
+'''
+import sys
+import types
+from collections import deque
+
+from .launchpademulator import LaunchpadEmulator
+from .launchkeyemulator import LaunchkeyEmulator
+
+class FakePyextClass(object):
+    '''
+    Stand-in for pyext._class: messages sent to an outlet are queued in
+    the outbox of the object.
+    '''
+
+    _inlets = 1
+    _outlets = 1
+
+    def _outlet(self, outlet, *args):
+        if len(args) == 1 and isinstance(args[0], (list, tuple)):
+            args = args[0]
+        if '_outbox' not in self.__dict__:
+            self._outbox = deque()
+        self._outbox.append((outlet, list(args)))
+
+def installFakePyext():
+    '''
+    Make 'import pyext' work outside Pd. A pyext module imported already
+    (e.g. the real one) is left alone.
+    '''
+    if 'pyext' not in sys.modules:
+        pyext = types.ModuleType('pyext')
+        pyext._class = FakePyextClass
+        sys.modules['pyext'] = pyext
+    return sys.modules['pyext']
+
+class HeadlessSequencer(object):
+    '''
+    A sequencer_pd.IO object, wired the way sequencer.pd wires it: MIDI for
+    the Launchpad and the Launchkey goes to emulators, MIDI for the output
+    port is collected in midiOut, and the other messages in output.
+
+    Delayed messages (delaytick, ledflush, redraw, dumpnext) are run by
+    advance() and settle() on a virtual clock, which also drives the clocks
+    of the transport and of the LED output queue.
+    '''
+
+    launchpadPort = 1
+    launchkeyPort = 2
+    launchkeyCtrlPort = 3
+    midiOutPort = 4
+    # delayed message -> message sent back when the delay expires:
+    delayedMessages = {'delaytick': 'delayedtick', 'ledflush': 'ledflush', 'redraw': 'redraw', 'dumpnext': 'dumpnext'}
+
+    def __init__(self):
+        installFakePyext()
+        import sequencer_pd
+        self.time = 0. # ms
+        self.timers = {} # delayed message -> due time; re-sending restarts it, like [delay]
+        self.launchpad = LaunchpadEmulator()
+        self.launchkey = LaunchkeyEmulator()
+        self.midiOut = []
+        self.output = []
+        self.io = sequencer_pd.IO(self.launchpadPort, self.launchkeyPort, self.launchkeyCtrlPort, self.midiOutPort)
+        self.app = self.io.app
+        self.song = self.io.song
+        self.app.ledQueue.clock = self.clock
+        self.io.transport.clock.clock = self.clock
+        self.send('init')
+
+    def clock(self):
+        return self.time / 1000.
+
+    def send(self, selector, *args):
+        '''
+        Send a message to the IO object, and handle what it outputs.
+        '''
+        getattr(self.io, selector + '_1')(*args)
+        self.dispatch()
+
+    def dispatch(self):
+        outbox = self.io.__dict__.get('_outbox')
+        while outbox:
+            outlet, message = outbox.popleft()
+            selector = message[0]
+            if selector == 'midi':
+                self.onMidi(message[1], message[2:])
+            elif selector in self.delayedMessages:
+                self.timers[selector] = self.time + max(0., float(message[1]))
+            else:
+                self.output.append(message)
+
+    def onMidi(self, port, data):
+        if port == self.launchpadPort:
+            self.launchpad.feed(data)
+        elif port == self.launchkeyPort:
+            self.launchkey.feed(0, data)
+        elif port == self.launchkeyCtrlPort:
+            self.launchkey.feed(1, data)
+        elif port == self.midiOutPort:
+            self.midiOut.extend(data)
+
+    def runTimers(self, until):
+        '''
+        Run the delayed messages due up to time until, in time order.
+        '''
+        while True:
+            due = [(t, selector) for selector, t in self.timers.items() if t <= until]
+            if not due:
+                return
+            t, selector = min(due)
+            del self.timers[selector]
+            self.time = max(self.time, t)
+            self.send(self.delayedMessages[selector])
+
+    def advance(self, ms):
+        '''
+        Let ms milliseconds of virtual time pass.
+        '''
+        end = self.time + ms
+        self.runTimers(end)
+        self.time = end
+
+    def settle(self, maxTime=60000.):
+        '''
+        Run the pending delayed messages other than ticks (LED output,
+        redraws, dumps) until there are none left, or maxTime milliseconds
+        of virtual time have passed.
+        '''
+        end = self.time + maxTime
+        while any(selector != 'delaytick' for selector in self.timers):
+            nextTime = min(t for selector, t in self.timers.items() if selector != 'delaytick')
+            if nextTime > end:
+                break
+            self.advance(nextTime - self.time)
+
+    def sendDeviceMidi(self, port, data):
+        self.send('midi', port, *data)
+
+    def pressLaunchpad(self, row, col, pressed=True):
+        self.sendDeviceMidi(self.launchpadPort, self.launchpad.getButtonMessage(row, col, pressed))
+
+    def releaseLaunchpad(self, row, col):
+        self.pressLaunchpad(row, col, False)
+
+    def sendLaunchkeyMidi(self, message):
+        port, data = message
+        self.sendDeviceMidi(self.launchkeyCtrlPort if port else self.launchkeyPort, data)
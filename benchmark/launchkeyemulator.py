@@ -0,0 +1,59 @@
+from device import MidiParser
+
+class LaunchkeyEmulator(object):
+    '''
+    Model of a Launchkey, built from the MIDI it receives on its InControl
+    port (port 1): whether extended mode is enabled, and the pad LEDs, keyed
+    by (row, col) and valued (red, green); unlit LEDs are left out.
+
+    The get*Message() methods return the (port, data) the device sends for
+    keys, pads, knobs and buttons.
+    '''
+
+    buttonNumbers = {'track-up': 0x68, 'track-down': 0x69, 'track-left': 0x6A, 'track-right': 0x6B}
+
+    def __init__(self):
+        self.parsers = (MidiParser(lambda message: self.onMessage(0, message)), MidiParser(lambda message: self.onMessage(1, message)))
+        self.numMessages = 0
+        self.numBytes = 0
+        self.extendedMode = False
+        self.reset()
+
+    def reset(self):
+        self.leds = {}
+
+    def feed(self, port, data):
+        self.numBytes += len(data)
+        self.parsers[port].feed(data)
+
+    def onMessage(self, port, message):
+        self.numMessages += 1
+        if port != 1:
+            return
+        status, data1, data2 = message
+        if status == 0xB0 and data1 == 0x00 and data2 == 0x00:
+            self.reset()
+        elif status == 0x90 and data1 == 0x0C:
+            self.extendedMode = data2 > 0
+        elif status == 0x90 and data1 & 0xF0 in (0x60, 0x70) and data1 & 0x0F <= 8:
+            coord = (int(data1 & 0xF0 == 0x70), data1 & 0x0F)
+            color = (data2 & 3, (data2 >> 4) & 3)
+            if color == (0, 0):
+                self.leds.pop(coord, None)
+            else:
+                self.leds[coord] = color
+
+    def getLed(self, row, col):
+        return self.leds.get((row, col), (0, 0))
+
+    def getNoteMessage(self, note, velocity):
+        return 0, [0x90 if velocity > 0 else 0x80, note, velocity]
+
+    def getPadMessage(self, row, col, velocity):
+        return 1, [0x90 if velocity > 0 else 0x80, 0x60 + 0x10 * row + col, velocity]
+
+    def getControlMessage(self, num, value):
+        return 1, [0xB0, 0x15 + num, value]
+
+    def getButtonMessage(self, name, pressed=True):
+        return 1, [0xB0, self.buttonNumbers[name], 0x7F if pressed else 0x00]
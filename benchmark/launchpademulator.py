@@ -0,0 +1,96 @@
+from device import MidiParser
+
+class LaunchpadEmulator(object):
+    '''
+    Model of a Launchpad (mk1), built from the MIDI it receives: the LEDs of
+    its two buffers, which buffer is displayed and which one is updated, and
+    the rapid update cursor.
+
+    LEDs are keyed by (row, col), where row 8 is the top row and col 8 the
+    right column, and valued (red, green); unlit LEDs are left out.
+    '''
+
+    # LEDs addressed by rapid update messages, in order:
+    rapidUpdateCoords = [(row, col) for row in range(8) for col in range(8)] + [(row, 8) for row in range(8)] + [(8, col) for col in range(8)]
+
+    def __init__(self):
+        self.parser = MidiParser(self.onMessage)
+        self.numMessages = 0
+        self.numBytes = 0
+        self.reset()
+
+    def reset(self):
+        self.buffers = ({}, {})
+        self.displaying = 0
+        self.updating = 0
+        self.flashing = False
+        self.rapidUpdateIndex = 0
+
+    def feed(self, data):
+        self.numBytes += len(data)
+        self.parser.feed(data)
+
+    def onMessage(self, message):
+        self.numMessages += 1
+        status, data1, data2 = message
+        if status == 0x92:
+            self.setLed(self.rapidUpdateCoords[self.rapidUpdateIndex], data1)
+            self.setLed(self.rapidUpdateCoords[self.rapidUpdateIndex + 1], data2)
+            self.rapidUpdateIndex = (self.rapidUpdateIndex + 2) % len(self.rapidUpdateCoords)
+            return
+        # any other message moves the rapid update cursor back to the start:
+        self.rapidUpdateIndex = 0
+        if status == 0x90:
+            row, col = data1 >> 4, data1 & 0x0F
+            if row < 8 and col <= 8:
+                self.setLed((row, col), data2)
+        elif status == 0xB0:
+            if 0x68 <= data1 < 0x70:
+                self.setLed((8, data1 - 0x68), data2)
+            elif data1 == 0x00:
+                self.onControl(data2)
+
+    def onControl(self, value):
+        if value == 0x00:
+            self.reset()
+        elif 0x20 <= value < 0x40:
+            self.displaying = value & 1
+            self.updating = (value >> 2) & 1
+            self.flashing = bool(value & 0x08)
+            if value & 0x10:
+                self.buffers[self.updating].clear()
+                self.buffers[self.updating].update(self.buffers[self.displaying])
+        elif 0x7D <= value <= 0x7F:
+            brightness = value - 0x7C
+            for coord in self.rapidUpdateCoords:
+                self.buffers[self.displaying][coord] = (brightness, brightness)
+
+    def setLed(self, coord, value):
+        color = (value & 3, (value >> 4) & 3)
+        buffers = [self.buffers[self.updating]]
+        other = self.buffers[1 - self.updating]
+        if value & 0x04:
+            buffers.append(other)
+        elif value & 0x08:
+            other.pop(coord, None)
+        for buf in buffers:
+            if color == (0, 0):
+                buf.pop(coord, None)
+            else:
+                buf[coord] = color
+
+    def getLed(self, row, col):
+        return self.buffers[self.displaying].get((row, col), (0, 0))
+
+    def getDisplayedLeds(self):
+        return dict(self.buffers[self.displaying])
+
+    def getButtonMessage(self, row, col, pressed=True):
+        '''
+        Return the MIDI message the device sends when a button is pressed or
+        released.
+        '''
+        velocity = 0x7F if pressed else 0x00
+        if row == 8:
+            return [0xB0, 0x68 + col, velocity]
+        return [0x90, row << 4 | col, velocity]
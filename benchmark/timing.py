@@ -0,0 +1,204 @@
+'''
+Time the engine and the controllers on fixed scenarios:
+
+    python -m benchmark.timing [-r ROUNDS] [--json FILE] [--compare FILE] [SCENARIO ...]
+
+Each scenario is run ROUNDS times, and the time per iteration of the
+fastest, median and slowest rounds is reported in microseconds. --json
+writes the results as a JSON document; --compare reads one written
+before (e.g. by the previous release) and reports the ratio of the median
+times (above 1: slower now).
+'''
+from __future__ import print_function
+import argparse
+import json
+import platform
+import sys
+import time
+from timeit import default_timer as timer
+
+from .allocations import buildSong, getLoopTicks, run
+from .headless import HeadlessSequencer
+
+def populatePattern(pattern, noteCols, length=16, seed=0):
+    pattern.clear()
+    pattern.setLength(length)
+    for col in range(len(noteCols)):
+        for row in range(col % 4, length, 4):
+            pattern.noteAdd(row, 36 + (seed * 5 + col * 3 + row) % 24, 1 + (row + col) % 3)
+
+def songTick(number, compiled=False):
+    song = buildSong()
+    song.setCompiledPlayback(compiled)
+    run(song, getLoopTicks(song))
+    t = timer()
+    run(song, number)
+    return timer() - t, {}
+
+def songTickCompiled(number):
+    return songTick(number, True)
+
+def ioTick(number):
+    '''
+    Playback through the IO object, with the pattern being played shown by
+    the active PatternEditController.
+    '''
+    seq = HeadlessSequencer()
+    track = seq.song.tracks[0]
+    populatePattern(track.patterns[0], track.getNoteColumns())
+    seq.send('songset', 0, 0, 0)
+    seq.send('start')
+    seq.settle()
+    period = seq.app.tickPeriod()
+    numBytes = seq.launchpad.numBytes
+    del seq.output[:]
+    t = timer()
+    seq.advance(number * period)
+    elapsed = timer() - t
+    return elapsed, {'launchpadBytes': seq.launchpad.numBytes - numBytes, 'outputMessages': len(seq.output)}
+
+def patternEditUpdate(number):
+    '''
+    Full redraws of PatternEditController, flipping between two pages of a
+    pattern so that each one changes most of the grid.
+    '''
+    seq = HeadlessSequencer()
+    track = seq.song.tracks[0]
+    populatePattern(track.patterns[0], track.getNoteColumns())
+    seq.settle()
+    controller = seq.app.lpcontroller
+    t = timer()
+    for i in range(number):
+        controller.incrHScroll(8 if i % 2 == 0 else -8)
+        controller.update()
+    elapsed = timer() - t
+    return elapsed, {}
+
+def syncBuffer(number):
+    '''
+    BufferedLaunchpad.syncBuffer() of buffers where every LED changed.
+    '''
+    seq = HeadlessSequencer()
+    launchpad = seq.io.launchpad
+    frames = [[(i + j) % 4 for i in range(160)] for j in (0, 1)]
+    elapsed = 0.
+    for i in range(number):
+        launchpad.setFrame('default', frames[i % 2])
+        t = timer()
+        launchpad.syncBuffer('default')
+        elapsed += timer() - t
+    return elapsed, {}
+
+def controllerSwitch(number):
+    '''
+    Switches between PatternEditController and SongEditController with the
+    Launchpad session button, until the device displays the new controller.
+    '''
+    seq = HeadlessSequencer()
+    track = seq.song.tracks[0]
+    populatePattern(track.patterns[0], track.getNoteColumns())
+    seq.settle()
+    numBytes = seq.launchpad.numBytes
+    t = timer()
+    for i in range(number):
+        seq.pressLaunchpad(8, 4)
+        seq.releaseLaunchpad(8, 4)
+        seq.settle()
+    elapsed = timer() - t
+    return elapsed, {'launchpadBytes': seq.launchpad.numBytes - numBytes}
+
+def bulkPatternLoad(number):
+    '''
+    Loads of a whole 64 rows pattern with a setpattern message, while it is
+    shown by the active PatternEditController.
+    '''
+    seq = HeadlessSequencer()
+    track = seq.song.tracks[0]
+    noteCols = track.getNoteColumns()
+    width = 1 + max(noteCols)
+    patterns = []
+    for seed in (0, 1):
+        # built in another pattern, then loaded as the pattern shown:
+        pattern = track.patterns[1]
+        populatePattern(pattern, noteCols, 64, seed)
+        patterns.append([value for row in pattern.getRows(0, 64) for value in (row + [0] * width)[:width]])
+    seq.settle()
+    t = timer()
+    for i in range(number):
+        seq.send('setpattern', 0, 0, 64, width, *patterns[i % 2])
+        seq.settle()
+    elapsed = timer() - t
+    return elapsed, {}
+
+# name -> (function, iterations per round)
+scenarios = [
+    ('song_tick', (songTick, 2000)),
+    ('song_tick_compiled', (songTickCompiled, 2000)),
+    ('io_tick', (ioTick, 500)),
+    ('pattern_edit_update', (patternEditUpdate, 200)),
+    ('sync_buffer', (syncBuffer, 500)),
+    ('controller_switch', (controllerSwitch, 50)),
+    ('bulk_pattern_load', (bulkPatternLoad, 50)),
+]
+
+def measure(name, rounds):
+    function, number = dict(scenarios)[name]
+    times = []
+    counters = {}
+    for i in range(rounds):
+        elapsed, counters = function(number)
+        times.append(1e6 * elapsed / number)
+    times.sort()
+    return {
+        'scenario': name,
+        'iterations': number,
+        'rounds': rounds,
+        'unit': 'us',
+        'min': times[0],
+        'median': times[len(times) // 2],
+        'max': times[-1],
+        'counters': counters,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time the sequencer on fixed scenarios.')
+    parser.add_argument('scenarios', nargs='*', metavar='SCENARIO', help='scenarios to run (default: all of %s)' % ', '.join(name for name, s in scenarios))
+    parser.add_argument('-r', '--rounds', type=int, default=5, help='rounds per scenario (default: 5)')
+    parser.add_argument('--json', metavar='FILE', help='write the results to FILE (- for stdout)')
+    parser.add_argument('--compare', metavar='FILE', help='compare with the results in FILE')
+    args = parser.parse_args(argv)
+    names = args.scenarios or [name for name, s in scenarios]
+    for name in names:
+        if name not in dict(scenarios):
+            parser.error('unknown scenario: %s' % name)
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {result['scenario']: result for result in json.load(f)['results']}
+    results = []
+    out = sys.stderr if args.json == '-' else sys.stdout
+    for name in names:
+        result = measure(name, max(1, args.rounds))
+        results.append(result)
+        line = '%-20s %10.2f us (min %.2f, max %.2f)' % (name, result['median'], result['min'], result['max'])
+        if name in baseline:
+            line += '  x%.2f' % (result['median'] / baseline[name]['median'])
+        print(line, file=out)
+    if args.json:
+        document = {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'results': results,
+        }
+        if args.json == '-':
+            json.dump(document, sys.stdout, indent=2, sort_keys=True)
+            print()
+        else:
+            with open(args.json, 'w') as f:
+                json.dump(document, f, indent=2, sort_keys=True)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,26 +1,15 @@
 import pyext
 from collections import defaultdict
-from device import BufferedLaunchpad
+from device import BufferedLaunchpad, MidiParser, MidiOutputBuffer, HandlerProfiler
 
 class BufferedLaunchpadPdImpl(BufferedLaunchpad):
     def __init__(self, pdobj):
         super(BufferedLaunchpadPdImpl, self).__init__()
         self.pdobj = pdobj
-        self.midiBuffer = []
+        self.midiParser = MidiParser(self.onMidiData)
 
     def writeMidi(self, v1, v2, v3):
-        self.pdobj._outlet(1, ['midi', v1])
-        self.pdobj._outlet(1, ['midi', v2])
-        self.pdobj._outlet(1, ['midi', v3])
-
-    def bufferMidi(self, f):
-        if f & 0x80: # status bit
-            self.midiBuffer = [f]
-        else:
-            self.midiBuffer.append(f)
-        if len(self.midiBuffer) == 3:
-            self.onMidiData(self.midiBuffer)
-            self.midiBuffer = []
+        self.pdobj.midiOut.write(0, v1, v2, v3)
 
     def onBufferButtonEvent(self, bufferName, sectionName, row, col, pressed):
         self.pdobj._outlet(1, ['buffer', bufferName, sectionName, 'button', row, col, int(pressed)])
@@ -31,19 +20,32 @@ class BufferedLaunchpadPd(pyext._class):
 
     def __init__(self):
         self.buffer = BufferedLaunchpadPdImpl(self)
+        self.midiOut = MidiOutputBuffer(self.sendMidi)
+        self.profiler = HandlerProfiler(self)
 
-    def midi_1(self, f):
-        self.buffer.bufferMidi(int(f))
+    def sendMidi(self, port, data):
+        self._outlet(1, ['midi'] + data)
+
+    def profilestart_1(self, *handlers):
+        self.profiler.start(*handlers)
+
+    def profilestop_1(self, path):
+        self._outlet(1, ['profile'] + list(self.profiler.stop(str(path))))
+
+    def midi_1(self, *data):
+        self.buffer.midiParser.feed(data)
 
     def select_1(self, bufferName):
         bufferName = str(bufferName)
         self.buffer.selectBuffer(bufferName)
         self.buffer.syncCurrentBuffer()
+        self.midiOut.flush()
 
     def clear_1(self, bufferName):
         bufferName = str(bufferName)
         self.buffer.clearBuffer(bufferName)
         self.buffer.syncCurrentBuffer()
+        self.midiOut.flush()
 
     def clearb_1(self, bufferName):
         bufferName = str(bufferName)
@@ -54,20 +56,58 @@ class BufferedLaunchpadPd(pyext._class):
         sectionName = str(sectionName)
         self.buffer.set(bufferName, sectionName, row, col, r, g)
         self.buffer.syncCurrentBuffer()
+        self.midiOut.flush()
 
     def setb_1(self, bufferName, sectionName, row, col, r, g):
         bufferName = str(bufferName)
         sectionName = str(sectionName)
         self.buffer.set(bufferName, sectionName, row, col, r, g)
 
+    def setframe_1(self, bufferName, *colors):
+        self.buffer.setFrame(str(bufferName), colors)
+        self.buffer.syncCurrentBuffer()
+        self.midiOut.flush()
+
+    def setframeb_1(self, bufferName, *colors):
+        self.buffer.setFrame(str(bufferName), colors)
+
+    def setframeindex_1(self, bufferName, *indexes):
+        self.buffer.setFrame(str(bufferName), self.buffer.indexesToColors(indexes))
+        self.buffer.syncCurrentBuffer()
+        self.midiOut.flush()
+
+    def setframeindexb_1(self, bufferName, *indexes):
+        self.buffer.setFrame(str(bufferName), self.buffer.indexesToColors(indexes))
+
+    def setsection_1(self, bufferName, sectionName, *colors):
+        self.buffer.setSection(str(bufferName), str(sectionName), colors)
+        self.buffer.syncCurrentBuffer()
+        self.midiOut.flush()
+
+    def setsectionb_1(self, bufferName, sectionName, *colors):
+        self.buffer.setSection(str(bufferName), str(sectionName), colors)
+
+    def setrow_1(self, bufferName, row, *indexes):
+        self.buffer.setRow(str(bufferName), int(row), self.buffer.indexesToColors(indexes))
+        self.buffer.syncCurrentBuffer()
+        self.midiOut.flush()
+
+    def setrowb_1(self, bufferName, row, *indexes):
+        self.buffer.setRow(str(bufferName), int(row), self.buffer.indexesToColors(indexes))
+
     def sync_1(self, bufferName):
         self.buffer.syncCurrentBuffer()
+        self.midiOut.flush()
+
+    def frametransfer_1(self, enable, threshold=None):
+        self.buffer.setFrameTransfer(bool(enable), threshold)
 
     def scroll_1(self, bufferName, sectionName, row, col):
         bufferName = str(bufferName)
         sectionName = str(sectionName)
         self.buffer.scroll(bufferName, sectionName, row, col)
         self.buffer.syncCurrentBuffer()
+        self.midiOut.flush()
 
     def scrollb_1(self, bufferName, sectionName, row, col):
         bufferName = str(bufferName)
@@ -1,3 +1,7 @@
-from launchpad import *
-from launchkey import *
-from bufferedlaunchpad import *
+from .launchpad import *
+from .launchkey import *
+from .bufferedlaunchpad import *
+from .ledoutputqueue import *
+from .midiparser import *
+from .midioutputbuffer import *
+from .handlerprofiler import *
@@ -1,14 +1,22 @@
 from collections import defaultdict
-from device import Launchpad
+from .launchpad import Launchpad
 
 class BufferedLaunchpad(Launchpad):
+    off = [0, 0]
+
     def __init__(self):
         super(BufferedLaunchpad, self).__init__()
         self.currentBuffer = 'default'
         self.sections = ('top', 'right', 'center')
         self.sectionCoords = {'top': [(8, i) for i in range(8)], 'right': [(i, 8) for i in range(8)], 'center': [(i, j) for i in range(8) for j in range(8)]}
+        self.sectionCoordSet = {k: frozenset(v) for k, v in self.sectionCoords.items()}
         self.buffer = {k: {'default': self.emptyBuffer(), '_dev': self.emptyBuffer()} for k in self.sections}
+        # (bufferName, rowOffset, colOffset, invertRows) of the last sync of each section:
+        self.syncedView = {}
         self.flipRows = False
+        self.frameTransfer = False
+        self.frameThreshold = 24
+        self.displayedBuffer = 0
 
     def onButtonEvent(self, row, col, pressed):
         if row == 8: section = 'top'
@@ -28,23 +36,98 @@ class BufferedLaunchpad(Launchpad):
             'rowOffset': 0,
             'colOffset': 0,
             'invertRows': False,
-            'data': defaultdict(lambda: [0, 0])
+            'data': defaultdict(lambda: [0, 0]),
+            # cells written since the last sync, and those of them written
+            # with feedback priority:
+            'dirty': set(),
+            'urgent': set()
         }
 
+    def setFrameTransfer(self, enable, threshold=None):
+        '''
+        In frame transfer mode, syncs changing at least frameThreshold cells
+        draw the whole frame into the hidden hardware buffer with rapid
+        update messages (two LEDs per message), then flip the buffers, so
+        that no partial frame is ever displayed. Smaller syncs still send
+        one message per changed cell.
+        '''
+        self.frameTransfer = bool(enable)
+        if threshold is not None:
+            self.frameThreshold = max(1, int(threshold))
+
     def syncBuffer(self, name):
+        '''
+        Send to the device the cells of a buffer that differ from what it
+        displays. Only the cells written since the last sync are compared,
+        unless the section was last synced from another buffer, or scrolled
+        or inverted since.
+        '''
+        changes = []
+        for section in self.sections:
+            buf = self.buffer[section][name]
+            view = (name, buf['rowOffset'], buf['colOffset'], buf['invertRows'])
+            if self.syncedView.get(section) != view:
+                self.syncedView[section] = view
+                for (dstRow, dstCol) in self.sectionCoords[section]:
+                    srcRow = buf['rowOffset'] + dstRow
+                    srcCol = buf['colOffset'] + dstCol
+                    self.syncCell(section, buf, srcRow, srcCol, dstRow, dstCol, changes)
+            else:
+                coords = self.sectionCoordSet[section]
+                urgent = buf['urgent']
+                for (srcRow, srcCol) in buf['dirty']:
+                    dstRow = srcRow - buf['rowOffset']
+                    dstCol = srcCol - buf['colOffset']
+                    if (dstRow, dstCol) in coords:
+                        priority = self.priorityFeedback if (srcRow, srcCol) in urgent else self.priorityBackground
+                        self.syncCell(section, buf, srcRow, srcCol, dstRow, dstCol, changes, priority)
+            buf['dirty'].clear()
+            buf['urgent'].clear()
+        if self.frameTransfer and len(changes) >= self.frameThreshold:
+            self.sendFrame()
+        else:
+            for dstRow, dstCol, red, green, priority in changes:
+                self.setLed(dstRow, dstCol, red, green, priority=priority)
+
+    def syncCell(self, section, buf, srcRow, srcCol, dstRow, dstCol, changes, priority=0):
+        if buf['invertRows']:
+            dstRow = 7 - dstRow
+        dev = self.buffer[section]['_dev']['data']
+        value = buf['data'].get((srcRow, srcCol), self.off)
+        if dev.get((dstRow, dstCol), self.off) != value:
+            if value == self.off:
+                del dev[dstRow, dstCol]
+            else:
+                dev[dstRow, dstCol] = value
+            changes.append((dstRow, dstCol, value[0], value[1], priority))
+
+    def getFrame(self):
+        '''
+        Return the LEDs displayed by the device, in rapid update order (grid
+        rows, right column, top row), as a flat list of red, green values.
+        '''
+        frame = []
+        for section, coords in (('center', self.sectionCoords['center']), ('right', self.sectionCoords['right']), ('top', self.sectionCoords['top'])):
+            dev = self.buffer[section]['_dev']['data']
+            for coord in coords:
+                frame.extend(dev.get(coord, self.off))
+        return frame
+
+    def sendFrame(self):
+        self.discardLeds()
+        hidden = 1 - self.displayedBuffer
+        self.setBuffers(self.displayedBuffer, hidden)
+        self.setLeds(*self.getFrame())
+        self.setBuffers(hidden, hidden)
+        self.displayedBuffer = hidden
+
+    def reset(self):
+        super(BufferedLaunchpad, self).reset()
+        # the device is now blank, and displays buffer 0:
         for section in self.sections:
-            for (dstRow, dstCol) in self.sectionCoords[section]:
-                srcRow = self.buffer[section][name]['rowOffset'] + dstRow
-                srcCol = self.buffer[section][name]['colOffset'] + dstCol
-                if self.buffer[section][name]['invertRows']:
-                    dstRow = 7 - dstRow
-                if self.buffer[section]['_dev']['data'][dstRow, dstCol] != self.buffer[section][name]['data'][srcRow, srcCol]:
-                    if self.buffer[section][name]['data'][srcRow, srcCol] == [0, 0]:
-                        del self.buffer[section]['_dev']['data'][dstRow, dstCol]
-                    else:
-                        self.buffer[section]['_dev']['data'][dstRow, dstCol] = self.buffer[section][name]['data'][srcRow, srcCol]
-                    red, green = self.buffer[section]['_dev']['data'][dstRow, dstCol]
-                    self.setLed(dstRow, dstCol, red, green)
+            self.buffer[section]['_dev']['data'].clear()
+        self.syncedView = {}
+        self.displayedBuffer = 0
 
     def syncCurrentBuffer(self):
         self.syncBuffer(self.currentBuffer)
@@ -61,15 +144,77 @@ class BufferedLaunchpad(Launchpad):
             keys = list(self.buffer[section][bufferName]['data'].keys())
             for key in keys:
                 del self.buffer[section][bufferName]['data'][key]
+            self.buffer[section][bufferName]['dirty'].update(keys)
             self.scroll(bufferName, section, 0, 0)
             self.invertRows(bufferName, section, False)
 
-    def set(self, bufferName, sectionName, row, col, r, g):
+    def set(self, bufferName, sectionName, row, col, r, g, priority=0):
+        '''
+        Set a cell of a buffer. Cells set with priorityFeedback (playhead,
+        pressed buttons) are sent first by implementations pacing their
+        output.
+        '''
         if bufferName == '_cur': bufferName = self.currentBuffer
         if r == 0 and g == 0 and (row, col) in self.buffer[sectionName][bufferName]['data']:
             del self.buffer[sectionName][bufferName]['data'][row, col]
         else:
             self.buffer[sectionName][bufferName]['data'][row, col] = [r, g]
+        self.buffer[sectionName][bufferName]['dirty'].add((row, col))
+        if priority > self.priorityBackground:
+            self.buffer[sectionName][bufferName]['urgent'].add((row, col))
+
+    def setSection(self, bufferName, sectionName, colors):
+        '''
+        Set the cells of a section visible at the current scroll offsets of
+        a buffer, from a flat list of red, green values in section order
+        (see sectionCoords).
+        '''
+        if bufferName == '_cur': bufferName = self.currentBuffer
+        buf = self.buffer[sectionName][bufferName]
+        coords = self.sectionCoords[sectionName]
+        for i in range(min(len(coords), len(colors) // 2)):
+            row, col = coords[i]
+            self.set(bufferName, sectionName, buf['rowOffset'] + row, buf['colOffset'] + col, colors[2 * i], colors[2 * i + 1])
+
+    def setFrame(self, bufferName, colors):
+        '''
+        Set the visible cells of a buffer from a flat list of red, green
+        values in rapid update order (grid rows, right column, top row), as
+        returned by getFrame().
+        '''
+        if len(colors) not in (128, 144, 160):
+            raise ValueError('a frame must have either 128, 144 or 160 values')
+        i = 0
+        for section in ('center', 'right', 'top'):
+            n = 2 * len(self.sectionCoords[section])
+            self.setSection(bufferName, section, colors[i:i + n])
+            i += n
+
+    def setRow(self, bufferName, row, colors):
+        '''
+        Set a row of visible cells of a buffer from a flat list of red, green
+        values: rows 0 to 7 are grid rows, where a 9th cell is the right
+        column, and row 8 is the top row.
+        '''
+        if bufferName == '_cur': bufferName = self.currentBuffer
+        if row == 8:
+            self.setSection(bufferName, 'top', colors)
+            return
+        for col in range(min(9, len(colors) // 2)):
+            sectionName = 'right' if col == 8 else 'center'
+            buf = self.buffer[sectionName][bufferName]
+            self.set(bufferName, sectionName, buf['rowOffset'] + row, buf['colOffset'] + col, colors[2 * col], colors[2 * col + 1])
+
+    def indexesToColors(self, indexes):
+        '''
+        Expand compact color indexes (red + 4 * green) to red, green values.
+        '''
+        colors = []
+        for index in indexes:
+            index = int(index)
+            colors.append(index & 3)
+            colors.append((index >> 2) & 3)
+        return colors
 
     def scroll(self, bufferName, sectionName, row, col):
         if bufferName == '_cur': bufferName = self.currentBuffer
@@ -0,0 +1,150 @@
+import marshal
+import os
+import sys
+import time
+
+try:
+    perfCounter = time.perf_counter
+except AttributeError:
+    perfCounter = time.time
+
+class HandlerProfiler(object):
+    '''
+    Deterministic profiling of the message handlers (name_1 methods) of a
+    pyext object, for interpreters external profilers can't attach to.
+
+    start() replaces the selected handlers of the object with wrappers
+    tracing the calls made while they run, so that the rest of the session
+    runs untraced; stop() restores them, and writes the profile in pstats
+    format, and as collapsed stacks ("caller;callee self-time-in-us" lines)
+    for flame graph tools.
+    '''
+
+    def __init__(self, pdobj):
+        self.pdobj = pdobj
+        self.handlers = [] # names of the wrapped handlers
+        self.clock = perfCounter
+        self.reset()
+
+    def reset(self):
+        self.stack = [] # [key, path, start time, time in callees] of the calls in progress
+        self.active = {} # key or (caller key, key) -> number of calls in progress
+        self.stats = {} # key -> [primitive calls, calls, self time, cumulative time, {caller key: [same]}]
+        self.stacks = {} # path -> self time
+        self.depth = 0
+
+    def isRunning(self):
+        return bool(self.handlers)
+
+    def getHandlerNames(self):
+        return [name for name in dir(type(self.pdobj)) if name.endswith('_1') and not name.startswith('profile')]
+
+    def start(self, *handlers):
+        '''
+        Start profiling the given handlers (e.g. 'tick' or 'tick_1'), or all
+        the handlers of the object if none are given. A profile in progress
+        is discarded.
+        '''
+        self.restoreHandlers()
+        self.reset()
+        names = [str(name) if str(name).endswith('_1') else '%s_1' % name for name in handlers]
+        for name in names or self.getHandlerNames():
+            if not hasattr(self.pdobj, name):
+                raise ValueError('no such handler: %s' % name)
+            setattr(self.pdobj, name, self.makeWrapper(getattr(self.pdobj, name)))
+            self.handlers.append(name)
+
+    def stop(self, path):
+        '''
+        Stop profiling, and write the pstats profile to path and the
+        collapsed stacks to path + '.collapsed'; return these paths.
+        '''
+        self.restoreHandlers()
+        stats = {}
+        for key, (cc, nc, tt, ct, callers) in self.stats.items():
+            # pstats orders the counts of the callers the other way round:
+            callers = dict((caller, (s[1], s[0], s[2], s[3])) for caller, s in callers.items())
+            stats[key] = (cc, nc, tt, ct, callers)
+        with open(path, 'wb') as f:
+            marshal.dump(stats, f)
+        collapsedPath = path + '.collapsed'
+        with open(collapsedPath, 'w') as f:
+            for stack, selfTime in sorted(self.stacks.items()):
+                f.write('%s %d\n' % (';'.join(self.getFrameName(key) for key in stack), int(round(1e6 * selfTime))))
+        self.reset()
+        return path, collapsedPath
+
+    def restoreHandlers(self):
+        for name in self.handlers:
+            delattr(self.pdobj, name)
+        self.handlers = []
+
+    def makeWrapper(self, handler):
+        def profiled(*args):
+            if self.depth:
+                return handler(*args)
+            self.depth = 1
+            # pyext objects share the interpreter: when called by a handler
+            # of another profiled object, hand the trace back to it after
+            previous = sys.getprofile()
+            sys.setprofile(self.trace)
+            try:
+                return handler(*args)
+            finally:
+                sys.setprofile(previous)
+                self.depth = 0
+                # calls interrupted by the end of the trace (e.g. setprofile):
+                for i, entry in enumerate(self.stack):
+                    self.active[entry[0]] -= 1
+                    if i: self.active[self.stack[i - 1][0], entry[0]] -= 1
+                del self.stack[:]
+        return profiled
+
+    def getKey(self, frame, event, arg):
+        if event == 'c_call':
+            return ('~', 0, '<built-in method %s>' % getattr(arg, '__name__', arg))
+        code = frame.f_code
+        return (code.co_filename, code.co_firstlineno, code.co_name)
+
+    def getFrameName(self, key):
+        filename, line, name = key
+        if filename == '~':
+            return name
+        return '%s (%s:%d)' % (name, os.path.basename(filename), line)
+
+    def trace(self, frame, event, arg):
+        now = self.clock()
+        if event == 'call' or event == 'c_call':
+            key = self.getKey(frame, event, arg)
+            path = (self.stack[-1][1] if self.stack else ()) + (key,)
+            if self.stack:
+                pair = self.stack[-1][0], key
+                self.active[pair] = self.active.get(pair, 0) + 1
+            self.stack.append([key, path, now, 0.])
+            self.active[key] = self.active.get(key, 0) + 1
+        elif event == 'return' or event == 'c_return' or event == 'c_exception':
+            if not self.stack:
+                return # a call made before the trace started
+            key, path, start, calleeTime = self.stack.pop()
+            self.active[key] -= 1
+            elapsed = now - start
+            selfTime = elapsed - calleeTime
+            entry = self.stats.get(key)
+            if entry is None:
+                entry = self.stats[key] = [0, 0, 0., 0., {}]
+            # time spent in a recursive call is already in the outer one (of
+            # the function, or of the same caller and function, as cProfile):
+            counts = [(entry, self.active[key] > 0)]
+            if self.stack:
+                self.stack[-1][3] += elapsed
+                caller = self.stack[-1][0]
+                if caller not in entry[4]:
+                    entry[4][caller] = [0, 0, 0., 0.]
+                self.active[caller, key] -= 1
+                counts.append((entry[4][caller], self.active[caller, key] > 0))
+            for s, recursive in counts:
+                s[0] += 0 if recursive else 1
+                s[1] += 1
+                s[2] += selfTime
+                s[3] += 0. if recursive else elapsed
+            self.stacks[path] = self.stacks.get(path, 0.) + selfTime
@@ -1,4 +1,8 @@
 class Launchkey(object):
+    # LED write priorities (see writeLed()):
+    priorityBackground = 0
+    priorityFeedback = 1
+
     def __init__(self):
         self.portName = {0: 'MIDI', 1: 'InControl'}
         self.reportUnrecognizedMessages = False
@@ -21,10 +25,26 @@ class Launchkey(object):
     def writeMidi(self, port, v1, v2, v3):
         raise RuntimeError('method Launchkey.writeMidi not implemented')
 
+    def writeLed(self, port, v1, v2, v3, priority=0):
+        '''
+        Write a message addressing a single LED. Implementations pacing their
+        output can coalesce them, and send higher priorities first.
+        '''
+        self.writeMidi(port, v1, v2, v3)
+
+    def discardLeds(self):
+        '''
+        Called when the LED writes not sent yet are superseded (reset);
+        implementations pacing their output can drop them.
+        '''
+        pass
+
     def onMidiData(self, port, data):
+        # note off messages are reported with velocity 0:
+        velocity = data[2] if data[0] & 0xF0 == 0x90 else 0
         if port == 0:
             if data[0] & 0xF0 in (0x90, 0x80):
-                self.onNoteEvent(data[1], data[2])
+                self.onNoteEvent(data[1], velocity)
                 return
         elif port == 1:
             if data[0] in (0xB0, ):
@@ -37,16 +57,17 @@ class Launchkey(object):
             elif data[0] in (0x90, 0x80) and data[1] & 0xF0 in (0x60, 0x70) and data[1] & 0x0F <= 8:
                 row = int(data[1] & 0xF0 == 0x70)
                 col = data[1] & 0x0F
-                self.onPadEvent(row, col, data[2])
+                self.onPadEvent(row, col, velocity)
                 return
         if self.reportUnrecognizedMessages:
             fmt = 'Launchkey: unrecognized midi data on %s iface: %02X %02X %02X'
-            print(fmt % (self.portName[port]) + tuple(data))
+            print(fmt % ((self.portName[port],) + tuple(data)))
 
     def clip(self, x, xmin, xmax):
         return int(max(xmin, min(xmax, x)))
 
     def reset(self):
+        self.discardLeds()
         self.writeMidi(1, 0xB0, 0x00, 0x00)
 
     def setExtendedMode(self, enable):
@@ -59,12 +80,12 @@ class Launchkey(object):
         copy = int(copy)
         return r | (g << 4) | (clear << 3) | (copy << 2)
 
-    def setLed(self, row, col, r, g):
+    def setLed(self, row, col, r, g, priority=0):
         row = self.clip(row, 0, 1)
         col = self.clip(col, 0, 8)
         r = self.clip(r, 0, 3)
         g = self.clip(g, 0, 3)
         status, addr = 0x90, 0x60 + row * 0x10 + col
         val = (r & 3) | ((g & 3) << 4)
-        self.writeMidi(1, status, addr, val)
+        self.writeLed(1, status, addr, val, priority)
 
@@ -1,23 +1,46 @@
 class Launchpad(object):
+    # LED write priorities (see writeLed()):
+    priorityBackground = 0
+    priorityFeedback = 1
+
     def onButtonEvent(self, row, col, pressed):
         raise RuntimeError('method Launchpad.onButtonEvent not implemented')
 
     def writeMidi(self, v1, v2, v3):
         raise RuntimeError('method Launchpad.writeMidi not implemented')
 
+    def writeLed(self, v1, v2, v3, priority=0):
+        '''
+        Write a message addressing a single LED. Implementations pacing their
+        output can coalesce them, and send higher priorities first.
+        '''
+        self.writeMidi(v1, v2, v3)
+
+    def discardLeds(self):
+        '''
+        Called when the LED writes not sent yet are superseded (reset, full
+        frame); implementations pacing their output can drop them.
+        '''
+        pass
+
     def onMidiData(self, data):
-        if data[0] == 0xB0:
+        status = data[0] & 0xF0
+        if status == 0xB0:
+            if not 0x68 <= data[1] < 0x70: return
             row = 8
             col = data[1] - 104
-        else:
+        elif status in (0x90, 0x80):
             row = data[1] // 16
             col = data[1] % 16
-        self.onButtonEvent(row, col, data[2] > 0)
+        else:
+            return
+        self.onButtonEvent(row, col, status != 0x80 and data[2] > 0)
 
     def clip(self, x, xmin, xmax):
         return int(max(xmin, min(xmax, x)))
 
     def reset(self):
+        self.discardLeds()
         self.writeMidi(0xB0, 0x00, 0x00)
 
     def makeValue(self, r, g, clear=False, copy=False):
@@ -27,14 +50,14 @@ class Launchpad(object):
         copy = int(copy)
         return r | (g << 4) | (clear << 3) | (copy << 2)
 
-    def setLed(self, row, col, r, g, clear=False, copy=False):
+    def setLed(self, row, col, r, g, clear=False, copy=False, priority=0):
         row = self.clip(row, 0, 8)
         col = self.clip(col, 0, 8)
         r = self.clip(r, 0, 3)
         g = self.clip(g, 0, 3)
         if row == 8: status, addr = 0xB0, 0x68 + col # top row
         else: status, addr = 0x90, (row & 0x0F) << 4 | 0x0F & col
-        self.writeMidi(status, addr, self.makeValue(r, g, clear, copy))
+        self.writeLed(status, addr, self.makeValue(r, g, clear, copy), priority)
 
     def setBuffers(self, displaying, updating, flash=False, copy=False):
         displaying = self.clip(displaying, 0, 1)
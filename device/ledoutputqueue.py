@@ -0,0 +1,134 @@
+import time
+from collections import deque, OrderedDict
+
+try:
+    monotonic = time.monotonic
+except AttributeError:
+    monotonic = time.time
+
+class LedOutputQueue(object):
+    '''
+    Paced output of device LED traffic.
+
+    Messages are queued instead of being written right away, and each call
+    to flush() writes at most bytesPerSecond / maxFrameRate bytes of them
+    (by default, what a 31.25 kbit/s MIDI link drains in one frame). Flushes
+    are at least 1 / maxFrameRate s apart: when there is something to send,
+    schedule(delay) is called, and the owner must call flush() after delay
+    milliseconds.
+
+    LED writes are keyed by the LED they address: a write to an LED which is
+    still queued replaces it (the older one is counted as coalesced). Within
+    a run of LED writes, higher priorities (playhead, feedback) are sent
+    first. Other messages (resets, buffer flips, rapid updates) are sent in
+    order, after the LED writes queued before them.
+    '''
+
+    priorities = 2
+
+    def __init__(self, write, schedule, clock=None):
+        self.write = write # write(port, v1, v2, v3)
+        self.schedule = schedule # schedule(delay): flush() is due in delay ms
+        self.clock = clock if clock is not None else monotonic
+        self.maxFrameRate = 50.
+        self.bytesPerSecond = 3125.
+        # runs of LED writes (a {key: message} dict per priority) and other
+        # messages ((port, v1, v2, v3) tuples), in order:
+        self.queue = deque()
+        self.depth = 0 # queued messages
+        self.scheduled = False
+        self.lastFlush = None
+        self.resetStats()
+
+    def resetStats(self):
+        self.numSent = 0
+        self.numCoalesced = 0
+        self.numDropped = 0
+        self.numFlushes = 0
+        self.maxDepth = self.depth
+
+    def setRate(self, maxFrameRate, bytesPerSecond=None):
+        self.maxFrameRate = max(1., float(maxFrameRate))
+        if bytesPerSecond is not None:
+            self.bytesPerSecond = max(3., float(bytesPerSecond))
+
+    def getFrameBudget(self):
+        '''
+        Return the number of (3 bytes) messages a flush can write.
+        '''
+        return max(1, int(self.bytesPerSecond / self.maxFrameRate) // 3)
+
+    def putLed(self, port, v1, v2, v3, priority=0):
+        priority = max(0, min(self.priorities - 1, int(priority)))
+        key = (port, v1, v2)
+        run = self.queue[-1] if self.queue else None
+        if not isinstance(run, list):
+            run = [OrderedDict() for p in range(self.priorities)]
+            self.queue.append(run)
+        for p, leds in enumerate(run):
+            if key in leds:
+                del leds[key]
+                self.depth -= 1
+                self.numCoalesced += 1
+                priority = max(priority, p)
+        run[priority][key] = (port, v1, v2, v3)
+        self.addDepth(1)
+
+    def put(self, port, v1, v2, v3):
+        self.queue.append((port, v1, v2, v3))
+        self.addDepth(1)
+
+    def addDepth(self, n):
+        self.depth += n
+        self.maxDepth = max(self.maxDepth, self.depth)
+        self.requestFlush()
+
+    def discard(self, port):
+        '''
+        Drop the queued LED writes to a port, when they are superseded (e.g.
+        by a reset or a full frame).
+        '''
+        for entry in self.queue:
+            if not isinstance(entry, list): continue
+            for leds in entry:
+                for key in [key for key in leds if key[0] == port]:
+                    del leds[key]
+                    self.depth -= 1
+                    self.numDropped += 1
+
+    def requestFlush(self):
+        if self.scheduled or not self.depth:
+            return
+        self.scheduled = True
+        delay = 0.
+        if self.lastFlush is not None:
+            delay = max(0., self.lastFlush + 1. / self.maxFrameRate - self.clock())
+        self.schedule(1000. * delay)
+
+    def flush(self):
+        '''
+        Write as many queued messages as the frame budget allows, and
+        schedule the next flush if some are left.
+        '''
+        self.scheduled = False
+        self.lastFlush = self.clock()
+        self.numFlushes += 1
+        budget = self.getFrameBudget()
+        queue = self.queue
+        while budget > 0 and queue:
+            entry = queue[0]
+            if isinstance(entry, list):
+                for leds in reversed(entry):
+                    while budget > 0 and leds:
+                        key, message = leds.popitem(last=False)
+                        self.write(*message)
+                        budget -= 1
+                if any(entry): break
+            else:
+                self.write(*entry)
+                budget -= 1
+            queue.popleft()
+        sent = self.getFrameBudget() - budget
+        self.numSent += sent
+        self.depth -= sent
+        self.requestFlush()
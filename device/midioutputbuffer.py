@@ -0,0 +1,28 @@
+class MidiOutputBuffer(object):
+    '''
+    Collect the MIDI bytes written while handling an inbound message, so that
+    they cross the Pd boundary as one list message per port: flush() is
+    called when the handler returns, and calls send(port, data) for each
+    port written to. The data list is reused: send must not keep it.
+    '''
+
+    def __init__(self, send):
+        self.send = send
+        self.ports = [] # in order of first write
+        self.data = {}
+
+    def write(self, port, v1, v2, v3):
+        data = self.data.get(port)
+        if data is None:
+            data = self.data[port] = []
+            self.ports.append(port)
+        data.append(v1)
+        data.append(v2)
+        data.append(v3)
+
+    def flush(self):
+        for port in self.ports:
+            data = self.data[port]
+            if data:
+                self.send(port, data)
+                del data[:]
@@ -0,0 +1,78 @@
+def getDataLength(status):
+    if status < 0xF0:
+        return 1 if 0xC0 <= status < 0xE0 else 2
+    return {0xF1: 1, 0xF2: 2, 0xF3: 1}.get(status, 0)
+
+class MidiParser(object):
+    '''
+    Incremental parser of a MIDI byte stream.
+
+    feed() accepts any number of bytes at once, and calls callback(data) for
+    each complete message, where data is [status, data1, data2] (0 for the
+    data bytes a shorter message doesn't have). The list is reused by the
+    next message: callbacks must not keep it.
+
+    Running status is supported. Real-time bytes are reported when they
+    arrive, even in the middle of another message. SysEx messages (without
+    the F0/F7 bytes) are passed to sysexCallback(data), or skipped if it is
+    None.
+    '''
+
+    dataLength = tuple(getDataLength(status) for status in range(256))
+
+    def __init__(self, callback, sysexCallback=None):
+        self.callback = callback
+        self.sysexCallback = sysexCallback
+        self.message = [0, 0, 0]
+        self.realTimeMessage = [0, 0, 0]
+        self.reset()
+
+    def reset(self):
+        self.runningStatus = 0
+        self.pending = 0 # data bytes missing from the current message
+        self.index = 0 # index of the next data byte in message
+        self.sysex = None
+
+    def feed(self, data):
+        message = self.message
+        for b in data:
+            b = int(b)
+            if b >= 0xF8:
+                self.realTimeMessage[0] = b
+                self.callback(self.realTimeMessage)
+                continue
+            if b & 0x80:
+                if self.sysex is not None:
+                    # any status byte ends a SysEx message
+                    if b == 0xF7 and self.sysexCallback is not None:
+                        self.sysexCallback(self.sysex)
+                    self.sysex = None
+                if b == 0xF0:
+                    self.sysex = bytearray()
+                    self.runningStatus = 0
+                    self.pending = 0
+                elif b != 0xF7:
+                    self.runningStatus = b if b < 0xF0 else 0
+                    self.begin(b)
+                continue
+            if self.sysex is not None:
+                self.sysex.append(b)
+                continue
+            if not self.pending:
+                if not self.runningStatus:
+                    continue # data byte without status
+                self.begin(self.runningStatus)
+            message[self.index] = b
+            self.index += 1
+            self.pending -= 1
+            if not self.pending:
+                self.callback(message)
+
+    def begin(self, status):
+        message = self.message
+        message[0] = status
+        message[1] = message[2] = 0
+        self.index = 1
+        self.pending = self.dataLength[status]
+        if not self.pending:
+            self.callback(message)
@@ -1,30 +1,15 @@
 import pyext
-from device import Launchkey
+from device import Launchkey, MidiParser, MidiOutputBuffer, HandlerProfiler
 
 class LaunchkeyPdImpl(Launchkey):
     def __init__(self, pdobj):
         super(LaunchkeyPdImpl, self).__init__()
         self.pdobj = pdobj
-        self.midiBuffer = [[], []]
+        self.midiParsers = (MidiParser(lambda data: self.onMidiData(0, data)),
+                            MidiParser(lambda data: self.onMidiData(1, data)))
 
     def writeMidi(self, port, v1, v2, v3):
-        if port == 0:
-            self.pdobj._outlet(1, ['midi', v1])
-            self.pdobj._outlet(1, ['midi', v2])
-            self.pdobj._outlet(1, ['midi', v3])
-        elif port == 1:
-            self.pdobj._outlet(1, ['cmidi', v1])
-            self.pdobj._outlet(1, ['cmidi', v2])
-            self.pdobj._outlet(1, ['cmidi', v3])
-
-    def bufferMidi(self, port, f):
-        if f & 0x80: # status bit
-            self.midiBuffer[port] = [f]
-        else:
-            self.midiBuffer[port].append(f)
-        if len(self.midiBuffer[port]) == 3:
-            self.onMidiData(port, self.midiBuffer[port])
-            self.midiBuffer[port] = []
+        self.pdobj.midiOut.write(port, v1, v2, v3)
 
     def onNoteEvent(self, note, velocity):
         self.pdobj._outlet(1, ['note', note, velocity])
@@ -44,19 +29,33 @@ class LaunchkeyPd(pyext._class):
 
     def __init__(self, *args):
         self.launchkey = LaunchkeyPdImpl(self)
+        self.midiOut = MidiOutputBuffer(self.sendMidi)
+        self.profiler = HandlerProfiler(self)
 
-    def midi_1(self, f):
-        self.launchkey.bufferMidi(0, int(f))
+    def sendMidi(self, port, data):
+        self._outlet(1, [('midi', 'cmidi')[port]] + data)
 
-    def cmidi_1(self, f):
-        self.launchkey.bufferMidi(1, int(f))
+    def profilestart_1(self, *handlers):
+        self.profiler.start(*handlers)
+
+    def profilestop_1(self, path):
+        self._outlet(1, ['profile'] + list(self.profiler.stop(str(path))))
+
+    def midi_1(self, *data):
+        self.launchkey.midiParsers[0].feed(data)
+
+    def cmidi_1(self, *data):
+        self.launchkey.midiParsers[1].feed(data)
 
     def reset_1(self):
         self.launchkey.reset()
+        self.midiOut.flush()
 
     def extendedmode_1(self, enable):
         self.launchkey.setExtendedMode(enable)
+        self.midiOut.flush()
 
     def setled_1(self, row, col, r, g, *args):
         self.launchkey.setLed(row, col, r, g)
+        self.midiOut.flush()
 
@@ -1,25 +1,14 @@
 import pyext
-from device import Launchpad
+from device import Launchpad, MidiParser, MidiOutputBuffer, HandlerProfiler
 
 class LaunchpadPdImpl(Launchpad):
     def __init__(self, pdobj):
         super(LaunchpadPdImpl, self).__init__()
         self.pdobj = pdobj
-        self.midiBuffer = []
+        self.midiParser = MidiParser(self.onMidiData)
 
     def writeMidi(self, v1, v2, v3):
-        self.pdobj._outlet(1, ['midi', v1])
-        self.pdobj._outlet(1, ['midi', v2])
-        self.pdobj._outlet(1, ['midi', v3])
-
-    def bufferMidi(self, f):
-        if f & 0x80: # status bit
-            self.midiBuffer = [f]
-        else:
-            self.midiBuffer.append(f)
-        if len(self.midiBuffer) == 3:
-            self.onMidiData(self.midiBuffer)
-            self.midiBuffer = []
+        self.pdobj.midiOut.write(0, v1, v2, v3)
 
     def onButtonEvent(self, row, col, pressed):
         self.pdobj._outlet(1, ['button', row, col, int(pressed)])
@@ -30,26 +19,42 @@ class LaunchpadPd(pyext._class):
 
     def __init__(self):
         self.launchpad = LaunchpadPdImpl(self)
+        self.midiOut = MidiOutputBuffer(self.sendMidi)
+        self.profiler = HandlerProfiler(self)
 
-    def midi_1(self, f):
-        self.launchpad.bufferMidi(int(f))
+    def sendMidi(self, port, data):
+        self._outlet(1, ['midi'] + data)
+
+    def profilestart_1(self, *handlers):
+        self.profiler.start(*handlers)
+
+    def profilestop_1(self, path):
+        self._outlet(1, ['profile'] + list(self.profiler.stop(str(path))))
+
+    def midi_1(self, *data):
+        self.launchpad.midiParser.feed(data)
 
     def reset_1(self):
         self.launchpad.reset()
+        self.midiOut.flush()
 
     def setled_1(self, row, col, r, g, *args):
         clear = bool(args[0]) if len(args) >= 1 else False
         copy = bool(args[1]) if len(args) >= 2 else False
         self.launchpad.setLed(row, col, r, g, clear, copy)
+        self.midiOut.flush()
 
     def buffers_1(self, displaying, updating, *args):
         flash = int(bool(args[0])) if len(args) >= 1 else False
         copy = int(bool(args[1])) if len(args) >= 2 else False
         self.launchpad.setBuffers(displaying, updating, flash, copy)
+        self.midiOut.flush()
 
     def testleds_1(self, val):
         self.launchpad.testLeds(val)
+        self.midiOut.flush()
 
     def setdutycycle_1(self, num, denom):
         self.launchpad.setDutyCycle(num, denom)
+        self.midiOut.flush()
 
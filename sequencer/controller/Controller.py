@@ -8,18 +8,18 @@ class Controller(object):
     def onTrackStatusChange(self, trackIndex, volume, muted, active):
         pass
 
-    def onPatternChange(self, trackIndex, patternIndex):
+    def onPatternChange(self, trackIndex, patternIndex, changes):
         pass
 
     def onCurrentRowChange(self, row):
         pass
 
-    def onSongChange(self):
+    def onSongChange(self, changes):
         pass
 
     def onPlaybackStatusChange(self, playing):
         pass
 
-    def onActiveNotes(self, notes):
+    def onActiveNotes(self, trackIndex, changes):
         pass
 
@@ -1,4 +1,4 @@
-from LPController import *
+from .LPController import *
 
 class NumberSelectController(LPController):
     def __init__(self, parent, callback, currentValue=0, minValue=0, maxValue=64, colorFunc=None):
@@ -21,7 +21,7 @@ class NumberSelectController(LPController):
             if v == 0:
                 self.io.launchpad.set('default', 'right', 7, 8, *color)
             else:
-                row, col = (v - 1) / 8, (v - 1) % 8
+                row, col = (v - 1) // 8, (v - 1) % 8
                 self.io.launchpad.set('default', 'center', row, col, *color)
         if sync:
             self.io.launchpad.syncBuffer('default')
@@ -1,4 +1,4 @@
-from PatternController import *
+from .PatternController import *
 
 class PatternAddNoteController(PatternController):
     def __init__(self, parent, patternRow, note):
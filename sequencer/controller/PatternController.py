@@ -1,7 +1,7 @@
-from LPController import *
+from .LPController import *
 
 class PatternController(LPController):
-    def onPatternChange(self, trackIndex, patternIndex):
+    def onPatternChange(self, trackIndex, patternIndex, changes):
         if self.io.lpcontroller == self and self.trackIndex == trackIndex and self.patternIndex == patternIndex:
-            self.update()
+            self.io.requestRedraw(self)
 
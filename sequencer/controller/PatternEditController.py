@@ -1,11 +1,11 @@
-from PatternController import *
-from PatternAddNoteController import *
-from PatternEditNoteController import *
-from SongEditController import *
-from PatternSelectController import *
-from NumberSelectController import *
+from .PatternController import *
+from .PatternAddNoteController import *
+from .PatternEditNoteController import *
+from .SongEditController import *
+from .PatternSelectController import *
+from .NumberSelectController import *
 from sequencer.util import NoteMapping, scales
-from LKController import *
+from .LKController import *
 from collections import defaultdict
 
 class PatternEditController(PatternController, LKController):
@@ -17,6 +17,9 @@ class PatternEditController(PatternController, LKController):
         self.pattern = self.track.patterns[self.patternIndex]
         self.scroll = defaultdict(lambda: [36, 0])
         self.renderNoteOffs = False
+        # rendered layers, valid while this is the active LP controller:
+        self.gridLayer = {} # (row, patternRow) -> color of the note grid
+        self.playHeadCol = None # column of the drawn playhead
         self.track.addObserver(self)
         self.pattern.addObserver(self)
         self.shift = False
@@ -41,9 +44,11 @@ class PatternEditController(PatternController, LKController):
             return
         if self.trackIndex != trackIndex:
             self.track.removeObserver(self)
+            self.track.activeNotes.removeObserver(self)
             self.trackIndex = self.io.song.activeTrack.trackIndex
             self.track = self.io.song.tracks[self.trackIndex]
             self.track.addObserver(self)
+            self.track.activeNotes.addObserver(self)
         self.pattern.removeObserver(self)
         self.patternIndex = max(0, min(len(self.track.patterns) - 1, patternIndex))
         self.pattern = self.track.patterns[self.patternIndex]
@@ -107,20 +112,41 @@ class PatternEditController(PatternController, LKController):
     def onTrackStatusChange(self, trackIndex, volume, muted, active):
         if active == False:
             newTrack = self.io.song.activeTrack
-            u = self.io.lpcontroller == self
-            self.selectPattern(newTrack.trackIndex, newTrack.lastSelectedPatternIndex, update=u)
+            self.selectPattern(newTrack.trackIndex, newTrack.lastSelectedPatternIndex, update=False)
+            if self.io.lpcontroller == self:
+                self.io.requestRedraw(self)
 
     def onPlayHeadChange(self, trackIndex, patternIndex, playHeadRow):
         if self.trackIndex == trackIndex and self.patternIndex == patternIndex:
-            self.io.lpcontroller.update()
+            if self.io.lpcontroller == self:
+                self.drawPlayHead()
+                self.io.requestSync()
+            else:
+                self.io.requestRedraw(self.io.lpcontroller)
+
+    def onPatternChange(self, trackIndex, patternIndex, changes):
+        if self.io.lpcontroller == self and self.trackIndex == trackIndex and self.patternIndex == patternIndex:
+            # the grid shows the note columns of the visible pattern rows:
+            cols = self.getVisibleCols()
+            if changes.patternIntersects(trackIndex, patternIndex, cols[0], cols[-1] + 1, self.track.noteCols):
+                self.drawGrid()
+                self.io.requestSync()
 
     def onPlaybackStatusChange(self, playing):
-        if self.io.isActiveController(self):
-            if not playing: self.update()
-
-    def onActiveNotes(self, notes):
-        if self.io.isActiveController(self):
-            self.update()
+        if self.io.lpcontroller == self:
+            self.drawPlayHead()
+            self.io.requestSync()
+        elif self.io.isActiveController(self):
+            if not playing: self.io.requestRedraw(self)
+
+    def onActiveNotes(self, trackIndex, changes):
+        # only redraw the right column rows of the notes that changed:
+        if self.io.lpcontroller != self or trackIndex != self.trackIndex:
+            return
+        for voice, oldNote, newNote in changes:
+            self.drawActiveNote(oldNote)
+            self.drawActiveNote(newNote)
+        self.io.requestSync()
 
     def setScale(self, i):
         # try to maintain scroll (i.e. see the same note) after changing scale:
@@ -158,38 +184,89 @@ class PatternEditController(PatternController, LKController):
         rows = mapping.getGridRows(note)
         return rows
 
-    def update(self, sync=True):
-        self.io.launchpad.clearBuffer('default')
-        self.io.launchpad.invertRows('default','center')
-        self.io.launchpad.invertRows('default','right')
-        self.io.launchpad.scroll('default','center', *self.scroll[self.trackIndex])
-        self.io.launchpad.scroll('default','right', self.scroll[self.trackIndex][0], 0)
-
-        # draw playhead
-        if self.io.transport.isPlaying():
-            for row in range(128):
-                self.io.launchpad.set('default', 'center', row, self.pattern.playHeadRow, 1, 0)
-
-        # draw active notes
-        for note in self.track.activeNotes.get():
-            for row in self.note2rows(note):
-                self.io.launchpad.set('default', 'right', row, 8, 1, 0)
-        for note, active in self.track.liveNotes.items():
-            if not active: continue
-            for row in self.note2rows(note):
-                self.io.launchpad.set('default', 'right', row, 8, 0, 3)
-
-        # draw notes
-        for note, intervals in self.pattern.noteGetIntervals().items():
+    def getVisibleRows(self):
+        rowOffset = self.scroll[self.trackIndex][0]
+        return range(rowOffset, rowOffset + 8)
+
+    def getVisibleCols(self):
+        colOffset = self.scroll[self.trackIndex][1]
+        return range(colOffset, colOffset + 8)
+
+    def renderGrid(self):
+        '''
+        Render the cells of the note grid in the viewport (the 8 grid rows
+        and 8 pattern rows the center section is scrolled to).
+        '''
+        rows = self.getVisibleRows()
+        cols = self.getVisibleCols()
+        visibleNotes = {} # note -> grid rows
+        for row in rows:
+            note = self.row2note(row)
+            if note > 0: visibleNotes.setdefault(note, []).append(row)
+        grid = {}
+        for note, intervals in self.pattern.noteGetIntervals(cols[0], cols[-1]).items():
+            if note not in visibleNotes: continue
             for (patternRowStart, patternRowStop) in intervals:
-                for row in self.note2rows(note):
-                    self.io.launchpad.set('default', 'center', row, patternRowStart, 2, 3)
-                    for patternRow in range(patternRowStart + 1, patternRowStop):
-                        self.io.launchpad.set('default', 'center', row, patternRow, 0, 1)
-                    if self.renderNoteOffs:
-                        self.io.launchpad.set('default', 'center', row, patternRowStop, 1, 0)
-
-        # turn on buttons with a function
+                for row in visibleNotes[note]:
+                    if patternRowStart in cols:
+                        grid[row, patternRowStart] = (2, 3)
+                    for patternRow in range(max(patternRowStart + 1, cols[0]), min(patternRowStop, cols[-1] + 1)):
+                        grid[row, patternRow] = (0, 1)
+                    if self.renderNoteOffs and patternRowStop in cols:
+                        grid[row, patternRowStop] = (1, 0)
+        return grid
+
+    def drawGridCell(self, row, col, priority=0):
+        # notes are drawn over the playhead
+        color = self.gridLayer.get((row, col))
+        if color is None:
+            color = (1, 0) if col == self.playHeadCol else (0, 0)
+        self.io.launchpad.set('default', 'center', row, col, *color, priority=priority)
+
+    def drawGrid(self):
+        '''
+        Render the note grid layer, and draw the cells that changed.
+        '''
+        oldGrid, self.gridLayer = self.gridLayer, self.renderGrid()
+        for cell in set(oldGrid) | set(self.gridLayer):
+            if oldGrid.get(cell) != self.gridLayer.get(cell):
+                self.drawGridCell(*cell)
+
+    def drawPlayHead(self):
+        '''
+        Move the playhead layer to the current pattern row, redrawing the
+        visible cells of the columns it leaves and enters.
+        '''
+        col = self.pattern.playHeadRow if self.io.transport.isPlaying() else None
+        if col == self.playHeadCol:
+            return
+        oldCol, self.playHeadCol = self.playHeadCol, col
+        for c in (oldCol, col):
+            if c not in self.getVisibleCols(): continue
+            for row in self.getVisibleRows():
+                self.drawGridCell(row, c, self.io.launchpad.priorityFeedback)
+
+    def drawActiveNote(self, note):
+        if note < 1: return
+        rows = self.getVisibleRows()
+        for row in self.note2rows(note):
+            if row in rows:
+                self.drawNoteRow(row)
+
+    def drawNoteRow(self, row):
+        # right column: live notes are drawn over active notes
+        note = self.row2note(row)
+        if note < 1:
+            color = (0, 0)
+        elif self.track.liveNotes.get(note):
+            color = (0, 3)
+        elif self.track.activeNotes.isActive(note):
+            color = (1, 0)
+        else:
+            color = (0, 0)
+        self.io.launchpad.set('default', 'right', row, 8, *color, priority=self.io.launchpad.priorityFeedback)
+
+    def drawFunctionKeys(self):
         for col in range(4):
             self.io.launchpad.set('default', 'top', 8, col, 2 * int(self.shift), 1)
         self.io.launchpad.set('default', 'top', 8, 7, 2, 1)
@@ -200,6 +277,29 @@ class PatternEditController(PatternController, LKController):
         else:
             self.io.launchpad.set('default', 'top', 8, 4, 0, 1)
             self.io.launchpad.set('default', 'top', 8, 5, 0, 1)
+            self.io.launchpad.set('default', 'top', 8, 6, 0, 0)
+
+    def update(self, sync=True):
+        '''
+        Redraw all the layers, in the viewport only. While this is the active
+        LP controller, model changes only redraw the layer they affect (see
+        drawGrid(), drawPlayHead(), drawActiveNote() and drawFunctionKeys()).
+        '''
+        self.io.launchpad.clearBuffer('default')
+        self.io.launchpad.invertRows('default','center')
+        self.io.launchpad.invertRows('default','right')
+        self.io.launchpad.scroll('default','center', *self.scroll[self.trackIndex])
+        self.io.launchpad.scroll('default','right', self.scroll[self.trackIndex][0], 0)
+
+        self.gridLayer = {}
+        self.playHeadCol = None
+        self.drawGrid()
+        self.drawPlayHead()
+
+        for row in self.getVisibleRows():
+            self.drawNoteRow(row)
+
+        self.drawFunctionKeys()
 
         if sync:
             self.io.launchpad.syncBuffer('default')
@@ -222,8 +322,7 @@ class PatternEditController(PatternController, LKController):
                 2: (self.pageLeft, self.rowLeft),
                 3: (self.pageRight, self.rowRight),
             }[col][int(self.shift)]()
-            self.io.launchpad.scroll('default', 'center', *self.scroll[self.trackIndex])
-            self.io.launchpad.syncBuffer('default')
+            self.update()
             return
         if section == 'top' and row == 8 and col == 4 and not self.shift:
             self.io.setLPController(SongEditController(self))
@@ -250,14 +349,16 @@ class PatternEditController(PatternController, LKController):
             return
         if section == 'top' and row == 8 and col == 7:
             self.shift = True
-            self.update()
+            self.drawFunctionKeys()
+            self.io.launchpad.syncBuffer('default')
             return
 
     def onLPButtonRelease(self, buf, section, row, col):
         if buf != 'default': return
         if section == 'top' and row == 8 and col == 7:
             self.shift = False
-            self.update()
+            self.drawFunctionKeys()
+            self.io.launchpad.syncBuffer('default')
             return
 
     def onButtonPress(self, buttonName):
@@ -269,13 +370,20 @@ class PatternEditController(PatternController, LKController):
             self.nextPattern()
             return
 
+    def onLiveNoteChange(self, note):
+        if self.io.lpcontroller == self:
+            self.drawActiveNote(note)
+            self.io.requestSync()
+        else:
+            self.io.requestRedraw(self.io.lpcontroller)
+
     def onNoteOn(self, note, velocity):
         self.io.writeMidi(0x90 + self.track.trackIndex, note, velocity)
         self.track.liveNotes[note] = True
-        self.update()
+        self.onLiveNoteChange(note)
 
     def onNoteOff(self, note):
         self.io.writeMidi(0x80 + self.track.trackIndex, note, 0)
         self.track.liveNotes[note] = False
-        self.update()
+        self.onLiveNoteChange(note)
 
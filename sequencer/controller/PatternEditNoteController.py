@@ -1,4 +1,4 @@
-from PatternController import *
+from .PatternController import *
 
 class PatternEditNoteController(PatternController):
     def __init__(self, parent, patternRow, note):
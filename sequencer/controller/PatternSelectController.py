@@ -1,4 +1,4 @@
-from LPController import *
+from .LPController import *
 
 class PatternSelectController(LPController):
     def __init__(self, parent, trackIndex):
@@ -19,25 +19,27 @@ class PatternSelectController(LPController):
         # called from a onButtonPress handler
         self.parent.selectPattern(self.trackIndex, patternIndex)
 
-    def selectTrack(self, trackIndex):
+    def selectTrack(self, trackIndex, update=True):
         self.trackIndex = trackIndex
         self.track = self.io.song.tracks[self.trackIndex]
         self.patternIndex = self.track.lastSelectedPatternIndex
-        self.update()
+        if update:
+            self.update()
 
-    def onPatternChange(self, trackIndex, patternIndex):
+    def onPatternChange(self, trackIndex, patternIndex, changes):
         if trackIndex == self.trackIndex:
-            self.update()
+            self.io.requestRedraw(self)
 
     def onTrackStatusChange(self, trackIndex, volume, muted, active):
         if active:
-            self.selectTrack(trackIndex)
+            self.selectTrack(trackIndex, update=False)
+            self.io.requestRedraw(self)
 
     def update(self, sync=True):
         self.io.launchpad.clearBuffer('default')
         self.io.launchpad.set('default', 'top', 8, 5, 0, 1)
         for patternIndex in range(64):
-            row, col = patternIndex / 8, patternIndex % 8
+            row, col = patternIndex // 8, patternIndex % 8
             pattern = self.track.patterns[patternIndex]
             empty = pattern.isEmpty()
             cur = patternIndex == self.patternIndex
@@ -1,6 +1,6 @@
-from LPController import *
-from SongPatternsSelectController import *
-from NumberSelectController import *
+from .LPController import *
+from .SongPatternsSelectController import *
+from .NumberSelectController import *
 
 class SongEditController(LPController):
     def __init__(self, parent):
@@ -27,25 +27,31 @@ class SongEditController(LPController):
 
     def onCurrentRowChange(self, row):
         if self.io.isActiveController(self):
-            self.update()
+            self.io.requestRedraw(self)
 
-    def onSongChange(self):
-        if self.io.isActiveController(self):
-            self.update()
+    def onSongChange(self, changes):
+        # only the rows in the viewport (and the add-row marker) are drawn:
+        if self.io.isActiveController(self) and changes.songIntersects(self.vscroll, self.vscroll + 8):
+            self.io.requestRedraw(self)
 
     def update(self, sync=True):
+        '''
+        Redraw the song rows in the viewport.
+        '''
         self.io.launchpad.clearBuffer('default')
         self.io.launchpad.scroll('default', 'center', self.vscroll, 0)
         self.io.launchpad.scroll('default', 'right', self.vscroll, 0)
 
-        for row in range(self.io.song.getLength()):
+        l = self.io.song.getLength()
+        for row in range(self.vscroll, min(l, self.vscroll + 8)):
             curRow = row == self.io.song.currentRow
             for trackIndex, track in enumerate(self.io.song.tracks):
                 empty = self.io.song.isEmpty(row, trackIndex)
                 c = [0, 0] if empty else [2, 2] if curRow else [0, 3]
                 self.io.launchpad.set('default', 'center', row, trackIndex, *c)
             self.io.launchpad.set('default', 'right', row, 8, 3 * int(curRow), 1)
-        self.io.launchpad.set('default', 'right', self.io.song.getLength(), 8, 1, 0)
+        if l < self.vscroll + 8:
+            self.io.launchpad.set('default', 'right', l, 8, 1, 0)
         self.io.launchpad.set('default', 'top', 8, 4, 2, 2)
         self.io.launchpad.set('default', 'top', 8, 0, 0, 1)
         self.io.launchpad.set('default', 'top', 8, 1, 0, 1)
@@ -67,9 +73,7 @@ class SongEditController(LPController):
             if col in range(2):
                 if col == 0: self.rowUp()
                 if col == 1: self.rowDown()
-                self.io.launchpad.scroll('default', 'center', self.vscroll, 0)
-                self.io.launchpad.scroll('default', 'right', self.vscroll, 0)
-                self.io.launchpad.syncBuffer('default')
+                self.update()
                 return
             if col == 4:
                 self.io.setLPController(self.parent)
@@ -1,5 +1,5 @@
-from LPController import *
-from LKController import *
+from .LPController import *
+from .LKController import *
 
 class SongPatternsSelectController(LPController, LKController):
     def __init__(self, parent, songRow):
@@ -21,10 +21,15 @@ class SongPatternsSelectController(LPController, LKController):
         self.songRow = max(0, min(self.io.song.getLength() - 1, row))
         self.update()
 
-    def selectTrack(self, trackIndex):
+    def selectTrack(self, trackIndex, update=True):
+        for pattern in self.track.patterns:
+            pattern.removeObserver(self)
         self.trackIndex = trackIndex
         self.track = self.io.song.tracks[self.trackIndex]
-        self.update()
+        for pattern in self.track.patterns:
+            pattern.addObserver(self)
+        if update:
+            self.update()
 
     def prevRow(self):
         self.selectRow(self.songRow - 1)
@@ -32,30 +37,38 @@ class SongPatternsSelectController(LPController, LKController):
     def nextRow(self):
         self.selectRow(self.songRow + 1)
 
-    def onSongChange(self):
-        self.update()
+    def onSongChange(self, changes):
+        # only the patterns of one song row and track are shown:
+        if self.io.lpcontroller == self and changes.songIntersects(self.songRow, self.songRow + 1, [self.trackIndex]):
+            self.io.requestRedraw(self)
 
-    def onPatternChange(self, trackIndex, patternIndex):
-        if trackIndex == self.trackIndex:
-            self.update()
+    def onPatternChange(self, trackIndex, patternIndex, changes):
+        # a pattern change can only change its empty status:
+        if self.io.lpcontroller == self and trackIndex == self.trackIndex:
+            self.drawPatternCell(patternIndex)
+            self.io.requestSync()
 
     def onTrackStatusChange(self, trackIndex, volume, muted, active):
         if active:
-            self.selectTrack(trackIndex)
+            self.selectTrack(trackIndex, update=False)
+            self.io.requestRedraw(self)
 
     def update(self, sync=True):
         self.io.launchpad.clearBuffer('default')
         self.io.launchpad.set('default', 'right', 7, 8, 0, 1)
         for patternIndex in range(64):
-            row, col = patternIndex / 8, patternIndex % 8
-            pattern = self.track.patterns[patternIndex]
-            empty = pattern.isEmpty()
-            selected = self.io.song.contains(self.songRow, self.trackIndex, patternIndex)
-            color = [2, 0] if selected else [0, 1] if empty else [2, 3]
-            self.io.launchpad.set('default', 'center', row, col, *color)
+            self.drawPatternCell(patternIndex)
         if sync:
             self.io.launchpad.syncBuffer('default')
 
+    def drawPatternCell(self, patternIndex):
+        row, col = patternIndex // 8, patternIndex % 8
+        pattern = self.track.patterns[patternIndex]
+        empty = pattern.isEmpty()
+        selected = self.io.song.contains(self.songRow, self.trackIndex, patternIndex)
+        color = [2, 0] if selected else [0, 1] if empty else [2, 3]
+        self.io.launchpad.set('default', 'center', row, col, *color)
+
     def onLPButtonPress(self, buf, section, row, col):
         super(SongPatternsSelectController, self).onLPButtonPress(buf, section, row, col)
         buf = str(buf)
@@ -1,4 +1,4 @@
-from LKController import *
+from .LKController import *
 
 class TracksController(LKController):
     def __init__(self, io):
@@ -8,21 +8,21 @@ class TracksController(LKController):
         self.io.transport.addObserver(self)
 
     def onTrackStatusChange(self, trackIndex, volume, muted, isActive):
-        self.update()
+        self.io.requestRedraw(self)
 
     def onPlaybackStatusChange(self, playing):
         self.updatePlaybackStatus()
 
     def updatePlaybackStatus(self):
-        self.io.launchkey.setLed(1, 8, *([3, 0] if self.io.transport.isPlaying() else [0, 1]))
+        self.io.launchkey.setLed(1, 8, *([3, 0] if self.io.transport.isPlaying() else [0, 1]), priority=self.io.launchkey.priorityFeedback)
 
     def update(self):
         activeTrack = self.io.song.activeTrack
         for trackIndex, track in enumerate(self.io.song.tracks):
             m = 3 * int(track.muted)
             a = 2 * int(activeTrack == track)
-            self.io.launchkey.setLed(0, trackIndex, a, a)
-            self.io.launchkey.setLed(1, trackIndex, m, 1 - m)
+            self.io.launchkey.setLed(0, trackIndex, a, a, priority=self.io.launchkey.priorityFeedback)
+            self.io.launchkey.setLed(1, trackIndex, m, 1 - m, priority=self.io.launchkey.priorityFeedback)
         self.updatePlaybackStatus()
 
     def onPadPress(self, row, col, velocity):
@@ -1,12 +1,12 @@
-from Controller import *
-from LKController import *
-from LPController import *
-from NumberSelectController import *
-from PatternAddNoteController import *
-from PatternController import *
-from PatternEditController import *
-from PatternEditNoteController import *
-from PatternSelectController import *
-from SongEditController import *
-from SongPatternsSelectController import *
-from TracksController import *
+from .Controller import *
+from .LKController import *
+from .LPController import *
+from .NumberSelectController import *
+from .PatternAddNoteController import *
+from .PatternController import *
+from .PatternEditController import *
+from .PatternEditNoteController import *
+from .PatternSelectController import *
+from .SongEditController import *
+from .SongPatternsSelectController import *
+from .TracksController import *
@@ -0,0 +1,76 @@
+class ChangeSet(object):
+    '''
+    What an edit, or a batch of edits (see Song.batch()), changed.
+
+    Pattern and song changes are recorded as the range of rows [rowStart,
+    rowStop) and the set of columns they touched (tracks, for the song);
+    None stands for all the rows, or all the columns. Track status changes
+    (volume, mute, active track) are recorded by track index.
+    '''
+
+    def __init__(self):
+        self.patterns = {} # (trackIndex, patternIndex) -> [rowStart, rowStop, cols]
+        self.song = None # [rowStart, rowStop, cols], or None if unchanged
+        self.trackStatus = set()
+
+    def isEmpty(self):
+        return not self.patterns and self.song is None and not self.trackStatus
+
+    def merge(self, change, rowStart, rowStop, cols):
+        if change is None:
+            return [rowStart, rowStop, None if cols is None else set(cols)]
+        if rowStart is None or change[0] is None:
+            change[0] = change[1] = None
+        else:
+            change[0] = min(change[0], rowStart)
+            change[1] = max(change[1], rowStop)
+        if cols is None or change[2] is None:
+            change[2] = None
+        else:
+            change[2].update(cols)
+        return change
+
+    def addPatternChange(self, trackIndex, patternIndex, rowStart=None, rowStop=None, cols=None):
+        key = (trackIndex, patternIndex)
+        self.patterns[key] = self.merge(self.patterns.get(key), rowStart, rowStop, cols)
+
+    def addSongChange(self, rowStart=None, rowStop=None, cols=None):
+        self.song = self.merge(self.song, rowStart, rowStop, cols)
+
+    def addTrackStatusChange(self, trackIndex):
+        self.trackStatus.add(trackIndex)
+
+    def getPatterns(self):
+        return sorted(self.patterns)
+
+    def getTracks(self):
+        return sorted(set(trackIndex for trackIndex, patternIndex in self.patterns) | self.trackStatus)
+
+    def getPatternChange(self, trackIndex, patternIndex):
+        '''
+        Return the (rowStart, rowStop, cols) changed in a pattern, or None.
+        '''
+        change = self.patterns.get((trackIndex, patternIndex))
+        return None if change is None else tuple(change)
+
+    def getSongChange(self):
+        return None if self.song is None else tuple(self.song)
+
+    def intersects(self, change, rowStart, rowStop, cols=None):
+        '''
+        Tell if a (rowStart, rowStop, cols) change touches some of the rows
+        [rowStart, rowStop) and of the columns cols (None: any).
+        '''
+        if change is None:
+            return False
+        if change[0] is not None and (change[1] <= rowStart or change[0] >= rowStop):
+            return False
+        if change[2] is not None and cols is not None and not change[2].intersection(cols):
+            return False
+        return True
+
+    def patternIntersects(self, trackIndex, patternIndex, rowStart, rowStop, cols=None):
+        return self.intersects(self.patterns.get((trackIndex, patternIndex)), rowStart, rowStop, cols)
+
+    def songIntersects(self, rowStart, rowStop, cols=None):
+        return self.intersects(self.song, rowStart, rowStop, cols)
@@ -0,0 +1,172 @@
+from bisect import bisect_left, bisect_right, insort
+
+class NoteIntervalIndex(object):
+    '''
+    Index of the note intervals of a Pattern.
+
+    A note interval starts at a row holding a note (value > 0) and extends
+    over the following rows holding -2 (note continuation) in the same
+    column, up to the pattern length.
+
+    Intervals of a column never overlap, so each note column keeps three
+    parallel lists (starts, stops, notes) sorted by start row; point and
+    range queries are a bisect per note column. Besides that, intervals are
+    grouped by note, sorted by start row, and note onsets are grouped by row.
+
+    The index must be told about every change of the pattern grid (see
+    update(), updateRow(), resize(), rebuild()); it only rescans the chain
+    of rows around the changed cell.
+    '''
+
+    noOnsets = {}
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.rebuild()
+
+    def rebuild(self):
+        self.cols = {col: ([], [], []) for col in self.pattern.track.noteCols}
+        self.byNote = {}
+        self.onsets = {}
+        for col in self.cols:
+            row = 0
+            while row < self.pattern.getLength():
+                row = max(row + 1, self.scan(row, col))
+
+    def clear(self):
+        for starts, stops, notes in self.cols.values():
+            del starts[:], stops[:], notes[:]
+        self.byNote.clear()
+        self.onsets.clear()
+
+    def scan(self, row, col):
+        # add the interval starting at row (if any), return its stop row
+        length = self.pattern.getLength()
+        if not 0 <= row < length: return row
+        note = self.pattern.get(row, col)
+        if note < 1: return row
+        stop = row + 1
+        while stop < length and self.pattern.get(stop, col) == -2:
+            stop += 1
+        self.add(col, row, stop, note)
+        return stop
+
+    def add(self, col, start, stop, note):
+        starts, stops, notes = self.cols[col]
+        i = bisect_left(starts, start)
+        starts.insert(i, start)
+        stops.insert(i, stop)
+        notes.insert(i, note)
+        insort(self.byNote.setdefault(note, []), (start, stop))
+        self.onsets.setdefault(start, {})[col] = note
+
+    def remove(self, col, i):
+        starts, stops, notes = self.cols[col]
+        start, stop, note = starts.pop(i), stops.pop(i), notes.pop(i)
+        intervals = self.byNote[note]
+        intervals.remove((start, stop))
+        if not intervals: del self.byNote[note]
+        onsets = self.onsets[start]
+        del onsets[col]
+        if not onsets: del self.onsets[start]
+        return start
+
+    def find(self, col, row):
+        # index of the last interval of col starting at or before row, or -1
+        if col not in self.cols: return -1
+        return bisect_right(self.cols[col][0], row) - 1
+
+    def update(self, row, col):
+        '''
+        Update the index after the cell (row, col) has changed.
+        '''
+        if col not in self.cols or not 0 <= row < self.pattern.getLength(): return
+        starts, stops, notes = self.cols[col]
+        i = self.find(col, row)
+        # the interval starting at row is replaced:
+        if i >= 0 and starts[i] == row:
+            self.remove(col, i)
+            i -= 1
+        # the interval containing row, or ending right before it, is affected:
+        if i >= 0 and stops[i] >= row:
+            self.scan(self.remove(col, i), col)
+        self.scan(row, col)
+
+    def updateRow(self, row):
+        for col in self.cols:
+            self.update(row, col)
+
+    def resize(self, oldLength):
+        '''
+        Update the index after the pattern length has changed from oldLength.
+        '''
+        length = self.pattern.getLength()
+        for col, (starts, stops, notes) in self.cols.items():
+            if length < oldLength:
+                while starts and starts[-1] >= length:
+                    self.remove(col, len(starts) - 1)
+                if stops and stops[-1] > length:
+                    self.scan(self.remove(col, len(starts) - 1), col)
+            else:
+                if stops and stops[-1] == oldLength:
+                    self.scan(self.remove(col, len(starts) - 1), col)
+                row = stops[-1] if stops else 0
+                row = max(row, oldLength)
+                while row < length:
+                    row = max(row + 1, self.scan(row, col))
+
+    def getInterval(self, row, col):
+        '''
+        Return the (start, stop, note) of the interval of col covering row,
+        or None.
+        '''
+        i = self.find(col, row)
+        if i < 0: return None
+        starts, stops, notes = self.cols[col]
+        if stops[i] <= row: return None
+        return starts[i], stops[i], notes[i]
+
+    def getOnsets(self, row):
+        '''
+        Return a {col: note} dict of the notes starting at row (do not modify).
+        '''
+        return self.onsets.get(row, self.noOnsets)
+
+    def getIntervals(self):
+        return {note: list(intervals) for note, intervals in self.byNote.items()}
+
+    def getIntervalsInRange(self, rowStart, rowStop):
+        '''
+        Return the intervals that start at or before rowStop and stop at or
+        after rowStart, grouped by note and sorted by start row.
+        '''
+        ret = {}
+        for starts, stops, notes in self.cols.values():
+            lo = bisect_left(stops, rowStart)
+            hi = bisect_right(starts, rowStop)
+            for i in range(lo, hi):
+                ret.setdefault(notes[i], []).append((starts[i], stops[i]))
+        for intervals in ret.values():
+            intervals.sort()
+        return ret
+
+    def isPlayingAt(self, row, note):
+        if note not in self.byNote: return False
+        for col in self.cols:
+            interval = self.getInterval(row, col)
+            if interval is not None and interval[2] == note:
+                return True
+        return False
+
+    def isPlayingInRange(self, rowStart, rowStop, note):
+        '''
+        Return True if note is playing in any row of [rowStart, rowStop]
+        (bounds included).
+        '''
+        if note not in self.byNote: return False
+        for starts, stops, notes in self.cols.values():
+            lo = bisect_right(stops, rowStart)
+            hi = bisect_right(starts, rowStop)
+            if note in notes[lo:hi]:
+                return True
+        return False
@@ -1,17 +1,23 @@
-from collections import defaultdict
+from .PatternStorage import *
+from .NoteIntervalIndex import *
 import weakref
 
 class Pattern(object):
-    def __init__(self, track, patternIndex, length=16):
+    def __init__(self, track, patternIndex, length=16, storage=None):
         self.track = track
         self.patternIndex = patternIndex
         self.length = length
         self.speedReduction = 4
-        self.data = defaultdict(lambda: defaultdict(lambda: -1))
+        if storage is None:
+            storage = DensePatternStorage(length, 1 + max(track.noteCols))
+        self.data = storage
         self.observers = weakref.WeakKeyDictionary()
         self.playHeadRow = -1
         self.playHeadRowPrev = -1
         self.playHeadTick = 0
+        self.playHeadChanged = False
+        self.tickOutput = [0, 0, None] # reused by tick()
+        self.noteIndex = NoteIntervalIndex(self)
 
     def addObserver(self, callable_):
         self.observers[callable_] = 1
@@ -19,10 +25,31 @@ class Pattern(object):
     def removeObserver(self, callable_):
         if callable_ in self.observers: del self.observers[callable_]
 
-    def notifyPatternChange(self):
+    def notifyPatternChange(self, changes):
         observers = list(self.observers.keys())
         for observer in observers:
-            observer.onPatternChange(self.track.trackIndex, self.patternIndex)
+            observer.onPatternChange(self.track.trackIndex, self.patternIndex, changes)
+
+    def addChange(self, rowStart=None, rowStop=None, cols=None):
+        '''
+        Record a change of rows [rowStart, rowStop) and columns cols (None:
+        all) in the song's ChangeSet; observers are notified right away,
+        or at the end of the current batch (see Song.batch()).
+        '''
+        self.track.song.addPatternChange(self.track.trackIndex, self.patternIndex, rowStart, rowStop, cols)
+
+    def getChangeStop(self, row, cols):
+        '''
+        Return the end of the rows whose rendering depends on the given
+        cells of a row: the rows held after them, and their note-off.
+        '''
+        stop = row + 1
+        for col in cols:
+            r = row + 1
+            while r < self.length and self.data.get(r, col) == -2:
+                r += 1
+            stop = max(stop, r + 1)
+        return stop
 
     def notifyPlayHeadChange(self):
         observers = list(self.observers.keys())
@@ -30,14 +57,23 @@ class Pattern(object):
             observer.onPlayHeadChange(self.track.trackIndex, self.patternIndex, self.playHeadRow)
 
     def tick(self):
+        '''
+        Advance the play head by one tick. Return None, or the row starting
+        on this tick as a [patternRow, tick, row] list; the list and the row
+        are reused, and must not be modified or kept by the caller.
+        Set self.playHeadChanged if the play head moved to another row.
+        '''
         if self.playHeadRow == -1: self.playHeadRow = 0
         ret = None
-        playHeadChanged = False
+        self.playHeadChanged = False
         if self.playHeadTick == 0:
-            ret = (self.playHeadRow, self.playHeadTick, self.getRow(self.playHeadRow))
+            ret = self.tickOutput
+            ret[0] = self.playHeadRow
+            ret[1] = self.playHeadTick
+            ret[2] = self.getRow(self.playHeadRow)
             if self.playHeadRowPrev != self.playHeadRow:
                 # Track will call Pattern.notifyPlayHeadChange after tracking active notes
-                playHeadChanged = True
+                self.playHeadChanged = True
         self.playHeadRowPrev = self.playHeadRow
         self.playHeadTick += 1
         if self.playHeadTick >= self.speedReduction:
@@ -45,7 +81,29 @@ class Pattern(object):
             self.playHeadRow += 1
             if self.playHeadRow >= self.getLength():
                 self.playHeadRow = 0
-        return ret, playHeadChanged
+        return ret
+
+    def getSilentTicks(self):
+        '''
+        Return the number of upcoming ticks in which the pattern won't output
+        a row.
+        '''
+        if self.playHeadRow == -1 or self.playHeadTick == 0: return 0
+        return max(1, self.speedReduction - self.playHeadTick)
+
+    def skipTicks(self, n):
+        '''
+        Advance the play head by n ticks, as n calls of tick() would do.
+        n must not exceed getSilentTicks().
+        '''
+        if n < 1: return
+        self.playHeadRowPrev = self.playHeadRow
+        self.playHeadTick += n
+        if self.playHeadTick >= self.speedReduction:
+            self.playHeadTick = 0
+            self.playHeadRow += 1
+            if self.playHeadRow >= self.getLength():
+                self.playHeadRow = 0
 
     def resetTick(self):
         self.playHeadRow = -1
@@ -60,7 +118,8 @@ class Pattern(object):
         if col is not None:
             for row in range(startRow, endRow):
                 self.set(row, col, note if row == startRow else -2, notify=False)
-            self.notifyPatternChange()
+            # the note also takes over the holds following it:
+            self.addChange(startRow, self.getChangeStop(endRow - 1, [col]), [col])
 
     def noteGetColumn(self, row, note):
         if note < 1: return
@@ -72,6 +131,9 @@ class Pattern(object):
         if note < 1: return
         if col is None: col = self.noteGetColumn(row, note)
         if col is None: return
+        interval = self.noteIndex.getInterval(row, col)
+        if interval is not None and interval[0] == row:
+            return interval[1] - interval[0]
         length = 1
         row += 1
         while self.get(row, col) == -2 and row < self.getLength():
@@ -86,97 +148,91 @@ class Pattern(object):
         length = self.noteGetLength(row, note, col)
         for row1 in range(row, row + length):
             self.set(row1, col, -1, notify=False)
-        self.notifyPatternChange()
+        self.addChange(row, self.getChangeStop(row + length - 1, [col]), [col])
 
     def noteFreeColumn(self, row, endRow):
         for noteCol in self.track.noteCols:
             if all(self.get(row, noteCol) == -1 for row in range(row, endRow)):
                 return noteCol
 
-    def noteGetIntervals(self):
-        ret = {}
-        for col in self.track.noteCols:
-            for row in range(self.getLength()):
-                v = self.get(row, col)
-                if v > 0:
-                    ret[v] = ret.get(v, []) + [(row, row + self.noteGetLength(row, v, col))]
-        return ret
+    def noteGetIntervals(self, rowStart=None, rowStop=None):
+        '''
+        Return the note intervals, as a dictionary note -> [(start, stop)].
+        If a row range is given, only the intervals touching it (note off
+        row included) are returned.
+        '''
+        if rowStart is None and rowStop is None:
+            return self.noteIndex.getIntervals()
+        if rowStart is None: rowStart = 0
+        if rowStop is None: rowStop = self.getLength()
+        return self.noteIndex.getIntervalsInRange(rowStart, rowStop)
 
     def noteIsPlayingAt(self, row, note):
-        intervals = self.noteGetIntervals()
-        if note not in intervals: return False
-        for interval in intervals[note]:
-            if row in range(*interval):
-                return True
-        return False
+        return self.noteIndex.isPlayingAt(row, note)
 
     def noteIsPlayingInRange(self, rowStart, rowStop, note):
         if rowStart >= rowStop: return False
-        intervals = self.noteGetIntervals()
-        if note not in intervals: return False
-        def overlap(start1, stop1, start2, stop2):
-            return (start2 <= start1 <= stop2) or (start2 <= stop1 <= stop2) or (start1 <= start2 <= stop1) or (start1 <= stop2 <= stop1)
-        for interval in intervals[note]:
-            if overlap(rowStart, rowStop, interval[0], interval[1]-1):
-                return True
-        return False
+        return self.noteIndex.isPlayingInRange(rowStart, rowStop, note)
 
     def isEmptyCell(self, row, col):
-        if row not in self.data: return True
-        if col not in self.data[row]: return True
-        if self.data[row][col] == -1: return True
-        return False
+        return self.data.isEmptyCell(row, col)
 
     def isEmptyRow(self, row):
-        if row not in self.data: return True
-        for col in self.data[row]:
-            if self.data[row][col] != -1:
-                return False
-        return True
+        return self.data.isEmptyRow(row)
 
     def isEmpty(self):
-        for row in self.data:
-            for col in self.data[row]:
-                if self.data[row][col] != -1:
-                    return False
-        return True
+        return self.data.isEmpty()
 
     def get(self, row, col):
-        return self.data[row][col]
+        return self.data.get(row, col)
 
     def set(self, row, col, value, notify=True):
-        if row in self.data and col in self.data[row] and value == -1:
-            del self.data[row][col]
-            if self.isEmptyRow(row):
-                del self.data[row]
-        else:
-            self.data[row][col] = value
-        if notify: self.notifyPatternChange()
+        self.data.set(row, col, value)
+        self.noteIndex.update(row, col)
+        if notify:
+            noteCols = [col] if col in self.track.noteCols else []
+            self.addChange(row, self.getChangeStop(row, noteCols), [col])
 
     def getRow(self, row):
-        numCols = 1 + (max(self.data[row]) if len(self.data[row]) else 0)
         # make sure to always output noteColumns:
-        numCols = max(numCols, 1 + max(self.track.noteCols))
-        return [self.get(row, col) for col in range(numCols)]
+        return self.data.getRow(row, 1 + max(self.track.noteCols))
 
     def setRow(self, row, values, notify=True):
-        for col, value in enumerate(values):
-            self.set(row, col, value, notify=False)
-        if notify: self.notifyPatternChange()
+        self.data.setRow(row, values)
+        self.noteIndex.updateRow(row)
+        if notify: self.addChange(row, self.getChangeStop(row, self.track.noteCols))
+
+    def getRows(self, startRow, stopRow):
+        return [list(self.getRow(row)) for row in range(startRow, stopRow)]
+
+    def setRows(self, startRow, rows, notify=True):
+        '''
+        Set consecutive rows, with a single notification.
+        '''
+        for i, values in enumerate(rows):
+            self.setRow(startRow + i, values, False)
+        if notify and rows:
+            lastRow = startRow + len(rows) - 1
+            self.addChange(startRow, self.getChangeStop(lastRow, self.track.noteCols))
 
     def clear(self, notify=True):
-        self.clearRows(self.data.keys(), notify)
+        self.data.clearRows(self.data.rows())
+        self.noteIndex.clear()
+        if notify: self.addChange()
 
     def clearRowRange(self, startRow, endRow=None, notify=True):
         if endRow is None:
-            self.clearRows([row for row in self.data.keys() if row >= startRow], notify)
+            self.clearRows([row for row in self.data.rows() if row >= startRow], notify)
         else:
             self.clearRows(range(startRow, 1 + endRow), notify)
 
     def clearRows(self, rows, notify=True):
+        rows = list(rows)
+        if not rows: return
+        self.data.clearRows(rows)
         for row in rows:
-            del self.data[row]
-        if notify: self.notifyPatternChange()
+            self.noteIndex.updateRow(row)
+        if notify: self.addChange(min(rows), self.getChangeStop(max(rows), self.track.noteCols))
 
     def getLength(self):
         return self.length
@@ -185,19 +241,20 @@ class Pattern(object):
         oldLength = self.length
         self.length = length
         self.clearRowRange(length, None, False)
+        self.noteIndex.resize(oldLength)
         if self.length > oldLength:
             # repeat data to fill empty region of pattern:
             for srcRow in range(self.length):
                 for dstRow in range(srcRow + oldLength, self.length, oldLength):
                     self.setRow(dstRow, self.getRow(srcRow), False)
-        if notify: self.notifyPatternChange()
+        if notify: self.addChange()
 
     def getSpeedReduction(self):
         return self.speedReduction
 
     def setSpeedReduction(self, speedReduction, notify=True):
         self.speedReduction = speedReduction
-        if notify: self.notifyPatternChange()
+        if notify: self.addChange()
 
     def dump(self):
         def valstr(v):
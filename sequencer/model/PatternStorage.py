@@ -0,0 +1,211 @@
+from array import array
+from collections import defaultdict
+
+class SparsePatternStorage(object):
+    '''
+    Cell storage for a Pattern, backed by nested dictionaries.
+
+    Only rows and columns that have been touched are stored, so an empty
+    pattern costs (almost) nothing, but every access pays for two hash
+    lookups.
+    '''
+
+    __slots__ = ('data',)
+
+    def __init__(self, numRows=16, numCols=8):
+        self.data = defaultdict(lambda: defaultdict(lambda: -1))
+
+    def get(self, row, col):
+        return self.data[row][col]
+
+    def set(self, row, col, value):
+        if row in self.data and col in self.data[row] and value == -1:
+            del self.data[row][col]
+            if self.isEmptyRow(row):
+                del self.data[row]
+        else:
+            self.data[row][col] = value
+
+    def getRow(self, row, minCols=0):
+        numCols = 1 + (max(self.data[row]) if len(self.data[row]) else 0)
+        numCols = max(numCols, minCols)
+        return [self.get(row, col) for col in range(numCols)]
+
+    def setRow(self, row, values):
+        for col, value in enumerate(values):
+            self.set(row, col, value)
+
+    def isEmptyCell(self, row, col):
+        if row not in self.data: return True
+        if col not in self.data[row]: return True
+        if self.data[row][col] == -1: return True
+        return False
+
+    def isEmptyRow(self, row):
+        if row not in self.data: return True
+        for col in self.data[row]:
+            if self.data[row][col] != -1:
+                return False
+        return True
+
+    def isEmpty(self):
+        for row in self.data:
+            for col in self.data[row]:
+                if self.data[row][col] != -1:
+                    return False
+        return True
+
+    def rows(self):
+        return list(self.data.keys())
+
+    def clearRows(self, rows):
+        for row in rows:
+            if row in self.data:
+                del self.data[row]
+
+class DensePatternStorage(object):
+    '''
+    Cell storage for a Pattern, backed by a preallocated flat array of
+    numRows x numCols integers (row-major).
+
+    Cell access is a bounds check plus an index computation, getRow() is an
+    array slice, and the memory footprint is 4 * numRows * numCols bytes.
+    The grid grows (and is reallocated) only when a cell outside of it is
+    written with a non-empty value.
+
+    Values which are not C ints (fractional control values, big integers)
+    can't be stored in the array: writing one turns the grid into a list
+    (and getRow() then returns lists), so that any value the sparse storage
+    accepts is kept as is.
+
+    Rows returned by getRow() are cached until the row is modified, so
+    playback doesn't allocate them on every tick: callers must not modify
+    them.
+    '''
+
+    __slots__ = ('numRows', 'numCols', 'data', 'empty', 'rowWidth', 'rowCache', 'rowCacheCols')
+
+    intTypes = tuple(set((int, type(2 ** 64)))) # (int, long) in Python 2
+    minInt = -2 ** (8 * array('i').itemsize - 1)
+    maxInt = 2 ** (8 * array('i').itemsize - 1) - 1
+
+    def __init__(self, numRows=16, numCols=8):
+        self.numRows = max(1, int(numRows))
+        self.numCols = max(1, int(numCols))
+        # a row of one empty cell, of the type of data:
+        self.empty = array('i', [-1])
+        self.data = self.empty * (self.numRows * self.numCols)
+        # 1 + index of the last non-empty column of each row (0 if empty):
+        self.rowWidth = array('i', [0]) * self.numRows
+        self.rowCache = [None] * self.numRows
+        self.rowCacheCols = 0
+
+    def isStorable(self, value):
+        return not isinstance(self.data, array) or (
+            isinstance(value, self.intTypes) and self.minInt <= value <= self.maxInt)
+
+    def makeStorable(self, values):
+        '''
+        Turn the grid into a list if any of values can't be stored in it.
+        '''
+        for value in values:
+            if not self.isStorable(value):
+                self.empty = [-1]
+                self.data = list(self.data)
+                self.rowCache = [None] * self.numRows
+                return
+
+    def resize(self, numRows, numCols):
+        numRows = max(1, int(numRows))
+        numCols = max(1, int(numCols))
+        if numCols == self.numCols:
+            if numRows > self.numRows:
+                self.data.extend(self.empty * ((numRows - self.numRows) * numCols))
+                self.rowWidth.extend(array('i', [0]) * (numRows - self.numRows))
+            else:
+                del self.data[numRows * numCols:]
+                del self.rowWidth[numRows:]
+        else:
+            data = self.empty * (numRows * numCols)
+            n = min(numCols, self.numCols)
+            for row in range(min(numRows, self.numRows)):
+                src = row * self.numCols
+                dst = row * numCols
+                data[dst:dst+n] = self.data[src:src+n]
+            self.data = data
+            rowWidth = array('i', [0]) * numRows
+            for row in range(min(numRows, self.numRows)):
+                rowWidth[row] = min(numCols, self.rowWidth[row])
+            self.rowWidth = rowWidth
+        self.numRows = numRows
+        self.numCols = numCols
+        self.rowCache = [None] * numRows
+
+    def get(self, row, col):
+        if 0 <= row < self.numRows and 0 <= col < self.numCols:
+            return self.data[row * self.numCols + col]
+        return -1
+
+    def set(self, row, col, value):
+        if row < 0 or col < 0:
+            raise IndexError('negative row or column index')
+        if not self.isStorable(value):
+            self.makeStorable((value,))
+        if row >= self.numRows or col >= self.numCols:
+            if value == -1: return
+            self.resize(max(row + 1, self.numRows), max(col + 1, self.numCols))
+        self.data[row * self.numCols + col] = value
+        self.rowCache[row] = None
+        w = self.rowWidth[row]
+        if value != -1:
+            if col >= w: self.rowWidth[row] = col + 1
+        elif col + 1 == w:
+            start = row * self.numCols
+            while w > 0 and self.data[start + w - 1] == -1:
+                w -= 1
+            self.rowWidth[row] = w
+
+    def getRow(self, row, minCols=0):
+        if not 0 <= row < self.numRows:
+            return self.empty * minCols
+        if minCols != self.rowCacheCols:
+            self.rowCache = [None] * self.numRows
+            self.rowCacheCols = minCols
+        ret = self.rowCache[row]
+        if ret is None:
+            numCols = max(self.rowWidth[row], minCols)
+            start = row * self.numCols
+            if numCols <= self.numCols:
+                ret = self.data[start:start+numCols]
+            else:
+                ret = self.data[start:start+self.numCols] + self.empty * (numCols - self.numCols)
+            self.rowCache[row] = ret
+        return ret
+
+    def setRow(self, row, values):
+        if row < 0:
+            raise IndexError('negative row index')
+        # don't leave the row half written:
+        self.makeStorable(values)
+        for col, value in enumerate(values):
+            self.set(row, col, value)
+
+    def isEmptyCell(self, row, col):
+        return self.get(row, col) == -1
+
+    def isEmptyRow(self, row):
+        return not 0 <= row < self.numRows or self.rowWidth[row] == 0
+
+    def isEmpty(self):
+        return not any(self.rowWidth)
+
+    def rows(self):
+        return [row for row in range(self.numRows) if self.rowWidth[row]]
+
+    def clearRows(self, rows):
+        for row in rows:
+            if 0 <= row < self.numRows and self.rowWidth[row]:
+                start = row * self.numCols
+                self.data[start:start+self.numCols] = self.empty * self.numCols
+                self.rowWidth[row] = 0
+                self.rowCache[row] = None
@@ -1,8 +1,20 @@
-from Track import *
+from .Track import *
+from .SongTimeline import *
+from .ChangeSet import *
+from contextlib import contextmanager
+from functools import reduce
 import weakref
+try:
+    from math import gcd
+except ImportError:
+    from fractions import gcd
 
 class Song(object):
-    def __init__(self, numTracks=8, defaultRowDuration=16):
+    def __init__(self, numTracks=8, defaultRowDuration=16, patternStorage=DensePatternStorage):
+        self.batchDepth = 0
+        self.batchChanges = ChangeSet()
+        # storage backend class for pattern cells (see PatternStorage):
+        self.patternStorage = patternStorage
         self.tracks = [Track(self, trackIndex) for trackIndex in range(numTracks)]
         self.activeTrack = self.tracks[0]
         self.rowDuration = defaultdict(lambda: defaultRowDuration)
@@ -15,6 +27,8 @@ class Song(object):
         self.maxPatternPolyphony = 8
         self.tpb = 4
         self.bpm = 120
+        self.timeline = None
+        self.output = {} # reused by tick()
 
     def addObserver(self, callable_):
         self.observers[callable_] = 1
@@ -22,10 +36,56 @@ class Song(object):
     def removeObserver(self, callable_):
         if callable_ in self.observers: del self.observers[callable_]
 
-    def notifySongChange(self):
+    def notifySongChange(self, changes):
         observers = list(self.observers.keys())
         for observer in observers:
-            observer.onSongChange()
+            observer.onSongChange(changes)
+
+    @contextmanager
+    def batch(self):
+        '''
+        Group edits: inside the block, observers are not notified. When the
+        outermost batch ends, every changed pattern, the song and every
+        track whose status changed notify their observers once, with the
+        ChangeSet of the whole batch.
+        '''
+        self.batchDepth += 1
+        try:
+            yield self.batchChanges
+        finally:
+            self.batchDepth -= 1
+            if self.batchDepth == 0:
+                changes, self.batchChanges = self.batchChanges, ChangeSet()
+                self.notifyChanges(changes)
+
+    def notifyChanges(self, changes):
+        for trackIndex, patternIndex in changes.getPatterns():
+            self.tracks[trackIndex].patterns[patternIndex].notifyPatternChange(changes)
+        if changes.song is not None:
+            self.notifySongChange(changes)
+        for trackIndex in sorted(changes.trackStatus):
+            self.tracks[trackIndex].notifyTrackStatusChange()
+
+    def getChangeSet(self):
+        '''
+        Return the ChangeSet edits must be recorded in: the one of the
+        current batch, or a new one, notified by endChange().
+        '''
+        return self.batchChanges if self.batchDepth else ChangeSet()
+
+    def endChange(self, changes):
+        if not self.batchDepth:
+            self.notifyChanges(changes)
+
+    def addPatternChange(self, trackIndex, patternIndex, rowStart=None, rowStop=None, cols=None):
+        changes = self.getChangeSet()
+        changes.addPatternChange(trackIndex, patternIndex, rowStart, rowStop, cols)
+        self.endChange(changes)
+
+    def addSongChange(self, rowStart=None, rowStop=None, cols=None):
+        changes = self.getChangeSet()
+        changes.addSongChange(rowStart, rowStop, cols)
+        self.endChange(changes)
 
     def notifyCurrentRowChange(self):
         observers = list(self.observers.keys())
@@ -48,17 +108,17 @@ class Song(object):
         items = set(list(set(item for item in items if item != -1))[:self.maxPatternPolyphony])
         if items != self.data[row][col]:
             self.data[row][col] = set(items)
-            if notify: self.notifySongChange()
+            if notify: self.addSongChange(row, row + 1, [col])
 
     def add(self, row, col, item, notify=True):
         if len(self.data[row][col]) < self.maxPatternPolyphony and item not in self.data[row][col]:
             self.data[row][col].add(item)
-            if notify: self.notifySongChange()
+            if notify: self.addSongChange(row, row + 1, [col])
 
     def remove(self, row, col, item, notify=True):
         if item in self.data[row][col]:
             self.data[row][col].remove(item)
-            if notify: self.notifySongChange()
+            if notify: self.addSongChange(row, row + 1, [col])
 
     def toggle(self, row, col, item, notify=True):
         if item in self.data[row][col]:
@@ -80,20 +140,32 @@ class Song(object):
             start = trackIndex * self.maxPatternPolyphony
             end = (trackIndex + 1) * self.maxPatternPolyphony
             self.set(row, trackIndex, values[start:end], notify=False)
-        if notify: self.notifySongChange()
+        if notify: self.addSongChange(row, row + 1)
+
+    def getRows(self, startRow, stopRow):
+        return [self.getRow(row) for row in range(startRow, stopRow)]
+
+    def setRows(self, startRow, rows, notify=True):
+        '''
+        Set consecutive rows, with a single notification.
+        '''
+        for i, values in enumerate(rows):
+            self.setRow(startRow + i, values, False)
+        if notify and rows: self.addSongChange(startRow, startRow + len(rows))
 
     def clear(self, notify=True):
         rows = tuple(self.data.keys())
         for row in rows:
             del self.data[row]
-        if notify: self.notifySongChange()
+        if notify: self.addSongChange()
 
     def getLength(self):
         return self.length
 
     def setLength(self, length, notify=True):
-        self.length = length
-        if notify: self.notifySongChange()
+        oldLength, self.length = self.length, length
+        # the rows after the end are drawn differently:
+        if notify: self.addSongChange(min(oldLength, length), max(oldLength, length) + 1)
 
     def getRowDuration(self, row):
         return self.rowDuration[row]
@@ -109,7 +181,6 @@ class Song(object):
             track.resetTick()
 
     def getRowModulo(self, row):
-        from fractions import gcd
         # get patterns playing in every track:
         pats = []
         for trackIndex, track in enumerate(self.tracks):
@@ -117,8 +188,22 @@ class Song(object):
                 pats.append(track.patterns[patternIndex])
         return reduce(gcd, [1] + [pat.getLength() for pat in pats])
 
+    def setCompiledPlayback(self, enable):
+        if enable and self.timeline is None:
+            self.timeline = SongTimeline(self)
+        elif not enable and self.timeline is not None:
+            self.timeline.detach()
+            self.timeline = None
+
+    def isCompiledPlayback(self):
+        return self.timeline is not None
+
     def tick(self):
-        output = {}
+        if self.timeline is not None:
+            return self.timeline.tick()
+
+        output = self.output
+        output.clear()
 
         if self.currentRowPrev != self.currentRow:
             if self.currentRow >= self.getLength():
@@ -141,6 +226,39 @@ class Song(object):
 
         return self.currentRow, self.currentTick, output
 
+    def getSilentTicks(self, maxTicks=None):
+        '''
+        Return the number of upcoming ticks (at most maxTicks) that would
+        produce no output, no play head change and no row change, and thus
+        can be skipped with skipTicks().
+        '''
+        if self.timeline is not None:
+            n = self.timeline.getSilentTicks()
+        elif self.currentRowPrev != self.currentRow:
+            n = 0
+        else:
+            n = self.rowDuration[self.currentRow] * self.tpb * 4 - self.currentTick
+            for track in self.tracks:
+                n = track.getSilentTicks(n)
+        if maxTicks is not None:
+            n = min(n, maxTicks)
+        return max(0, n)
+
+    def skipTicks(self, n):
+        '''
+        Advance by n silent ticks (see getSilentTicks()).
+        '''
+        if n < 1: return
+        if self.timeline is not None:
+            self.timeline.skipTicks(n)
+            return
+        for track in self.tracks:
+            track.skipTicks(n)
+        self.currentTick += n
+        if self.currentTick >= self.rowDuration[self.currentRow] * self.tpb * 4:
+            self.currentTick = 0
+            self.currentRow += 1
+
     def resetTick(self):
         self.currentRow = 0
         self.currentTick = 0
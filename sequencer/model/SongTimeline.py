@@ -0,0 +1,309 @@
+from sequencer.util import TrackOutputMerger
+from bisect import bisect_left
+from collections import defaultdict
+
+class SongTimeline(object):
+    '''
+    Compiled playback of a Song.
+
+    Each song row is compiled into a tick-sorted list of events (the merged
+    output of each track, and the pattern playhead updates); Song.tick() then
+    walks a cursor over it, so a tick without events costs the same regardless
+    of the number of tracks and of polyphony.
+
+    A compiled row is reused as long as its signature (row duration, ticks per
+    beat, note columns, voice stealing policy, playing patterns and their edit
+    count), the voice allocation state and the pattern play heads at the
+    beginning of the row are unchanged. Editing a pattern that is currently
+    playing, or the duration of the current row, recompiles the rest of the
+    row from the current voice allocation and play heads, as if Pattern.tick()
+    had been called on every tick.
+
+    Pattern playhead fields are updated on the ticks where the pattern
+    outputs a row, i.e. when observers are notified, and at the end of the
+    row.
+    '''
+
+    resetPlayHead = (-1, 0, -1)
+
+    def __init__(self, song):
+        self.song = song
+        self.patternVersion = defaultdict(int)
+        self.cache = {}
+        self.row = -1
+        self.ticks = []
+        self.events = []
+        self.eventIndex = 0
+        self.duration = 0
+        self.startTick = 0
+        self.initStates = None
+        self.endStates = None
+        # (trackIndex, patternIndex) -> (play head at startTick, speed
+        # reduction, length) of the patterns playing in the compiled ticks:
+        self.playHeads = {}
+        self.dirty = False
+        self.output = {} # reused by tick()
+        for track in self.song.tracks:
+            for pattern in track.patterns:
+                pattern.addObserver(self)
+
+    def detach(self):
+        '''
+        Stop observing the song, and bring the state of tracks and patterns
+        to where the interpreted Song.tick() expects it.
+        '''
+        song = self.song
+        for track in song.tracks:
+            for pattern in track.patterns:
+                pattern.removeObserver(self)
+        t = song.currentTick
+        if self.row != song.currentRow or self.row != song.currentRowPrev or t == 0:
+            return
+        states = list(self.initStates)
+        for entries in self.events[:self.eventIndex]:
+            for trackIndex, outputRow, playHeads, state in entries:
+                states[trackIndex] = state
+        self.setMergerStates(states)
+        self.setPlayHeads(t)
+
+    def onPatternChange(self, trackIndex, patternIndex, changes):
+        self.patternVersion[trackIndex, patternIndex] += 1
+        if patternIndex in self.song.tracks[trackIndex].playingPatterns:
+            self.dirty = True
+
+    def onPlayHeadChange(self, trackIndex, patternIndex, playHeadRow):
+        pass
+
+    def getSignature(self, row):
+        song = self.song
+        sig = [song.getRowDuration(row), song.getTicksPerBeat()]
+        for trackIndex, track in enumerate(song.tracks):
+            playing = tuple((p, self.patternVersion[trackIndex, p]) for p in song.get(row, trackIndex) if p != -1)
+            sig.append((tuple(track.noteCols), track.outputMerger.voices.stealingPolicy, playing))
+        return tuple(sig)
+
+    def getMergerStates(self):
+        return tuple(track.outputMerger.getState() for track in self.song.tracks)
+
+    def setMergerStates(self, states):
+        for track, state in zip(self.song.tracks, states):
+            track.outputMerger.setState(state)
+
+    def getInitPlayHeads(self):
+        '''
+        Return the play heads (playHeadRow, playHeadTick, playHeadRowPrev)
+        of the playing patterns, by (trackIndex, patternIndex); patterns
+        whose play head is reset (as at the beginning of a row) are left
+        out.
+        '''
+        playHeads = {}
+        for track in self.song.tracks:
+            for patternIndex in track.playingPatterns:
+                pattern = track.patterns[patternIndex]
+                if pattern.playHeadRow != -1 or pattern.playHeadTick != 0 or pattern.playHeadRowPrev != -1:
+                    playHeads[track.trackIndex, patternIndex] = (pattern.playHeadRow, pattern.playHeadTick, pattern.playHeadRowPrev)
+        return playHeads
+
+    def getPlayHeads(self, tick):
+        '''
+        Return the play heads of the patterns playing in the compiled ticks
+        at the given tick.
+        '''
+        return dict((key, self.advancePlayHead(playHead, sr, l, tick - self.startTick)) for key, (playHead, sr, l) in self.playHeads.items())
+
+    def setPlayHeads(self, tick):
+        '''
+        Bring the play heads of the patterns playing in the compiled ticks
+        to the given tick.
+        '''
+        tracks = self.song.tracks
+        for (trackIndex, patternIndex), (playHead, sr, l) in self.playHeads.items():
+            pattern = tracks[trackIndex].patterns[patternIndex]
+            pattern.playHeadRow, pattern.playHeadTick, pattern.playHeadRowPrev = self.advancePlayHead(playHead, sr, l, tick - self.startTick)
+
+    def advancePlayHead(self, playHead, sr, l, n):
+        '''
+        Return a play head (playHeadRow, playHeadTick, playHeadRowPrev) as
+        left by n calls of Pattern.tick(), with speed reduction sr and length
+        l.
+        '''
+        if n <= 0:
+            return playHead
+        row, tick, prev = playHead
+        if row == -1: row = 0
+        while True:
+            # ticks up to the one moving to the next row:
+            step = max(1, sr - tick)
+            if step > n:
+                return row, tick + n, row
+            n -= step
+            prev = row
+            tick = 0
+            row = row + 1 if row + 1 < l else 0
+            if n == 0:
+                return row, tick, prev
+
+    def compileRow(self, row, initStates, initPlayHeads, startTick=0, stopTick=None):
+        '''
+        Simulate the ticks [startTick, stopTick) of a song row, starting with
+        the given voice allocation states and play heads (see
+        getInitPlayHeads()).
+
+        Return the events, as a tick-sorted list of (tick, entries) where
+        entries is a list of (trackIndex, outputRow, playHeads, mergerState),
+        the voice allocation states at stopTick, and the play heads of the
+        patterns at startTick, with their speed reduction and length.
+        '''
+        song = self.song
+        if stopTick is None:
+            stopTick = song.getRowDuration(row) * song.getTicksPerBeat() * 4
+        byTick = defaultdict(list)
+        endStates = []
+        playHeads = {}
+        for trackIndex, track in enumerate(song.tracks):
+            merger = TrackOutputMerger(track, track.outputMerger.voices.stealingPolicy)
+            merger.setState(initStates[trackIndex])
+            playing = list(track.playingPatterns)
+            # tick -> [(pattern, patternRow, play head after the tick, changed)]:
+            rowsByTick = defaultdict(list)
+            for patternIndex in playing:
+                pattern = track.patterns[patternIndex]
+                sr = max(1, pattern.getSpeedReduction())
+                l = max(1, pattern.getLength())
+                playHead = initPlayHeads.get((trackIndex, patternIndex), self.resetPlayHead)
+                playHeads[trackIndex, patternIndex] = (playHead, sr, l)
+                t = startTick
+                while t < stopTick:
+                    if playHead[1] != 0:
+                        # skip to the next tick outputting a row:
+                        n = max(1, sr - playHead[1])
+                        playHead = self.advancePlayHead(playHead, sr, l, n)
+                        t += n
+                        continue
+                    patternRow = max(0, playHead[0])
+                    changed = playHead[2] != patternRow
+                    playHead = self.advancePlayHead(playHead, sr, l, 1)
+                    rowsByTick[t].append((pattern, patternRow, playHead, changed))
+                    t += 1
+            for t in sorted(rowsByTick):
+                trackOutput = {}
+                patternPlayHeads = []
+                for pattern, patternRow, playHead, changed in rowsByTick[t]:
+                    trackOutput[pattern.patternIndex] = (patternRow, 0, list(pattern.getRow(patternRow)))
+                    patternPlayHeads.append((pattern,) + playHead + (changed,))
+                output = list(merger.merge(row, playing, trackOutput))
+                byTick[t].append((trackIndex, output, patternPlayHeads, merger.getState()))
+            endStates.append(merger.getState())
+        return sorted(byTick.items()), tuple(endStates), playHeads
+
+    def seek(self, row, tick, initStates, initPlayHeads):
+        '''
+        Load the compiled events of a song row and move the cursor to tick.
+        '''
+        song = self.song
+        sig = self.getSignature(row)
+        cached = self.cache.get(row)
+        if cached is not None and cached[0] == sig and cached[1] == initStates and cached[2] == initPlayHeads:
+            events, endStates, playHeads = cached[3:]
+        else:
+            events, endStates, playHeads = self.compileRow(row, initStates, initPlayHeads)
+            self.cache[row] = (sig, initStates, initPlayHeads, events, endStates, playHeads)
+        self.row = row
+        self.duration = song.getRowDuration(row) * song.getTicksPerBeat() * 4
+        self.startTick = 0
+        self.initStates = initStates
+        self.endStates = endStates
+        self.playHeads = playHeads
+        self.ticks = [t for t, entries in events]
+        self.events = [entries for t, entries in events]
+        self.eventIndex = bisect_left(self.ticks, tick)
+        self.dirty = False
+
+    def compileRemainder(self, initStates, initPlayHeads):
+        '''
+        Compile the current song row from the current tick onwards, without
+        caching it. If the row was shortened to the current tick or before,
+        it ends after the current tick, as in interpreted playback.
+        '''
+        song = self.song
+        self.duration = song.rowDuration[song.currentRow] * song.tpb * 4
+        stopTick = max(self.duration, song.currentTick + 1)
+        events, self.endStates, self.playHeads = self.compileRow(song.currentRow, initStates, initPlayHeads, song.currentTick, stopTick)
+        self.row = song.currentRow
+        self.startTick = song.currentTick
+        self.initStates = initStates
+        self.ticks = [t for t, entries in events]
+        self.events = [entries for t, entries in events]
+        self.eventIndex = 0
+        self.dirty = False
+
+    def getSilentTicks(self):
+        song = self.song
+        if song.currentRowPrev != song.currentRow or self.row != song.currentRow or self.dirty:
+            return 0
+        if self.duration != song.rowDuration[song.currentRow] * song.tpb * 4:
+            return 0
+        if self.eventIndex < len(self.ticks):
+            return self.ticks[self.eventIndex] - song.currentTick
+        return self.duration - song.currentTick
+
+    def skipTicks(self, n):
+        song = self.song
+        song.currentTick += n
+        if song.currentTick >= self.duration:
+            self.endRow()
+
+    def endRow(self):
+        song = self.song
+        self.setMergerStates(self.endStates)
+        self.setPlayHeads(song.currentTick)
+        song.currentTick = 0
+        song.currentRow += 1
+
+    def tick(self):
+        song = self.song
+
+        if song.currentRowPrev != song.currentRow:
+            if song.currentRow >= song.getLength():
+                song.currentRow = 0
+            for trackIndex, track in enumerate(song.tracks):
+                track.resetTick(song.currentRowPrev)
+                track.setPlayingPatterns(song.get(song.currentRow, trackIndex))
+            song.notifyCurrentRowChange()
+            self.seek(song.currentRow, song.currentTick, self.getMergerStates(), self.getInitPlayHeads())
+        elif self.row != song.currentRow:
+            # switched to compiled playback in the middle of a row:
+            self.compileRemainder(self.getMergerStates(), self.getInitPlayHeads())
+        elif self.dirty or self.duration != song.rowDuration[song.currentRow] * song.tpb * 4:
+            # the row changed while playing: continue from the current voice
+            # allocation and play heads
+            states = list(self.initStates)
+            for entries in self.events[:self.eventIndex]:
+                for trackIndex, outputRow, playHeads, state in entries:
+                    states[trackIndex] = state
+            self.compileRemainder(tuple(states), self.getPlayHeads(song.currentTick))
+        song.currentRowPrev = song.currentRow
+
+        output = self.output
+        output.clear()
+        i = self.eventIndex
+        if i < len(self.ticks) and self.ticks[i] == song.currentTick:
+            for trackIndex, outputRow, playHeads, state in self.events[i]:
+                track = song.tracks[trackIndex]
+                track.activeNotes.track(outputRow)
+                for pattern, playHeadRow, playHeadTick, playHeadRowPrev, changed in playHeads:
+                    pattern.playHeadRow = playHeadRow
+                    pattern.playHeadTick = playHeadTick
+                    pattern.playHeadRowPrev = playHeadRowPrev
+                for pattern, playHeadRow, playHeadTick, playHeadRowPrev, changed in playHeads:
+                    if changed:
+                        pattern.notifyPlayHeadChange()
+                if not track.muted:
+                    output[trackIndex] = outputRow
+            self.eventIndex = i + 1
+
+        song.currentTick += 1
+        if song.currentTick >= song.rowDuration[song.currentRow] * song.tpb * 4:
+            self.endRow()
+
+        return song.currentRow, song.currentTick, output
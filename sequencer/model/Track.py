@@ -1,5 +1,5 @@
-from Pattern import *
-from sequencer.util import ActiveNotesTracker, TrackOutputMerger
+from .Pattern import *
+from sequencer.util import ActiveNotesTracker, TrackOutputMerger, VoiceAllocator
 from collections import defaultdict
 import weakref
 
@@ -7,16 +7,17 @@ class Track(object):
     def __init__(self, song, trackIndex):
         self.song = song
         self.trackIndex = trackIndex
-        self.patterns = [Pattern(self, patternIndex) for patternIndex in range(64)]
         self.noteCols = list(range(8)) # default: 8-note polyphony, using the first 8 columns
+        self.patterns = [Pattern(self, patternIndex, storage=song.patternStorage(16, len(self.noteCols))) for patternIndex in range(64)]
         self.observers = weakref.WeakKeyDictionary()
         self.volume = 100
         self.muted = False
         self.lastSelectedPatternIndex = 0
-        self.activeNotes = ActiveNotesTracker()
+        self.activeNotes = ActiveNotesTracker(self.trackIndex, self.noteCols)
         self.liveNotes = defaultdict(bool)
         self.outputMerger = TrackOutputMerger(self)
         self.playingPatterns = []
+        self.trackOutput = {} # reused by tick()
 
     def addObserver(self, callable_):
         self.observers[callable_] = 1
@@ -25,6 +26,9 @@ class Track(object):
         if callable_ in self.observers: del self.observers[callable_]
 
     def notifyTrackStatusChange(self):
+        if self.song.batchDepth:
+            self.song.batchChanges.addTrackStatusChange(self.trackIndex)
+            return
         observers = list(self.observers.keys())
         for observer in observers:
             observer.onTrackStatusChange(self.trackIndex, self.volume, self.muted, self.isActive())
@@ -37,20 +41,30 @@ class Track(object):
             self.patterns[patternIndex].resetTick()
 
     def tick(self, songRow):
-        trackOutput = {}
-        playHeadChanged = {}
+        trackOutput = self.trackOutput
+        trackOutput.clear()
         for patternIndex in self.playingPatterns:
-            pattern = self.patterns[patternIndex]
-            ret1, playHeadChanged[patternIndex] = pattern.tick()
+            ret1 = self.patterns[patternIndex].tick()
             if ret1 is not None:
                 trackOutput[patternIndex] = ret1
         ret = self.outputMerger.merge(songRow, self.playingPatterns, trackOutput)
         self.activeNotes.track(ret)
-        for patternIndex, changed in playHeadChanged.items():
-            if changed:
-                self.patterns[patternIndex].notifyPlayHeadChange()
+        for patternIndex in self.playingPatterns:
+            pattern = self.patterns[patternIndex]
+            if pattern.playHeadChanged:
+                pattern.notifyPlayHeadChange()
         return ret
 
+    def getSilentTicks(self, maxTicks):
+        n = maxTicks
+        for patternIndex in self.playingPatterns:
+            n = min(n, self.patterns[patternIndex].getSilentTicks())
+        return n
+
+    def skipTicks(self, n):
+        for patternIndex in self.playingPatterns:
+            self.patterns[patternIndex].skipTicks(n)
+
     def resetTick(self, songRow=None):
         if songRow is None:
             for pattern in self.patterns:
@@ -65,8 +79,16 @@ class Track(object):
         return self.noteCols[:]
 
     def setNoteColumns(self, noteCols):
+        if len(noteCols) > VoiceAllocator.maxVoices:
+            raise ValueError('at most %d note columns are supported' % VoiceAllocator.maxVoices)
         self.noteCols = noteCols[:]
-        # TODO: self.notifyTrackChange()
+        self.outputMerger.onNoteColumnsChange()
+        self.activeNotes.setNoteColumns(self.noteCols)
+        with self.song.batch():
+            for pattern in self.patterns:
+                pattern.noteIndex.rebuild()
+                if not pattern.isEmpty():
+                    pattern.addChange()
 
     def setVolume(self, volume):
         volume = max(0, min(127, int(volume)))
@@ -1,3 +1,4 @@
-from Pattern import *
-from Song import *
-from Track import *
+from .ChangeSet import *
+from .Pattern import *
+from .Song import *
+from .Track import *
@@ -1,10 +1,21 @@
-from collections import defaultdict
 import weakref
 
 class ActiveNotesTracker(object):
-    def __init__(self):
-        self.notes = defaultdict(lambda: -1)
+    '''
+    Keep track of the note playing in each voice (i.e. note column) of a
+    track, from the rows output by its TrackOutputMerger.
+
+    A note number starts a note in its voice, -2 holds it, and any other
+    value ends it. Observers are notified of the voices that changed only,
+    as a list of (voice, oldNote, newNote) tuples, where -1 means no note.
+    '''
+
+    def __init__(self, trackIndex, noteCols):
+        self.trackIndex = trackIndex
+        self.notes = [] # voice -> playing note, or -1
+        self.changes = [] # reused by track()
         self.observers = weakref.WeakKeyDictionary()
+        self.setNoteColumns(noteCols)
 
     def addObserver(self, callable_):
         self.observers[callable_] = 1
@@ -12,23 +23,46 @@ class ActiveNotesTracker(object):
     def removeObserver(self, callable_):
         if callable_ in self.observers: del self.observers[callable_]
 
-    def notifyActiveNotes(self):
+    def notifyActiveNotes(self, changes):
         observers = list(self.observers.keys())
         for observer in observers:
-            observer.onActiveNotes(self.notes)
+            observer.onActiveNotes(self.trackIndex, changes)
+
+    def setNoteColumns(self, noteCols):
+        self.reset()
+        self.noteCols = list(noteCols)
+        self.notes = [-1] * (1 + max(self.noteCols) if self.noteCols else 0)
 
     def track(self, outputArray):
-        oldNotes = {k: v for k, v in self.notes.items()}
-        for col, val in enumerate(outputArray):
+        '''
+        Update the state of the voices from an output row, and notify the
+        observers if it changed. The list of changes is reused by the next
+        call: observers must not keep it.
+        '''
+        notes = self.notes
+        changes = self.changes
+        del changes[:]
+        width = len(outputArray)
+        for col in self.noteCols:
+            if col >= width: continue
+            val = outputArray[col]
             if val == -2: continue
-            else: self.notes[col] = val
-        if oldNotes != self.notes:
-            self.notifyActiveNotes()
+            if val < 1: val = -1
+            old = notes[col]
+            if old != val:
+                notes[col] = val
+                changes.append((col, old, val))
+        if changes:
+            self.notifyActiveNotes(changes)
 
     def get(self):
-        return [note for note in self.notes.values() if note > 0]
+        return [note for note in self.notes if note > 0]
 
-    def reset(self):
-        for key in keys:
-            self.notes[key] = -1
+    def isActive(self, note):
+        return note > 0 and note in self.notes
 
+    def reset(self):
+        changes = [(voice, note, -1) for voice, note in enumerate(self.notes) if note > 0]
+        self.notes = [-1] * len(self.notes)
+        if changes:
+            self.notifyActiveNotes(changes)
@@ -0,0 +1,184 @@
+import sys
+import weakref
+from array import array
+from collections import deque
+from types import BuiltinFunctionType, FunctionType, MethodType, ModuleType
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None # Python 2
+
+class MemoryReport(object):
+    '''
+    Memory used by a song and the objects around it, and tracemalloc
+    snapshots to compare the allocations between two points in time.
+
+    measure() walks the objects reachable from the song (containers,
+    attributes and slots; classes, functions and modules are shared and not
+    counted) and splits them into parts: the observer registries, the song
+    order cells, the patterns, the tracks, the song, and the LED buffers.
+    Each object is counted once, in the first part reaching it, in that
+    order; observers are only referenced weakly, and are not counted.
+    '''
+
+    notOwned = (type, ModuleType, FunctionType, BuiltinFunctionType, MethodType, type(None), bool)
+    noReferents = (str, bytes, int, float, array, weakref.ref)
+
+    def __init__(self):
+        self.snapshots = {} # name -> tracemalloc snapshot
+
+    def getReferents(self, obj):
+        if isinstance(obj, self.noReferents):
+            return ()
+        if isinstance(obj, dict):
+            return [x for item in obj.items() for x in item]
+        if isinstance(obj, (list, tuple, set, frozenset, deque)):
+            return obj
+        referents = []
+        if hasattr(obj, '__dict__'):
+            referents.append(vars(obj))
+        for cls in type(obj).__mro__:
+            for name in vars(cls).get('__slots__', ()):
+                if name != '__dict__' and hasattr(obj, name):
+                    referents.append(getattr(obj, name))
+        return referents
+
+    def getSize(self, obj, seen):
+        '''
+        Return the bytes and number of the objects reachable from obj (obj
+        included, even if in seen) which are not in the set of ids seen,
+        and add them to it.
+        '''
+        seen.add(id(obj))
+        size = count = 0
+        stack = [obj]
+        while stack:
+            obj = stack.pop()
+            size += sys.getsizeof(obj)
+            count += 1
+            for ref in self.getReferents(obj):
+                if id(ref) not in seen and not isinstance(ref, self.notOwned):
+                    seen.add(id(ref))
+                    stack.append(ref)
+        return size, count
+
+    def getRegistries(self, song, registries=None):
+        '''
+        Return the observer registries of the song, its tracks and
+        patterns, and the given ones, as (name, registry) pairs, with names
+        like ('song',) or ('pattern', trackIndex, patternIndex).
+        '''
+        ret = [(('song',), song.observers)]
+        for track in song.tracks:
+            ret.append((('track', track.trackIndex), track.observers))
+            ret.append((('activenotes', track.trackIndex), track.activeNotes.observers))
+            for pattern in track.patterns:
+                ret.append((('pattern', track.trackIndex, pattern.patternIndex), pattern.observers))
+        ret.extend(((name,), registry) for name, registry in sorted((registries or {}).items()))
+        return ret
+
+    def measure(self, song, launchpad=None, registries=None):
+        '''
+        Return a dictionary of the memory used by song, by part:
+
+            'observers': {name: (bytes, objects, observers)}
+            'songCells': {(row, col): (bytes, objects, items)}
+            'patterns': {(trackIndex, patternIndex): (bytes, objects)}
+            'tracks': {trackIndex: (bytes, objects)}
+            'song': (bytes, objects)
+            'leds': {(bufferName, section): (bytes, objects, cells)}
+            'total': (bytes, objects)
+
+        with registries, other observer registries to include (by name; see
+        getRegistries() for the names of the song's ones),
+        and the LED buffers of the BufferedLaunchpad launchpad, if given.
+        Song order cells inserted by reads are the ones holding no item.
+        '''
+        registries = self.getRegistries(song, registries)
+        # ((row, col), set of pattern indices) of the song order cells:
+        cells = [((row, col), items) for row, cols in song.data.items() for col, items in cols.items()]
+        buffers = []
+        if launchpad is not None:
+            for section in launchpad.sections:
+                for name, buf in launchpad.buffer[section].items():
+                    buffers.append(((name, section), buf))
+        roots = [song] + song.tracks + [pattern for track in song.tracks for pattern in track.patterns]
+        roots += [registry for name, registry in registries] + [items for key, items in cells] + [buf for key, buf in buffers]
+        # each part is walked up to the roots of the others:
+        seen = set(id(obj) for obj in roots)
+        report = {
+            'observers': {},
+            'songCells': {},
+            'patterns': {},
+            'tracks': {},
+            'leds': {},
+        }
+        for name, registry in registries:
+            report['observers'][name] = self.getSize(registry, seen) + (len(registry),)
+        for key, items in cells:
+            report['songCells'][key] = self.getSize(items, seen) + (len(items),)
+        for track in song.tracks:
+            for pattern in track.patterns:
+                report['patterns'][track.trackIndex, pattern.patternIndex] = self.getSize(pattern, seen)
+            report['tracks'][track.trackIndex] = self.getSize(track, seen)
+        report['song'] = self.getSize(song, seen)
+        for key, buf in buffers:
+            report['leds'][key] = self.getSize(buf, seen) + (len(buf['data']),)
+        size, count = report['song']
+        for part in ('observers', 'songCells', 'patterns', 'tracks', 'leds'):
+            for entry in report[part].values():
+                size += entry[0]
+                count += entry[1]
+        report['total'] = (size, count)
+        return report
+
+    def checkTracemalloc(self):
+        if tracemalloc is None:
+            raise RuntimeError('tracemalloc is not available')
+
+    def isTracing(self):
+        return tracemalloc is not None and tracemalloc.is_tracing()
+
+    def startTracing(self, frames=1):
+        '''
+        Start tracing the allocations, keeping frames frames of the stack
+        where each was made. Snapshots only see the allocations made since.
+        '''
+        self.checkTracemalloc()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(max(1, int(frames)))
+
+    def stopTracing(self):
+        '''
+        Stop tracing the allocations, and discard the snapshots.
+        '''
+        self.snapshots.clear()
+        if self.isTracing():
+            tracemalloc.stop()
+
+    def takeSnapshot(self, name):
+        '''
+        Take a snapshot of the traced allocations, starting to trace them
+        if needed, and keep it as name.
+        '''
+        self.startTracing()
+        snapshot = tracemalloc.take_snapshot()
+        self.snapshots[name] = snapshot.filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),))
+
+    def compareSnapshots(self, oldName, newName, limit=10):
+        '''
+        Return the limit source lines whose allocations grew or shrank the
+        most from snapshot oldName to snapshot newName, as (filename, line,
+        size difference, count difference) tuples.
+        '''
+        self.checkTracemalloc()
+        for name in (oldName, newName):
+            if name not in self.snapshots:
+                raise ValueError('no such snapshot: %s' % name)
+        stats = self.snapshots[newName].compare_to(self.snapshots[oldName], 'lineno')
+        ret = []
+        for stat in stats[:max(0, int(limit))]:
+            frame = stat.traceback[0]
+            ret.append((frame.filename, frame.lineno, stat.size_diff, stat.count_diff))
+        return ret
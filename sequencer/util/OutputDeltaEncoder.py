@@ -0,0 +1,54 @@
+class OutputDeltaEncoder(object):
+    '''
+    Turn the rows output by a track (see TrackOutputMerger) into the changes
+    they cause: note on/off events per voice (i.e. per note column), and
+    control column value changes.
+
+    In note columns, a note number starts a note (ending the previous one
+    of that voice), -1 or 0 ends it, and -2 holds it; in the other columns
+    a value >= 0 is emitted only if it differs from the last one.
+    '''
+
+    def __init__(self, track, velocity=100):
+        self.track = track
+        self.velocity = velocity
+        self.notes = [-1] * 128 # voice -> playing note, or -1
+        self.controls = {} # column -> last value
+
+    def encode(self, row):
+        '''
+        Return the list of events caused by an output row, as tuples:
+        ('noteon', voice, note, velocity), ('noteoff', voice, note) and
+        ('control', column, value).
+        '''
+        events = []
+        noteCols = self.track.noteCols
+        for col, value in enumerate(row):
+            if col in noteCols:
+                if value == -2: continue
+                oldNote = self.notes[col]
+                if oldNote > 0:
+                    events.append(('noteoff', col, oldNote))
+                    self.notes[col] = -1
+                if value > 0:
+                    events.append(('noteon', col, value, self.velocity))
+                    self.notes[col] = value
+            elif value >= 0 and self.controls.get(col) != value:
+                self.controls[col] = value
+                events.append(('control', col, value))
+        return events
+
+    def allNotesOff(self):
+        '''
+        Return the note off events for every playing voice, and forget them.
+        '''
+        events = []
+        for voice, note in enumerate(self.notes):
+            if note > 0:
+                events.append(('noteoff', voice, note))
+                self.notes[voice] = -1
+        return events
+
+    def reset(self):
+        self.notes = [-1] * 128
+        self.controls = {}
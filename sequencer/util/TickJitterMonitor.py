@@ -0,0 +1,93 @@
+from array import array
+from collections import deque
+
+class TickJitterMonitor(object):
+    '''
+    Timing of the ticks: how late each one started compared to the transport
+    timeline, and how long it ran. Times are in ms, on the transport clock.
+
+    The message handlers reported with addHandler() are remembered for a
+    while: when a tick starts more than lateThreshold ms late, the handlers
+    which ran between the time it was due and the time it started are
+    blamed for it, in proportion to that overlap. If none did, the delay
+    comes from elsewhere (Pd, other objects, or untracked messages), and is
+    blamed on 'other'.
+
+    Percentiles are computed over the last windowSize ticks; the worst
+    offenders (latest ticks) and the blame are kept since the last reset.
+    '''
+
+    windowSize = 1024
+    numOffenders = 8
+    numSpans = 32
+
+    def __init__(self):
+        self.enabled = False
+        self.lateThreshold = 1.
+        self.lateness = array('d', [0.] * self.windowSize)
+        self.execution = array('d', [0.] * self.windowSize)
+        self.spans = deque(maxlen=self.numSpans) # (handler, start, end)
+        self.reset()
+
+    def reset(self):
+        self.numTicks = 0
+        self.numLate = 0
+        self.maxLateness = 0.
+        self.maxExecution = 0.
+        self.offenders = [] # (lateness, tick, execution, handler), latest first
+        self.blame = {} # handler -> [late ticks overlapped, total overlap]
+        self.spans.clear()
+
+    def addHandler(self, name, start, end):
+        self.spans.append((name, start, end))
+
+    def addTick(self, tick, due, start, end):
+        '''
+        Count tick number tick, due at time due, which ran from start to
+        end.
+        '''
+        lateness = start - due
+        execution = end - start
+        i = self.numTicks % self.windowSize
+        self.lateness[i] = lateness
+        self.execution[i] = execution
+        self.numTicks += 1
+        self.maxLateness = max(self.maxLateness, lateness)
+        self.maxExecution = max(self.maxExecution, execution)
+        if lateness > self.lateThreshold:
+            self.numLate += 1
+            handler = self.blameHandlers(due, start)
+            if len(self.offenders) < self.numOffenders or lateness > self.offenders[-1][0]:
+                self.offenders.append((lateness, tick, execution, handler))
+                self.offenders.sort(reverse=True)
+                del self.offenders[self.numOffenders:]
+        self.addHandler('tick', start, end)
+
+    def blameHandlers(self, due, start):
+        '''
+        Blame the handlers which ran between due and start for the
+        lateness of a tick; return the one which ran the longest.
+        '''
+        overlaps = {}
+        for name, spanStart, spanEnd in self.spans:
+            overlap = min(spanEnd, start) - max(spanStart, due)
+            if overlap > 0:
+                overlaps[name] = overlaps.get(name, 0.) + overlap
+        if not overlaps:
+            overlaps['other'] = start - due
+        for name, overlap in overlaps.items():
+            blame = self.blame.setdefault(name, [0, 0.])
+            blame[0] += 1
+            blame[1] += overlap
+        return max(overlaps, key=overlaps.get)
+
+    def getPercentiles(self, values, percentiles):
+        '''
+        Return the given percentiles of the lateness or execution values of
+        the last ticks.
+        '''
+        n = min(self.numTicks, self.windowSize)
+        if not n:
+            return [0.] * len(percentiles)
+        values = sorted(values[:n])
+        return [values[min(n - 1, int(p / 100. * n))] for p in percentiles]
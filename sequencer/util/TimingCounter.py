@@ -0,0 +1,59 @@
+class TimingCounter(object):
+    '''
+    Number, total and maximum duration of the calls to some code, and a
+    fixed size histogram of their durations.
+
+    Bucket 0 counts the calls shorter than 1 us, bucket i > 0 those lasting
+    from 2 ** (i - 1) to 2 ** i us, and the last bucket all the longer ones.
+    '''
+
+    numBuckets = 18
+
+    def __init__(self, name):
+        self.name = name
+        self.depth = 0 # nesting of the calls being timed
+        self.histogram = [0] * self.numBuckets
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.total = 0.
+        self.max = 0.
+        for i in range(self.numBuckets):
+            self.histogram[i] = 0
+
+    def add(self, elapsed):
+        '''
+        Count a call which lasted elapsed seconds.
+        '''
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+        self.histogram[min(self.numBuckets - 1, int(elapsed * 1e6).bit_length())] += 1
+
+    def getMean(self):
+        return self.total / self.count if self.count else 0.
+
+    def getBucketLimit(self, i):
+        '''
+        Return the upper limit (in us) of bucket i, or None for the last one.
+        '''
+        return 1 << i if i < self.numBuckets - 1 else None
+
+    def getPercentile(self, p):
+        '''
+        Return the upper limit (in us) of the bucket holding the pth
+        percentile of the durations, the maximum for the last bucket, or 0
+        if nothing was counted.
+        '''
+        if not self.count:
+            return 0.
+        rank = p / 100. * self.count
+        n = 0
+        for i, num in enumerate(self.histogram):
+            n += num
+            if n >= rank and num:
+                limit = self.getBucketLimit(i)
+                return float(limit) if limit is not None else 1e6 * self.max
+        return 1e6 * self.max
@@ -0,0 +1,93 @@
+import time
+import weakref
+from collections import OrderedDict
+from .TimingCounter import *
+
+try:
+    monotonic = time.monotonic
+except AttributeError:
+    monotonic = time.time
+
+class TimingStats(object):
+    '''
+    Timing of the methods of some objects, by named counters.
+
+    instrument() replaces a method of an object (or class) with a wrapper
+    adding the duration of its calls to a counter, while the stats are
+    enabled; disabling them restores the original methods, so that the
+    instrumented code runs at full speed. Calls made while a call timed by
+    the same counter is running (e.g. notifications triggered by other
+    notifications) are included in the outer call only.
+    '''
+
+    def __init__(self, clock=None):
+        self.clock = clock if clock is not None else monotonic
+        self.enabled = False
+        self.counters = OrderedDict()
+        # (owner or weak reference to it, method name, own attribute replaced or None):
+        self.instrumented = []
+        self.pruneSize = 256
+
+    def getCounter(self, name):
+        if name not in self.counters:
+            self.counters[name] = TimingCounter(name)
+        return self.counters[name]
+
+    def reset(self):
+        for counter in self.counters.values():
+            counter.reset()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        '''
+        Restore the instrumented methods.
+        '''
+        self.enabled = False
+        for owner, name, original in reversed(self.instrumented):
+            if isinstance(owner, weakref.ref):
+                owner = owner()
+                if owner is None: continue
+            if original is None:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, original)
+        self.instrumented = []
+
+    def instrument(self, owner, name, counterName):
+        '''
+        Time the calls to method name of owner (an object, or a class) with
+        the counter counterName, until the stats are disabled. Does nothing
+        if the stats are disabled.
+        '''
+        if not self.enabled:
+            return
+        original = vars(owner).get(name)
+        if getattr(original, 'timingCounter', None) is not None:
+            return # instrumented already
+        method = getattr(owner, name)
+        if isinstance(owner, type):
+            self.instrumented.append((owner, name, original))
+        else:
+            # objects aren't kept alive by the stats:
+            if len(self.instrumented) >= self.pruneSize:
+                self.instrumented = [entry for entry in self.instrumented if not isinstance(entry[0], weakref.ref) or entry[0]() is not None]
+                self.pruneSize = max(256, 2 * len(self.instrumented))
+            self.instrumented.append((weakref.ref(owner), name, original))
+        setattr(owner, name, self.makeWrapper(method if original is None else original, self.getCounter(counterName)))
+
+    def makeWrapper(self, function, counter):
+        clock = self.clock
+        def timed(*args, **kwargs):
+            if counter.depth:
+                return function(*args, **kwargs)
+            counter.depth = 1
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                counter.add(clock() - start)
+                counter.depth = 0
+        timed.timingCounter = counter
+        return timed
@@ -1,68 +1,113 @@
-from collections import defaultdict
+from .VoiceAllocator import *
 
 class TrackOutputMerger(object):
-    def __init__(self, track):
+    def __init__(self, track, stealingPolicy='none'):
         self.track = track
         self.song = self.track.song
         self.trackIndex = self.track.trackIndex
-        self.columnDest = {} # (pat, column) -> outputColumn or -1 if inactive
+        self.voices = VoiceAllocator(self.track.getNoteColumns(), stealingPolicy)
+        self.controlCols = {} # row width -> non-note columns
+        self.buffers = {} # row width -> preallocated output row
+        self.output = []
+        self.written = [] # entries of self.output set by the last merge
+        self.cols = set() # scratch buffers for the note columns to visit
+        self.sortedCols = []
+
+    def onNoteColumnsChange(self):
+        self.voices.setVoices(self.track.getNoteColumns())
+        self.controlCols = {}
+
+    def getState(self):
+        return self.voices.getState()
+
+    def setState(self, state):
+        self.voices.setState(state)
+
+    def setStealingPolicy(self, stealingPolicy):
+        self.voices.setStealingPolicy(stealingPolicy)
 
     def nextFreeColumn(self):
-        v = set(self.columnDest.values())
-        for col in self.track.getNoteColumns():
-            if col not in v:
-                return col
+        return self.voices.nextFree()
+
+    def getControlColumns(self, width):
+        cols = self.controlCols.get(width)
+        if cols is None:
+            noteCols = set(self.voices.voices)
+            cols = self.controlCols[width] = [col for col in range(width) if col not in noteCols]
+        return cols
+
+    def getOutputBuffer(self, width):
+        for i in self.written:
+            self.output[i] = -1
+        del self.written[:]
+        if width not in self.buffers:
+            self.buffers[width] = [-1] * width
+        self.output = self.buffers[width]
+        return self.output
 
     def merge(self, songRow, playingPatterns, trackOutput):
         '''
         Merge the output of several patterns playing at once in the same track.
 
         `trackOutput` is a dictionary whose key is the patternIndex and whose value
-        is the pattern row
+        is a (patternRow, tick, row) tuple.
+
+        Only the note columns holding a note onset or an allocated voice are
+        visited. The returned list is reused by the next call.
         '''
-        noteCols = self.track.getNoteColumns()
+        width = 0
+        for patternIndex in trackOutput:
+            width = max(width, len(trackOutput[patternIndex][2]))
+        output = self.getOutputBuffer(width)
+        written = self.written
+        voices = self.voices
+        order = voices.voiceBit
 
-        output = {col: -1 for col in noteCols}
         # for each pattern that is playing in the current song row...
         for patternIndex in playingPatterns:
+            patternVoices = voices.getPatternVoices(patternIndex)
             if patternIndex in trackOutput:
                 rowIndex, tickIndex, outputRow = trackOutput[patternIndex]
-                hasOutput = True
-            else:
-                hasOutput = False
-            # for each note column...
-            for col in noteCols:
-                if hasOutput:
-                    # track the active notes in each pattern
+                onsets = self.track.patterns[patternIndex].noteIndex.getOnsets(rowIndex)
+                cols = onsets
+                if patternVoices:
+                    cols = self.cols
+                    cols.clear()
+                    cols.update(onsets)
+                    cols.update(patternVoices)
+                if len(cols) > 1:
+                    sortedCols = self.sortedCols
+                    del sortedCols[:]
+                    sortedCols.extend(cols)
+                    sortedCols.sort(key=order.get)
+                    cols = sortedCols
+                # for each note column with something to do...
+                for col in cols:
                     z = outputRow[col]
                     if z > 0:
-                        dest = self.nextFreeColumn()
-                        if dest is not None:
-                            self.columnDest[patternIndex, col] = dest
-                else:
-                    if (patternIndex, col) in self.columnDest:
-                        z = -2
-                    else:
-                        z = -1
-
-                if (patternIndex, col) in self.columnDest:
-                    output[self.columnDest[patternIndex, col]] = z
-                    if z == -1:
-                        del self.columnDest[patternIndex, col]
-
-        maxlen = 0
-        for patternIndex, outputTuple in trackOutput.items():
-            rowIndex, tickIndex, outputRow = outputTuple
-            maxlen = max(maxlen, len(outputRow))
-            for col, value in enumerate(outputRow):
-                if col in noteCols: continue
-                if col in output and output[col] != -1: continue
-                output[col] = value
+                        voices.allocate(patternIndex, col)
+                    dest = voices.get(patternIndex, col)
+                    if dest is not None:
+                        if dest < width:
+                            output[dest] = z
+                            written.append(dest)
+                        if z == -1:
+                            voices.release(patternIndex, col)
+            elif patternVoices:
+                # pattern is between two rows: hold its notes
+                for dest in patternVoices.values():
+                    if dest < width:
+                        output[dest] = -2
+                        written.append(dest)
 
-        outputVec = [-1] * maxlen
-        for i, v in output.items():
-            if i < maxlen:
-                outputVec[i] = v
-
-        return outputVec
+        # control columns: the first playing pattern with a value wins
+        for patternIndex in playingPatterns:
+            if patternIndex not in trackOutput: continue
+            outputRow = trackOutput[patternIndex][2]
+            for col in self.getControlColumns(len(outputRow)):
+                value = outputRow[col]
+                if value != -1 and output[col] == -1:
+                    output[col] = value
+                    written.append(col)
 
+        return output
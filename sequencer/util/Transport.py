@@ -1,8 +1,10 @@
+from .TransportClock import *
 import weakref
 
 class Transport(object):
     def __init__(self):
         self.playing = False
+        self.clock = TransportClock()
         self.observers = weakref.WeakKeyDictionary()
 
     def addObserver(self, callable_):
@@ -27,5 +29,6 @@ class Transport(object):
     def stop(self):
         if self.playing:
             self.playing = False
+            self.clock.stop()
             self.notifyPlaybackStatusChange()
 
@@ -0,0 +1,98 @@
+import time
+
+try:
+    monotonic = time.monotonic
+except AttributeError:
+    monotonic = time.time
+
+class TransportClock(object):
+    '''
+    Plans ticks on an absolute timeline anchored at start(), instead of
+    chaining relative delays.
+
+    Tick k is due at anchorTime + (k - anchorTick) * period (milliseconds).
+    On every tick, the delay until the next one is computed from the current
+    time, so execution time and scheduling lateness don't accumulate. Period
+    changes re-anchor the timeline at the next tick, so they don't move it.
+
+    If a tick is more than resyncThreshold ms late (e.g. the host stalled),
+    the timeline is re-anchored instead of catching up with a burst of ticks.
+    So is it if a tick is that early, which happens when the clock steps
+    backwards (time.time(), the fallback in Python 2, follows the wall
+    clock): the next tick would otherwise wait for the size of the step.
+    '''
+
+    def __init__(self, clock=None):
+        self.clock = clock if clock is not None else monotonic
+        self.resyncThreshold = 250.
+        self.running = False
+        self.period = 0.
+        self.anchorTime = 0.
+        self.anchorTick = 0
+        self.nextTick = 0
+        self.tickStart = 0. # time the last tick fired
+        self.resetStats()
+
+    def now(self):
+        return 1000. * self.clock()
+
+    def resetStats(self):
+        self.numTicks = 0
+        self.numResyncs = 0
+        self.lateness = 0.
+        self.maxLateness = 0.
+        self.totalLateness = 0.
+
+    def getTickTime(self, tick):
+        return self.anchorTime + (tick - self.anchorTick) * self.period
+
+    def start(self, period):
+        '''
+        Start the timeline; return the delay of the first tick.
+        '''
+        self.running = True
+        self.period = period
+        self.anchorTime = self.now()
+        self.anchorTick = 0
+        self.nextTick = 1
+        return self.period
+
+    def stop(self):
+        self.running = False
+
+    def setPeriod(self, period):
+        if self.running and period != self.period:
+            self.anchorTime = self.getTickTime(self.nextTick)
+            self.anchorTick = self.nextTick
+        self.period = period
+
+    def beginTick(self):
+        '''
+        Called when the scheduled tick fires; measure its lateness.
+        '''
+        now = self.now()
+        self.tickStart = now
+        self.lateness = now - self.getTickTime(self.nextTick)
+        if abs(self.lateness) > self.resyncThreshold:
+            self.anchorTime = now
+            self.anchorTick = self.nextTick
+            self.numResyncs += 1
+        self.numTicks += 1
+        self.maxLateness = max(self.maxLateness, self.lateness)
+        self.totalLateness += abs(self.lateness)
+
+    def nextDelay(self, ticks=1):
+        '''
+        Advance the timeline by the given number of ticks; return the delay
+        (in ms, from now) of the tick to schedule.
+        '''
+        self.nextTick += ticks
+        return max(0., self.getTickTime(self.nextTick) - self.now())
+
+    def getDrift(self):
+        '''
+        Return the deviation of the last tick from the timeline (ms), the
+        maximum deviation, and the mean absolute deviation.
+        '''
+        mean = self.totalLateness / self.numTicks if self.numTicks else 0.
+        return self.lateness, self.maxLateness, mean
@@ -0,0 +1,102 @@
+from collections import OrderedDict
+
+class VoiceAllocator(object):
+    '''
+    Assign output voices (the note columns of a track) to the notes of the
+    patterns playing in it; a note is identified by its (patternIndex, column)
+    source.
+
+    Free voices are kept in a bitmap (bit i set = voice i in use), so finding
+    the lowest free voice is a constant number of integer operations. When no
+    voice is free, the stealing policy decides what to do:
+
+     - 'none': the new note is dropped,
+     - 'oldest': the voice allocated first is reassigned,
+     - 'newest': the voice allocated last is reassigned.
+    '''
+
+    maxVoices = 128
+    stealingPolicies = ('none', 'oldest', 'newest')
+
+    def __init__(self, voices, stealingPolicy='none'):
+        self.setStealingPolicy(stealingPolicy)
+        self.setVoices(voices)
+
+    def setStealingPolicy(self, stealingPolicy):
+        if stealingPolicy not in self.stealingPolicies:
+            raise ValueError('invalid voice stealing policy: %s' % stealingPolicy)
+        self.stealingPolicy = stealingPolicy
+
+    def setVoices(self, voices):
+        if len(voices) > self.maxVoices:
+            raise ValueError('at most %d voices are supported' % self.maxVoices)
+        self.voices = list(voices)
+        self.voiceBit = {voice: 1 << i for i, voice in enumerate(self.voices)}
+        self.allVoices = (1 << len(self.voices)) - 1
+        self.clear()
+
+    def clear(self):
+        self.used = 0
+        self.dest = {} # (patternIndex, col) -> voice
+        self.patternDest = {} # patternIndex -> {col: voice}
+        self.owner = OrderedDict() # voice -> (patternIndex, col), in allocation order
+
+    def getState(self):
+        return frozenset(self.dest.items())
+
+    def setState(self, dest):
+        self.clear()
+        for (patternIndex, col), voice in sorted(dict(dest).items(), key=lambda item: item[1]):
+            if voice in self.voiceBit and not self.used & self.voiceBit[voice]:
+                self.assign(patternIndex, col, voice)
+
+    def numActive(self):
+        return len(self.dest)
+
+    def get(self, patternIndex, col):
+        return self.dest.get((patternIndex, col))
+
+    def getPatternVoices(self, patternIndex):
+        return self.patternDest.get(patternIndex)
+
+    def nextFree(self):
+        free = self.allVoices & ~self.used
+        if not free: return None
+        return self.voices[(free & -free).bit_length() - 1]
+
+    def assign(self, patternIndex, col, voice):
+        self.dest[patternIndex, col] = voice
+        self.patternDest.setdefault(patternIndex, {})[col] = voice
+        self.owner[voice] = (patternIndex, col)
+        self.used |= self.voiceBit[voice]
+
+    def release(self, patternIndex, col):
+        voice = self.dest.pop((patternIndex, col))
+        cols = self.patternDest[patternIndex]
+        del cols[col]
+        if not cols: del self.patternDest[patternIndex]
+        del self.owner[voice]
+        self.used &= ~self.voiceBit[voice]
+        return voice
+
+    def allocate(self, patternIndex, col):
+        '''
+        Allocate a new voice for the note starting in (patternIndex, col).
+        If the source already had a voice, it is replaced, unless no other
+        voice is available. Return the voice, or None.
+        '''
+        voice = self.nextFree()
+        if voice is None:
+            if (patternIndex, col) in self.dest:
+                return self.dest[patternIndex, col]
+            if self.stealingPolicy == 'none' or not self.owner:
+                return None
+            if self.stealingPolicy == 'oldest':
+                victim = next(iter(self.owner))
+            else:
+                victim = next(reversed(self.owner))
+            voice = self.release(*self.owner[victim])
+        elif (patternIndex, col) in self.dest:
+            self.release(patternIndex, col)
+        self.assign(patternIndex, col, voice)
+        return voice
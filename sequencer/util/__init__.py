@@ -1,5 +1,12 @@
-from ActiveNotesTracker import *
-from NoteMapping import *
-from TrackOutputMerger import *
-from Transport import *
-import scales
+from .ActiveNotesTracker import *
+from .MemoryReport import *
+from .NoteMapping import *
+from .OutputDeltaEncoder import *
+from .TickJitterMonitor import *
+from .TimingCounter import *
+from .TimingStats import *
+from .TrackOutputMerger import *
+from .Transport import *
+from .TransportClock import *
+from .VoiceAllocator import *
+from . import scales
@@ -1,8 +1,9 @@
 import pyext
 from sequencer.model import *
 from sequencer.controller import *
-from sequencer.util import Transport
+from sequencer.util import Transport, OutputDeltaEncoder, TimingStats, TickJitterMonitor, MemoryReport
 from device import *
+from collections import deque
 
 class LaunchpadImpl(BufferedLaunchpad):
     def __init__(self, pdobj):
@@ -10,8 +11,13 @@ class LaunchpadImpl(BufferedLaunchpad):
         self.pdobj = pdobj
 
     def writeMidi(self, v1, v2, v3):
-        for v in (v1, v2, v3):
-            self.pdobj._outlet(1, ['midi', self.pdobj.launchpadPort, v])
+        self.pdobj.app.ledQueue.put(self.pdobj.launchpadPort, v1, v2, v3)
+
+    def writeLed(self, v1, v2, v3, priority=0):
+        self.pdobj.app.ledQueue.putLed(self.pdobj.launchpadPort, v1, v2, v3, priority)
+
+    def discardLeds(self):
+        self.pdobj.app.ledQueue.discard(self.pdobj.launchpadPort)
 
     def onBufferButtonEvent(self, buf, section, row, col, pressed):
         for controller in (self.pdobj.app.lpcontroller, self.pdobj.app.lkcontroller):
@@ -25,8 +31,14 @@ class LaunchkeyImpl(Launchkey):
         self.pdobj = pdobj
 
     def writeMidi(self, port, v1, v2, v3):
-        for v in (v1, v2, v3):
-            self.pdobj._outlet(1, ['midi', self.pdobj.launchkeyPorts[port], v])
+        self.pdobj.app.ledQueue.put(self.pdobj.launchkeyPorts[port], v1, v2, v3)
+
+    def writeLed(self, port, v1, v2, v3, priority=0):
+        self.pdobj.app.ledQueue.putLed(self.pdobj.launchkeyPorts[port], v1, v2, v3, priority)
+
+    def discardLeds(self):
+        for port in self.pdobj.launchkeyPorts:
+            self.pdobj.app.ledQueue.discard(port)
 
     def onNoteEvent(self, note, velocity):
         for controller in (self.pdobj.app.lpcontroller, self.pdobj.app.lkcontroller):
@@ -56,13 +68,50 @@ class Application(object):
         self.pdobj = pdobj
         self.song = Song()
         self.transport = Transport()
+        # device output is paced: the patch calls ledflush after the delay
+        # requested with an 'ledflush' message
+        self.ledQueue = LedOutputQueue(self.writeDeviceMidi, self.scheduleLedFlush)
         self.launchpad = LaunchpadImpl(pdobj)
         self.launchkey = LaunchkeyImpl(pdobj)
         self.lpcontroller = PatternEditController(self, 0, 0)
         self.lkcontroller = TracksController(self)
+        # if True, skip the ticks that produce no event, and schedule a single
+        # delaytick up to the next tick which has something to do:
+        self.eventScheduling = False
+        # ticks skipped at most at once: None for the default (see
+        # nextTickDelay()), float('inf') for no limit
+        self.maxSkipTicks = None
+        # 'rows': output every track row as is; 'delta': output note and control changes
+        self.outputMode = 'rows'
+        self.outputEncoders = [OutputDeltaEncoder(track) for track in self.song.tracks]
         for track in self.song.tracks:
             track.addObserver(self)
         self.transport.addObserver(self)
+        # controllers observing the model request redraws instead of drawing
+        # right away: each requested controller is redrawn (and the launchpad
+        # synced) once, when the patch calls redraw after the current message
+        # is handled, or later if that exceeds maxRedrawRate
+        self.dirtyControllers = []
+        self.syncRequested = False
+        self.redrawScheduled = False
+        self.maxRedrawRate = 0. # redraws per second, 0: unlimited
+        self.lastRedraw = None
+        self.resetRedrawStats()
+        # timing of the hot paths, disabled by default (see setTimingStats()):
+        self.timingStats = TimingStats()
+        # lateness of the ticks, and the handlers delaying them (see
+        # beginHandler()), disabled by default:
+        self.jitterMonitor = TickJitterMonitor()
+        # memory used by the song and the LED buffers, and allocation
+        # snapshots (see getMemoryReport()):
+        self.memoryReport = MemoryReport()
+
+    def getMemoryReport(self):
+        '''
+        Return the memory used by the song, its observer registries and the
+        launchpad buffers (see MemoryReport.measure()).
+        '''
+        return self.memoryReport.measure(self.song, self.launchpad, {'transport': self.transport.observers})
 
     def initDevices(self):
         self.launchpad.reset()
@@ -74,29 +123,160 @@ class Application(object):
     def writeMidi(self, v1, v2, v3):
         self.pdobj.writeMidi(v1, v2, v3)
 
+    def writeDeviceMidi(self, port, v1, v2, v3):
+        self.pdobj.midiOut.write(port, v1, v2, v3)
+
+    def scheduleLedFlush(self, delay):
+        self.pdobj._outlet(1, ['ledflush', delay])
+
     def setLPController(self, c):
         self.lpcontroller = c
+        self.timingStats.instrument(c, 'update', 'update')
         self.lpcontroller.update()
 
     def setLKController(self, c):
         self.lkcontroller = c
+        self.timingStats.instrument(c, 'update', 'update')
         self.lkcontroller.update()
 
     def isActiveController(self, controller):
         return controller in (self.lpcontroller, self.lkcontroller)
 
+    def setTimingStats(self, enable):
+        '''
+        Enable or disable the timing of song ticks, track merges, observer
+        notifications, controller updates, launchpad syncs and outlet writes.
+        '''
+        stats = self.timingStats
+        if not enable:
+            stats.disable()
+            return
+        if stats.enabled:
+            return
+        stats.enable()
+        stats.instrument(self.song, 'tick', 'tick')
+        for track in self.song.tracks:
+            stats.instrument(track.outputMerger, 'merge', 'merge')
+        observed = [self.song, self.transport]
+        for track in self.song.tracks:
+            observed.extend([track, track.activeNotes])
+            observed.extend(track.patterns)
+        for obj in observed:
+            for name in dir(type(obj)):
+                if name.startswith('notify'):
+                    stats.instrument(obj, name, 'notify')
+        stats.instrument(self.lpcontroller, 'update', 'update')
+        stats.instrument(self.lkcontroller, 'update', 'update')
+        stats.instrument(self.launchpad, 'syncBuffer', 'sync')
+        stats.instrument(self.pdobj, '_outlet', 'outlet')
+
+    def beginHandler(self):
+        '''
+        Return the start time of a message handler, if the jitter monitor
+        needs it (see endHandler()).
+        '''
+        return self.transport.clock.now() if self.jitterMonitor.enabled else None
+
+    def endHandler(self, name, start):
+        if start is not None:
+            self.jitterMonitor.addHandler(name, start, self.transport.clock.now())
+
+    def resetRedrawStats(self):
+        self.numRedrawRequests = 0
+        self.numRedraws = 0
+        self.numSyncRequests = 0
+        self.numSyncs = 0
+
+    def requestRedraw(self, controller):
+        '''
+        Have controller.update() called once the current message is handled.
+        '''
+        self.numRedrawRequests += 1
+        if controller not in self.dirtyControllers:
+            self.dirtyControllers.append(controller)
+        self.scheduleRedraw()
+
+    def requestSync(self):
+        '''
+        Have the launchpad default buffer synced once the current message is
+        handled.
+        '''
+        self.numSyncRequests += 1
+        self.syncRequested = True
+        self.scheduleRedraw()
+
+    def scheduleRedraw(self):
+        if not self.redrawScheduled:
+            self.redrawScheduled = True
+            self.pdobj._outlet(1, ['redraw', self.getRedrawDelay()])
+
+    def getRedrawDelay(self):
+        if not self.maxRedrawRate or self.lastRedraw is None:
+            return 0
+        return max(0., self.lastRedraw + 1000. / self.maxRedrawRate - self.transport.clock.now())
+
+    def setMaxRedrawRate(self, rate):
+        self.maxRedrawRate = max(0., float(rate))
+
+    def performRedraws(self):
+        self.redrawScheduled = False
+        self.lastRedraw = self.transport.clock.now()
+        dirtyControllers, self.dirtyControllers = self.dirtyControllers, []
+        for controller in dirtyControllers:
+            # controllers replaced since the request have nothing to draw:
+            if self.isActiveController(controller):
+                controller.update()
+                self.numRedraws += 1
+                if controller == self.lpcontroller:
+                    self.syncRequested = False
+        if self.syncRequested:
+            self.syncRequested = False
+            self.launchpad.syncBuffer('default')
+            self.numSyncs += 1
+
     def onTrackStatusChange(self, trackIndex, volume, muted, isActive):
         self.pdobj._outlet(1, ['volume', trackIndex, 0 if muted else volume])
 
     def onPlaybackStatusChange(self, playing):
         if playing:
-            self.pdobj._outlet(1, ['delaytick', self.tickPeriod()])
+            self.pdobj._outlet(1, ['delaytick', self.transport.clock.start(self.tickPeriod())])
         else:
             self.song.resetTick()
+            if self.outputMode == 'delta':
+                self.outputAllNotesOff()
+
+    def outputAllNotesOff(self):
+        # end the notes started in delta mode:
+        for trackIndex, encoder in enumerate(self.outputEncoders):
+            for event in encoder.allNotesOff():
+                self.pdobj._outlet(1, [event[0], trackIndex] + list(event[1:]))
 
     def tickPeriod(self):
         return 60000. / self.song.getTicksPerBeat() / self.song.getBeatsPerMinute() / 4.
 
+    def nextTickDelay(self):
+        n = 0
+        if self.eventScheduling:
+            # by default, wake up at least once per beat to report the position:
+            maxTicks = self.maxSkipTicks
+            if maxTicks is None: maxTicks = self.song.getTicksPerBeat() * 4 - 1
+            n = self.song.getSilentTicks(maxTicks)
+            self.song.skipTicks(n)
+        return self.transport.clock.nextDelay(n + 1)
+
+    def setOutputMode(self, mode):
+        if mode not in ('rows', 'delta'):
+            raise ValueError('invalid output mode: %s' % mode)
+        if mode != self.outputMode:
+            if self.outputMode == 'delta':
+                self.outputAllNotesOff()
+            for encoder in self.outputEncoders:
+                encoder.reset()
+        self.outputMode = mode
+
+    def updateTickPeriod(self):
+        self.transport.clock.setPeriod(self.tickPeriod())
+
 class IO(pyext._class):
     _inlets = 1
     _outlets = 1
@@ -105,12 +285,26 @@ class IO(pyext._class):
         self.launchpadPort = launchpadPort
         self.launchkeyPorts = (launchkeyPort, launchkeyCtrlPort)
         self.midiOutPort = midiOutPort
-        self.midiBuffer = {}
+        # MIDI written by a handler is sent when it returns (see flushMidi())
+        self.midiOut = MidiOutputBuffer(self.sendMidi)
         self.app = Application(self)
         self.song = self.app.song
         self.transport = self.app.transport
         self.launchkey = self.app.launchkey
         self.launchpad = self.app.launchpad
+        # dumps are output dumpChunkSize messages at a time, dumpInterval ms
+        # apart, so that they don't stall the Pd scheduler:
+        self.dumpQueue = deque()
+        self.dumpChunkSize = 16
+        self.dumpInterval = 1.
+        self.dumpScheduled = False
+        self.midiParsers = {
+            launchpadPort: MidiParser(self.launchpad.onMidiData),
+            launchkeyPort: MidiParser(lambda data: self.launchkey.onMidiData(0, data)),
+            launchkeyCtrlPort: MidiParser(lambda data: self.launchkey.onMidiData(1, data))
+        }
+        # see profilestart_1():
+        self.profiler = HandlerProfiler(self)
 
     def init_1(self):
         self.app.initDevices()
@@ -124,27 +318,165 @@ class IO(pyext._class):
     def isActiveController(self, controller):
         return self.app.isActiveController(controller)
 
+    def requestRedraw(self, controller):
+        self.app.requestRedraw(controller)
+
+    def requestSync(self):
+        self.app.requestSync()
+
     def writeMidi(self, v1, v2, v3):
-        for v in (v1, v2, v3):
-            self._outlet(1, ['midi', self.midiOutPort, v])
-
-    def midi_1(self, pdport, f):
-        if pdport not in self.midiBuffer or f & 0x80:
-            self.midiBuffer[pdport] = []
-        self.midiBuffer[pdport].append(f)
-        if len(self.midiBuffer[pdport]) == 3:
-            if pdport == self.launchpadPort:
-                self.launchpad.onMidiData(self.midiBuffer[pdport])
-            elif pdport == self.launchkeyPorts[0]:
-                self.launchkey.onMidiData(0, self.midiBuffer[pdport])
-            elif pdport == self.launchkeyPorts[1]:
-                self.launchkey.onMidiData(1, self.midiBuffer[pdport])
+        self.midiOut.write(self.midiOutPort, v1, v2, v3)
+
+    def sendMidi(self, port, data):
+        self._outlet(1, ['midi', port] + data)
+
+    def flushMidi(self):
+        self.midiOut.flush()
+
+    def midi_1(self, pdport, *data):
+        start = self.app.beginHandler()
+        if pdport in self.midiParsers:
+            self.midiParsers[pdport].feed(data)
+        self.flushMidi()
+        self.app.endHandler('midi', start)
 
     def setticksperbeat_1(self, tpb):
         self.song.setTicksPerBeat(tpb)
+        self.app.updateTickPeriod()
 
     def setbeatsperminute_1(self, bpm):
         self.song.setBeatsPerMinute(bpm)
+        self.app.updateTickPeriod()
+
+    def clockstats_1(self):
+        clock = self.transport.clock
+        lateness, maxLateness, meanLateness = clock.getDrift()
+        self._outlet(1, ['clock', 'drift', lateness, maxLateness, meanLateness])
+        self._outlet(1, ['clock', 'ticks', clock.numTicks, clock.numResyncs])
+
+    def clockresetstats_1(self):
+        self.transport.clock.resetStats()
+
+    def setcompiledplayback_1(self, enable):
+        self.song.setCompiledPlayback(bool(enable))
+
+    def seteventscheduling_1(self, enable):
+        self.app.eventScheduling = bool(enable)
+
+    def setmaxskipticks_1(self, n):
+        # a negative value removes the limit:
+        self.app.maxSkipTicks = int(n) if n >= 0 else float('inf')
+
+    def setoutputmode_1(self, mode):
+        self.app.setOutputMode(str(mode))
+
+    def setvoicestealing_1(self, trackIndex, policy):
+        self.song.tracks[trackIndex].outputMerger.setStealingPolicy(str(policy))
+
+    def setframetransfer_1(self, enable, threshold=None):
+        self.launchpad.setFrameTransfer(bool(enable), threshold)
+
+    def setledrate_1(self, maxFrameRate, bytesPerSecond=None):
+        self.app.ledQueue.setRate(maxFrameRate, bytesPerSecond)
+
+    def ledflush_1(self):
+        start = self.app.beginHandler()
+        self.app.ledQueue.flush()
+        self.flushMidi()
+        self.app.endHandler('ledflush', start)
+
+    def ledstats_1(self):
+        q = self.app.ledQueue
+        self._outlet(1, ['leds', 'queue', q.depth, q.maxDepth])
+        self._outlet(1, ['leds', 'count', q.numSent, q.numCoalesced, q.numDropped, q.numFlushes])
+
+    def ledresetstats_1(self):
+        self.app.ledQueue.resetStats()
+
+    def redraw_1(self):
+        start = self.app.beginHandler()
+        self.app.performRedraws()
+        self.app.endHandler('redraw', start)
+
+    def setredrawrate_1(self, rate):
+        self.app.setMaxRedrawRate(rate)
+
+    def redrawstats_1(self):
+        app = self.app
+        self._outlet(1, ['redraws', 'count', app.numRedrawRequests, app.numRedraws, app.numSyncRequests, app.numSyncs])
+
+    def redrawresetstats_1(self):
+        self.app.resetRedrawStats()
+
+    def setstats_1(self, enable):
+        self.app.setTimingStats(bool(enable))
+
+    def stats_1(self):
+        stats = self.app.timingStats
+        self._outlet(1, ['stats', 'enabled', int(stats.enabled)])
+        for counter in stats.counters.values():
+            # count, total (ms), mean, max, median and 99th percentile (us):
+            self._outlet(1, ['stats', counter.name, counter.count, 1e3 * counter.total, 1e6 * counter.getMean(), 1e6 * counter.max, counter.getPercentile(50), counter.getPercentile(99)])
+            self._outlet(1, ['stats', counter.name, 'histogram'] + counter.histogram)
+
+    def resetstats_1(self):
+        self.app.timingStats.reset()
+
+    def profilestart_1(self, *handlers):
+        # handlers to profile (e.g. delayedtick midi), or none for all of them:
+        self.profiler.start(*handlers)
+
+    def profilestop_1(self, path):
+        self._outlet(1, ['profile'] + list(self.profiler.stop(str(path))))
+
+    def setjittermonitor_1(self, enable, lateThreshold=None):
+        self.app.jitterMonitor.enabled = bool(enable)
+        if lateThreshold is not None:
+            self.app.jitterMonitor.lateThreshold = max(0., float(lateThreshold))
+
+    def jitterstats_1(self):
+        monitor = self.app.jitterMonitor
+        self._outlet(1, ['jitter', 'ticks', monitor.numTicks, monitor.numLate])
+        # median, 90th and 99th percentiles, and maximum (ms):
+        for name, values, maximum in (('lateness', monitor.lateness, monitor.maxLateness), ('execution', monitor.execution, monitor.maxExecution)):
+            self._outlet(1, ['jitter', name] + monitor.getPercentiles(values, (50, 90, 99)) + [maximum])
+        for handler, (count, overlap) in sorted(monitor.blame.items()):
+            self._outlet(1, ['jitter', 'blame', handler, count, overlap])
+        for rank, (lateness, tick, execution, handler) in enumerate(monitor.offenders):
+            self._outlet(1, ['jitter', 'worst', rank + 1, tick, lateness, execution, handler])
+
+    def jitterresetstats_1(self):
+        self.app.jitterMonitor.reset()
+
+    def memreport_1(self):
+        report = self.app.getMemoryReport()
+        # bytes and objects of each part, then what it holds:
+        messages = [['memory', 'total'] + list(report['total']), ['memory', 'song'] + list(report['song'])]
+        for trackIndex, entry in sorted(report['tracks'].items()):
+            messages.append(['memory', 'track', trackIndex] + list(entry))
+        for key, entry in sorted(report['patterns'].items()):
+            messages.append(['memory', 'pattern'] + list(key) + list(entry))
+        for key, entry in sorted(report['songCells'].items()):
+            messages.append(['memory', 'songcell'] + list(key) + list(entry))
+        for name, entry in sorted(report['observers'].items()):
+            messages.append(['memory', 'observers'] + list(name) + list(entry))
+        for key, entry in sorted(report['leds'].items()):
+            messages.append(['memory', 'leds'] + list(key) + list(entry))
+        self.queueDump(messages)
+
+    def setmemtrace_1(self, enable, frames=1):
+        if enable:
+            self.app.memoryReport.startTracing(frames)
+        else:
+            self.app.memoryReport.stopTracing()
+
+    def memsnapshot_1(self, name):
+        self.app.memoryReport.takeSnapshot(str(name))
+
+    def memdiff_1(self, oldName, newName, limit=10):
+        # source lines whose allocations changed the most between two snapshots:
+        for filename, line, sizeDiff, countDiff in self.app.memoryReport.compareSnapshots(str(oldName), str(newName), limit):
+            self._outlet(1, ['memory', 'diff', filename, line, sizeDiff, countDiff])
 
     def start_1(self):
         self.transport.start()
@@ -154,8 +486,12 @@ class IO(pyext._class):
 
     def delayedtick_1(self):
         if self.transport.isPlaying():
+            clock = self.transport.clock
+            clock.beginTick()
             self.tick_1()
-            self._outlet(1, ['delaytick', self.app.tickPeriod()])
+            self._outlet(1, ['delaytick', self.app.nextTickDelay()])
+            if self.app.jitterMonitor.enabled:
+                self.app.jitterMonitor.addTick(clock.numTicks, clock.tickStart - clock.lateness, clock.tickStart, clock.now())
 
     def songgetrowduration_1(self, row):
         self._outlet(1, ['rowduration', row, self.song.getRowDuration(row)])
@@ -169,11 +505,67 @@ class IO(pyext._class):
     def tick_1(self):
         currentRow, currentTick, output = self.song.tick()
         self._outlet(1, ['pos', currentRow, currentTick])
-        for trackIndex, row in output.items():
-            self._outlet(1, ['output', trackIndex] + row)
+        if self.app.outputMode == 'delta':
+            for trackIndex, row in output.items():
+                for event in self.app.outputEncoders[trackIndex].encode(row):
+                    self._outlet(1, [event[0], trackIndex] + list(event[1:]))
+        else:
+            for trackIndex, row in output.items():
+                self._outlet(1, ['output', trackIndex] + list(row))
+        self.flushMidi()
+
+    def queueDump(self, messages):
+        self.dumpQueue.extend(messages)
+        if not self.dumpScheduled:
+            self.dumpnext_1()
+
+    def dumpnext_1(self):
+        start = self.app.beginHandler()
+        self.dumpScheduled = False
+        for i in range(min(self.dumpChunkSize, len(self.dumpQueue))):
+            self._outlet(1, self.dumpQueue.popleft())
+        if self.dumpQueue:
+            self.dumpScheduled = True
+            self._outlet(1, ['dumpnext', self.dumpInterval])
+        self.app.endHandler('dump', start)
+
+    def setdumpchunksize_1(self, n):
+        self.dumpChunkSize = max(1, int(n))
+
+    def splitRows(self, width, values):
+        width = int(width)
+        if width < 1:
+            raise ValueError('row width must be positive')
+        return [values[i:i + width] for i in range(0, len(values) - width + 1, width)]
+
+    def getSongDump(self):
+        length = self.song.getLength()
+        messages = [['song', 'length', length]]
+        for row, values in enumerate(self.song.getRows(0, length)):
+            messages.append(['song', 'data-row', row] + values)
+        messages.append(['song', 'data-end'])
+        return messages
+
+    def getPatternDump(self, trackIndex, patternIndex, startRow=None, stopRow=None):
+        pattern = self.song.tracks[trackIndex].patterns[patternIndex]
+        prefix = ['track', trackIndex, 'pattern', patternIndex]
+        messages = []
+        if startRow is None:
+            startRow, stopRow = 0, pattern.getLength()
+            messages.append(prefix + ['length', pattern.getLength()])
+            messages.append(prefix + ['speedreduction', pattern.getSpeedReduction()])
+        for i, values in enumerate(pattern.getRows(startRow, stopRow)):
+            messages.append(prefix + ['data-row', startRow + i] + values)
+        messages.append(prefix + ['data-end'])
+        return messages
 
     def dump_1(self):
-        pass
+        messages = self.getSongDump()
+        for trackIndex, track in enumerate(self.song.tracks):
+            for patternIndex, pattern in enumerate(track.patterns):
+                if not pattern.isEmpty():
+                    messages.extend(self.getPatternDump(trackIndex, patternIndex))
+        self.queueDump(messages)
 
     def songget_1(self, row, col):
         self._outlet(1, ['song', 'data', row, col, self.song.get(row, col)])
@@ -187,6 +579,21 @@ class IO(pyext._class):
     def songsetrow_1(self, row, *values):
         self.song.setRow(row, values)
 
+    def songsetrows_1(self, startRow, *values):
+        width = len(self.song.tracks) * self.song.maxPatternPolyphony
+        self.song.setRows(int(startRow), self.splitRows(width, values))
+
+    def songsetorder_1(self, length, *values):
+        width = len(self.song.tracks) * self.song.maxPatternPolyphony
+        with self.song.batch():
+            self.song.clear(False)
+            self.song.setLength(int(length), False)
+            self.song.setRows(0, self.splitRows(width, values)[:int(length)], False)
+            self.song.addSongChange()
+
+    def songgetorder_1(self):
+        self.queueDump(self.getSongDump())
+
     def songclear_1(self):
         self.song.clear()
 
@@ -206,12 +613,30 @@ class IO(pyext._class):
 
     def getrow_1(self, trackIndex, patternIndex, row):
         pattern = self.song.tracks[trackIndex].patterns[patternIndex]
-        self._outlet(1, ['track', trackIndex, 'pattern', patternIndex, 'data-row', row] + pattern.getRow(row))
+        self._outlet(1, ['track', trackIndex, 'pattern', patternIndex, 'data-row', row] + list(pattern.getRow(row)))
 
     def setrow_1(self, trackIndex, patternIndex, row, *values):
         pattern = self.song.tracks[trackIndex].patterns[patternIndex]
         pattern.setRow(row, values)
 
+    def getrows_1(self, trackIndex, patternIndex, startRow, stopRow):
+        self.queueDump(self.getPatternDump(trackIndex, patternIndex, int(startRow), int(stopRow)))
+
+    def setrows_1(self, trackIndex, patternIndex, startRow, width, *values):
+        pattern = self.song.tracks[trackIndex].patterns[patternIndex]
+        pattern.setRows(int(startRow), self.splitRows(width, values))
+
+    def getpattern_1(self, trackIndex, patternIndex):
+        self.queueDump(self.getPatternDump(trackIndex, patternIndex))
+
+    def setpattern_1(self, trackIndex, patternIndex, length, width, *values):
+        pattern = self.song.tracks[trackIndex].patterns[patternIndex]
+        with self.song.batch():
+            pattern.clear(False)
+            pattern.setLength(int(length), False)
+            pattern.setRows(0, self.splitRows(width, values)[:int(length)], False)
+            pattern.addChange()
+
     def clear_1(self, trackIndex, patternIndex):
         pattern = self.song.tracks[trackIndex].patterns[patternIndex]
         pattern.clear()
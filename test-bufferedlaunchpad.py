@@ -0,0 +1,46 @@
+from device import BufferedLaunchpad
+
+class FakeLaunchpad(BufferedLaunchpad):
+    def __init__(self):
+        super(FakeLaunchpad, self).__init__()
+        self.written = []
+
+    def writeMidi(self, v1, v2, v3):
+        self.written.append((v1, v2, v3))
+
+lp = FakeLaunchpad()
+
+# only the cells differing from what the device displays are sent:
+lp.set('default', 'center', 0, 0, 3, 0)
+lp.set('default', 'center', 1, 2, 0, 3)
+lp.syncCurrentBuffer()
+assert sorted(lp.written) == [(0x90, 0x00, 0x03), (0x90, 0x12, 0x30)], lp.written
+del lp.written[:]
+lp.set('default', 'center', 0, 0, 3, 0)
+lp.syncCurrentBuffer()
+assert lp.written == [], lp.written
+
+# after a reset the device is blank, and the buffer is sent again:
+lp.reset()
+assert lp.written == [(0xB0, 0x00, 0x00)], lp.written
+del lp.written[:]
+lp.syncCurrentBuffer()
+assert sorted(lp.written) == [(0x90, 0x00, 0x03), (0x90, 0x12, 0x30)], lp.written
+
+# big syncs are drawn into the hidden buffer, which is then displayed:
+lp.setFrameTransfer(True, 4)
+for col in range(8):
+    lp.set('default', 'center', 3, col, 1, 1)
+del lp.written[:]
+lp.syncCurrentBuffer()
+assert lp.written[0] == (0xB0, 0x00, 0x24) and lp.written[-1] == (0xB0, 0x00, 0x25), lp.written
+assert len(lp.written) == 2 + 40 and lp.displayedBuffer == 1
+
+# a reset displays buffer 0, and the next frame is drawn into buffer 1:
+lp.reset()
+assert lp.displayedBuffer == 0
+del lp.written[:]
+lp.syncCurrentBuffer()
+assert lp.written[0] == (0xB0, 0x00, 0x24) and lp.written[-1] == (0xB0, 0x00, 0x25), lp.written
+
+print('bufferedlaunchpad: ok')
@@ -0,0 +1,73 @@
+from sequencer.model import *
+
+class Observer(object):
+    def __init__(self):
+        self.changes = []
+
+    def onPatternChange(self, trackIndex, patternIndex, changes):
+        self.changes.append(changes.getPatternChange(trackIndex, patternIndex))
+
+    def onSongChange(self, changes):
+        self.changes.append(changes.getSongChange())
+
+s = Song()
+t = s.tracks[0]
+p = t.patterns[0]
+o = Observer()
+p.addObserver(o)
+s.addObserver(o)
+
+# edits notify the changed rows and columns:
+p.noteAdd(0, 60, 2)
+assert o.changes == [(0, 3, set([0]))], o.changes
+del o.changes[:]
+
+# a note added before holds runs through them:
+p.set(6, 0, -2, False)
+p.set(7, 0, -2, False)
+p.noteAdd(4, 62, 2)
+assert o.changes == [(4, 9, set([0]))], o.changes
+p.noteDelete(4, 62)
+del o.changes[:]
+
+# clearing a range of rows reports all of them:
+for row in range(6):
+    p.set(row, 1, 60 + row, False)
+p.clearRowRange(0, 3)
+assert o.changes == [(0, 5, None)], o.changes
+del o.changes[:]
+
+# clearing no rows doesn't fail, and notifies nothing:
+p.clearRowRange(20)
+p.clearRowRange(5, 3)
+p.clearRows([])
+assert o.changes == [], o.changes
+
+# a batch notifies each pattern and the song once, with all the changes:
+with s.batch():
+    p.set(8, 0, 62)
+    p.set(12, 2, 64)
+    s.set(1, 0, [0])
+    s.set(3, 2, [1])
+    assert o.changes == []
+assert o.changes == [(8, 14, set([0, 2])), (1, 4, set([0, 2]))], o.changes
+del o.changes[:]
+
+# nested batches notify when the outermost one ends:
+with s.batch():
+    with s.batch():
+        p.set(0, 0, 70)
+    assert o.changes == []
+assert len(o.changes) == 1
+del o.changes[:]
+
+changes = ChangeSet()
+changes.addPatternChange(0, 0, 4, 8, [1])
+assert changes.patternIntersects(0, 0, 0, 5)
+assert not changes.patternIntersects(0, 0, 8, 16)
+assert not changes.patternIntersects(0, 0, 0, 16, [2])
+assert not changes.patternIntersects(0, 1, 0, 16)
+changes.addPatternChange(0, 0)
+assert changes.patternIntersects(0, 0, 60, 64, [7])
+
+print('changeset: ok')
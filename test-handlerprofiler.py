@@ -0,0 +1,78 @@
+import os
+import pstats
+import shutil
+import sys
+import tempfile
+from device import HandlerProfiler
+
+class Obj(object):
+    def rec(self, n):
+        return self.rec(n - 1) if n else 0
+
+    def go_1(self):
+        return self.rec(3)
+
+    def other_1(self):
+        return self.rec(1)
+
+o = Obj()
+profiler = HandlerProfiler(o)
+assert profiler.getHandlerNames() == ['go_1', 'other_1']
+try:
+    profiler.start('nothing')
+    assert False
+except ValueError:
+    pass
+
+# only the selected handlers are traced, and they're restored on stop:
+profiler.start('go')
+assert profiler.isRunning() and 'go_1' in vars(o) and 'other_1' not in vars(o)
+assert o.go_1() == 0
+o.go_1()
+o.other_1()
+d = tempfile.mkdtemp()
+try:
+    path, collapsedPath = profiler.stop(os.path.join(d, 'profile'))
+    assert not profiler.isRunning() and 'go_1' not in vars(o)
+    stats = dict((func[2], value) for func, value in pstats.Stats(path).stats.items())
+    # (primitive calls, calls, ...), callers as (calls, primitive calls, ...) as cProfile:
+    cc, nc, tt, ct, callers = stats['rec']
+    assert (cc, nc) == (2, 8), (cc, nc)
+    callers = dict((func[2], value[:2]) for func, value in callers.items())
+    assert callers == {'go_1': (2, 2), 'rec': (6, 2)}, callers
+    assert stats['go_1'][:2] == (2, 2)
+    with open(collapsedPath) as f:
+        stacks = [line.rsplit(' ', 1)[0] for line in f]
+    assert stacks[0].startswith('go_1 (') and len(stacks) == 5, stacks
+    assert all(';'.join(stack.split(';')[:-1]) in stacks for stack in stacks[1:])
+finally:
+    shutil.rmtree(d)
+
+# a profiled handler calling one of another profiled object (e.g. the
+# sequencer outputting to the launchpad) doesn't end the outer trace:
+class Outer(Obj):
+    def go_1(self):
+        inner.other_1()
+        return self.rec(2)
+
+o = Outer()
+inner = Obj()
+outerProfiler = HandlerProfiler(o)
+innerProfiler = HandlerProfiler(inner)
+outerProfiler.start('go')
+innerProfiler.start('other')
+o.go_1()
+d = tempfile.mkdtemp()
+try:
+    innerPath, _ = innerProfiler.stop(os.path.join(d, 'inner'))
+    outerPath, _ = outerProfiler.stop(os.path.join(d, 'outer'))
+    stats = dict((func[2], value) for func, value in pstats.Stats(innerPath).stats.items())
+    assert stats['rec'][:2] == (1, 2), stats['rec']
+    stats = dict((func[2], value) for func, value in pstats.Stats(outerPath).stats.items())
+    assert stats['rec'][:2] == (1, 3), stats['rec']
+    assert stats['go_1'][:2] == (1, 1), stats['go_1']
+finally:
+    shutil.rmtree(d)
+assert sys.getprofile() is None
+
+print('handlerprofiler: ok')
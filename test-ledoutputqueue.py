@@ -0,0 +1,48 @@
+from device import LedOutputQueue
+
+class FakeClock(object):
+    def __init__(self):
+        self.time = 0.
+
+    def __call__(self):
+        return self.time
+
+written = []
+delays = []
+t = FakeClock()
+q = LedOutputQueue(lambda *message: written.append(message), delays.append, t)
+q.setRate(50., 30.) # 30 bytes per second at 50 frames per second: 1 message per flush
+
+# the first write schedules a flush right away; later ones are coalesced:
+q.putLed(0, 0x90, 1, 10)
+assert delays == [0.]
+q.putLed(0, 0x90, 1, 11)
+q.putLed(0, 0x90, 2, 20, priority=1)
+assert q.depth == 2 and q.numCoalesced == 1
+# other messages go after the LED writes queued before them:
+q.put(0, 0xb0, 0, 0)
+q.putLed(0, 0x90, 3, 30)
+
+# higher priorities first, then in order; flushes are a frame apart:
+for i in range(4):
+    q.flush()
+    t.time += 0.02
+assert written == [(0, 0x90, 2, 20), (0, 0x90, 1, 11), (0, 0xb0, 0, 0), (0, 0x90, 3, 30)], written
+assert len(delays) == 4 and abs(delays[1] - 20.) < 1e-6
+assert q.depth == 0 and q.numSent == 4 and q.numFlushes == 4
+
+# the default rate is what a MIDI link drains in a frame:
+q.setRate(50., 3125.)
+assert q.getFrameBudget() == 20
+
+# discarded LED writes are dropped, other messages are kept:
+del written[:]
+q.putLed(1, 0x90, 1, 10)
+q.putLed(0, 0x90, 1, 10)
+q.put(1, 0xb0, 0, 0)
+q.discard(1)
+assert q.numDropped == 1
+q.flush()
+assert written == [(0, 0x90, 1, 10), (1, 0xb0, 0, 0)], written
+
+print('ledoutputqueue: ok')
@@ -0,0 +1,57 @@
+from sequencer.model import *
+from sequencer.util import MemoryReport
+from device import BufferedLaunchpad
+
+class Observer(object):
+    def onPatternChange(self, trackIndex, patternIndex, changes):
+        pass
+
+s = Song(numTracks=2)
+report = MemoryReport()
+r = report.measure(s)
+assert sorted(r['tracks']) == [0, 1] and len(r['patterns']) == 128
+assert r['songCells'] == {} and r['leds'] == {}
+# every part is counted, once:
+size = r['song'][0] + sum(entry[0] for part in ('observers', 'songCells', 'patterns', 'tracks', 'leds') for entry in r[part].values())
+assert r['total'][0] == size and r['total'][1] > len(r['patterns'])
+assert r['observers']['pattern', 0, 0][2] == 0
+
+# pattern data, song order cells (including those inserted by reads) and
+# observers show up where they belong:
+o = Observer()
+s.tracks[0].patterns[0].addObserver(o)
+for row in range(16):
+    s.tracks[0].patterns[0].noteAdd(row, 60, 1)
+s.set(0, 1, [0, 1])
+s.get(2, 0)
+r2 = report.measure(s)
+assert r2['patterns'][0, 0][0] > r['patterns'][0, 0][0]
+assert r2['patterns'][0, 1] == r['patterns'][0, 1]
+assert r2['songCells'][0, 1][2] == 2 and r2['songCells'][2, 0][2] == 0
+assert r2['observers']['pattern', 0, 0][2] == 1
+assert r2['total'][0] > r['total'][0]
+
+# extra registries and LED buffers:
+launchpad = BufferedLaunchpad()
+r3 = report.measure(s, launchpad, {'extra': s.observers})
+assert ('extra',) in r3['observers']
+assert ('default', 'center') in r3['leds'] and r3['leds']['default', 'center'][2] == 0
+
+# allocations between snapshots, where tracemalloc is available:
+try:
+    report.takeSnapshot('a')
+    songs = [Song(numTracks=1) for i in range(2)]
+    report.takeSnapshot('b')
+    diff = report.compareSnapshots('a', 'b', 3)
+    assert len(diff) == 3 and diff[0][2] > 0
+    try:
+        report.compareSnapshots('a', 'c')
+        assert False
+    except ValueError:
+        pass
+    report.stopTracing()
+    assert not report.isTracing() and report.snapshots == {}
+except RuntimeError:
+    assert not report.isTracing() # Python 2
+
+print('memoryreport: ok')
@@ -0,0 +1,21 @@
+from device import MidiOutputBuffer
+
+sent = []
+buf = MidiOutputBuffer(lambda port, data: sent.append((port, list(data))))
+
+# writes are grouped by port, in order of first write, until flushed:
+buf.write(2, 0x90, 60, 100)
+buf.write(1, 0xB0, 0, 0)
+buf.write(2, 0x80, 60, 0)
+assert sent == []
+buf.flush()
+assert sent == [(2, [0x90, 60, 100, 0x80, 60, 0]), (1, [0xB0, 0, 0])], sent
+
+# nothing is sent for ports not written to since the last flush:
+del sent[:]
+buf.write(1, 0x90, 61, 100)
+buf.flush()
+buf.flush()
+assert sent == [(1, [0x90, 61, 100])], sent
+
+print('midioutputbuffer: ok')
@@ -0,0 +1,31 @@
+from device import MidiParser
+
+messages = []
+sysex = []
+parser = MidiParser(lambda data: messages.append(list(data)), lambda data: sysex.append(list(data)))
+
+# messages split across calls, and running status:
+parser.feed([0x90, 60])
+parser.feed([100, 62, 0])
+assert messages == [[0x90, 60, 100], [0x90, 62, 0]], messages
+del messages[:]
+
+# short messages, and real-time bytes in the middle of a message:
+parser.feed([0xC0, 5, 0xB0, 7, 0xF8, 127])
+assert messages == [[0xC0, 5, 0], [0xF8, 0, 0], [0xB0, 7, 127]], messages
+del messages[:]
+
+# SysEx is passed on without its F0/F7 bytes, and cancels running status:
+parser.feed([0xF0, 0x00, 0x20, 0x29, 0xF7, 60, 100])
+assert sysex == [[0x00, 0x20, 0x29]] and messages == [], (sysex, messages)
+# system common messages have their own lengths:
+parser.feed([0xF2, 1, 2, 0xF6])
+assert messages == [[0xF2, 1, 2], [0xF6, 0, 0]], messages
+del messages[:]
+
+# SysEx is skipped without a callback; data bytes without status are ignored:
+parser = MidiParser(lambda data: messages.append(list(data)))
+parser.feed([0xF0, 1, 2, 0xF7, 3, 0x80, 60, 0])
+assert messages == [[0x80, 60, 0]], messages
+
+print('midiparser: ok')
@@ -0,0 +1,77 @@
+import random
+from sequencer.model import *
+
+# the index maintained incrementally must match the one rebuilt from scratch,
+# and a scan of the pattern grid
+
+def scanIntervals(pattern):
+    intervals = {}
+    length = pattern.getLength()
+    for col in pattern.track.noteCols:
+        for row in range(length):
+            note = pattern.get(row, col)
+            if note < 1: continue
+            stop = row + 1
+            while stop < length and pattern.get(stop, col) == -2:
+                stop += 1
+            intervals.setdefault(note, []).append((row, stop))
+    for note in intervals:
+        intervals[note].sort()
+    return intervals
+
+def check(pattern):
+    index = pattern.noteIndex
+    rebuilt = NoteIntervalIndex(pattern)
+    assert index.cols == rebuilt.cols
+    assert index.onsets == rebuilt.onsets
+    assert index.getIntervals() == scanIntervals(pattern)
+    length = pattern.getLength()
+    for row in range(length):
+        for col in pattern.track.noteCols:
+            assert index.getInterval(row, col) == rebuilt.getInterval(row, col), (row, col)
+    for note in index.byNote:
+        for row in range(0, length, 3):
+            playing = any(start <= row < stop for start, stop in index.byNote[note])
+            assert index.isPlayingAt(row, note) == playing, (row, note)
+            playing = any(start <= row + 2 and stop > row for start, stop in index.byNote[note])
+            assert index.isPlayingInRange(row, row + 2, note) == playing, (row, note)
+
+rnd = random.Random(0)
+for seed in range(20):
+    s = Song()
+    track = s.tracks[0]
+    track.setNoteColumns([0, 1, 2])
+    pattern = track.patterns[0]
+    for i in range(200):
+        op = rnd.randrange(6)
+        row = rnd.randrange(pattern.getLength())
+        if op == 0:
+            pattern.noteAdd(row, rnd.randrange(60, 64), rnd.randrange(1, 5))
+        elif op == 1:
+            note = pattern.get(row, rnd.randrange(3))
+            if note > 0: pattern.noteDelete(row, note)
+        elif op == 2:
+            # raw cell edits, including continuations of no note:
+            pattern.set(row, rnd.randrange(4), rnd.choice([-1, -2, 60, 61]))
+        elif op == 3:
+            pattern.setLength(rnd.randrange(4, 24))
+        elif op == 4:
+            pattern.clearRowRange(row, row + rnd.randrange(3))
+        else:
+            pattern.setRow(row, [rnd.choice([-1, -2, 62]) for col in range(3)])
+        check(pattern)
+    # changing the note columns rebuilds the index:
+    track.setNoteColumns([1, 2, 3])
+    check(pattern)
+
+s = Song()
+pattern = s.tracks[0].patterns[0]
+pattern.noteAdd(2, 60, 3)
+pattern.noteAdd(4, 62, 1)
+assert pattern.noteGetIntervals() == {60: [(2, 5)], 62: [(4, 5)]}
+assert pattern.noteGetIntervals(5, 8) == {60: [(2, 5)], 62: [(4, 5)]}
+assert pattern.noteGetIntervals(6, 8) == {}
+assert pattern.noteIndex.getOnsets(4) == {1: 62}
+assert pattern.noteIsPlayingAt(4, 60) and not pattern.noteIsPlayingAt(5, 60)
+
+print('noteintervalindex: ok')
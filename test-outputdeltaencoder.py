@@ -0,0 +1,41 @@
+from sequencer.model import *
+from sequencer.util import OutputDeltaEncoder
+
+s = Song()
+track = s.tracks[0]
+track.setNoteColumns([0, 1])
+encoder = OutputDeltaEncoder(track, velocity=90)
+
+# note columns turn into note on/off events, held by -2:
+assert encoder.encode([60, -1, -1, 10]) == [('noteon', 0, 60, 90), ('control', 3, 10)]
+assert encoder.encode([-2, 64, -1, 10]) == [('noteon', 1, 64, 90)]
+# a new note ends the previous one of the voice; -1 ends it:
+assert encoder.encode([62, -1, 11]) == [('noteoff', 0, 60), ('noteon', 0, 62, 90), ('noteoff', 1, 64), ('control', 2, 11)]
+# control values are only sent when they change:
+assert encoder.encode([-2, -1, 11, 12]) == [('control', 3, 12)]
+assert encoder.allNotesOff() == [('noteoff', 0, 62)]
+assert encoder.allNotesOff() == []
+
+# leaving delta mode ends the playing notes before forgetting them:
+encoder.encode([60, 64])
+assert encoder.allNotesOff() == [('noteoff', 0, 60), ('noteoff', 1, 64)]
+encoder.reset()
+assert encoder.encode([60]) == [('noteon', 0, 60, 90)]
+encoder.reset()
+assert encoder.allNotesOff() == []
+assert encoder.encode([-1, -1, 11]) == [('control', 2, 11)]
+
+# the sequencer ends the notes started in delta mode when leaving it:
+from benchmark.headless import HeadlessSequencer
+seq = HeadlessSequencer()
+seq.send('songset', 0, 0, 0)
+seq.send('set', 0, 0, 0, 0, 60)
+seq.send('setoutputmode', 'delta')
+del seq.output[:]
+seq.send('tick')
+assert ['noteon', 0, 0, 60, 100] in seq.output, seq.output
+del seq.output[:]
+seq.send('setoutputmode', 'rows')
+assert seq.output == [['noteoff', 0, 0, 60]], seq.output
+
+print('outputdeltaencoder: ok')
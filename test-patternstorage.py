@@ -0,0 +1,106 @@
+import random
+from sequencer.model import *
+
+# the dense storage must behave as the sparse one it replaces
+
+def trim(row):
+    # the sparse storage grows rows on reads: ignore trailing empty cells
+    row = list(row)
+    while row and row[-1] == -1:
+        row.pop()
+    return row
+
+def check(dense, sparse, numRows, numCols):
+    for row in range(numRows + 2):
+        for col in range(numCols + 2):
+            assert dense.get(row, col) == sparse.get(row, col), (row, col)
+            assert dense.isEmptyCell(row, col) == sparse.isEmptyCell(row, col), (row, col)
+        assert dense.isEmptyRow(row) == sparse.isEmptyRow(row), row
+        assert trim(dense.getRow(row, numCols)) == trim(sparse.getRow(row, numCols)), row
+    assert dense.isEmpty() == sparse.isEmpty()
+    assert sorted(dense.rows()) == sorted(row for row in sparse.rows() if not sparse.isEmptyRow(row))
+
+rnd = random.Random(0)
+for seed in range(20):
+    dense = DensePatternStorage(16, 4)
+    sparse = SparsePatternStorage(16, 4)
+    for i in range(300):
+        op = rnd.randrange(4)
+        row = rnd.randrange(24)
+        if op == 0:
+            # writes out of the grid grow it:
+            col = rnd.randrange(6)
+            value = rnd.choice([-1, -2, rnd.randrange(1, 128)])
+            dense.set(row, col, value)
+            sparse.set(row, col, value)
+        elif op == 1:
+            values = [rnd.choice([-1, 60]) for col in range(rnd.randrange(1, 6))]
+            dense.setRow(row, values)
+            sparse.setRow(row, values)
+        elif op == 2:
+            rows = [rnd.randrange(24) for j in range(3)]
+            dense.clearRows(rows)
+            sparse.clearRows(rows)
+        else:
+            dense.getRow(row, 8)
+        check(dense, sparse, 24, 6)
+
+# rows returned by getRow() are cached until the row changes:
+dense = DensePatternStorage(4, 4)
+dense.set(1, 2, 60)
+row = dense.getRow(1, 4)
+assert dense.getRow(1, 4) is row
+assert list(row) == [-1, -1, 60, -1]
+dense.set(1, 0, 62)
+assert list(dense.getRow(1, 4)) == [62, -1, 60, -1]
+assert list(dense.getRow(1, 6)) == [62, -1, 60, -1, -1, -1]
+assert list(dense.getRow(10, 2)) == [-1, -1]
+
+# clearing an empty cell out of the grid doesn't grow it:
+dense.set(10, 10, -1)
+assert (dense.numRows, dense.numCols) == (4, 4)
+try:
+    dense.set(-1, 0, 60)
+    assert False
+except IndexError:
+    pass
+
+# values which aren't C ints (fractional control values, big integers) are
+# kept as is, and a row is never left half written:
+for value in (0.5, 2 ** 40, -2 ** 40):
+    dense = DensePatternStorage(4, 4)
+    sparse = SparsePatternStorage(4, 4)
+    for storage in (dense, sparse):
+        storage.set(0, 1, 60)
+        storage.getRow(0, 4)
+        storage.setRow(1, [60, -1, value])
+        storage.set(6, 5, value)
+        storage.set(0, 3, value)
+    check(dense, sparse, 8, 6)
+    assert dense.get(1, 2) == value and list(dense.getRow(0, 4)) == [-1, 60, -1, value]
+s = Song()
+p = s.tracks[0].patterns[0]
+p.noteAdd(0, 60, 2)
+p.set(0, 9, 0.5)
+p.setRow(1, [62, -1, 0.25])
+p.setLength(32)
+assert p.get(0, 9) == 0.5 and p.get(16, 9) == 0.5
+assert list(p.getRow(1))[:3] == [62, -1, 0.25]
+assert p.noteGetIntervals() == {60: [(0, 1), (16, 17)], 62: [(1, 2), (17, 18)]}
+
+# both backends play the same through a Pattern:
+for storage in (DensePatternStorage, SparsePatternStorage):
+    s = Song(patternStorage=storage)
+    p = s.tracks[0].patterns[0]
+    assert isinstance(p.data, storage)
+    p.noteAdd(0, 60, 2)
+    p.noteAdd(2, 64, 1)
+    p.setLength(8)
+    assert p.noteGetIntervals() == {60: [(0, 2)], 64: [(2, 3)]}
+    assert [p.get(row, 0) for row in range(4)] == [60, -2, 64, -1]
+    # growing a pattern repeats its rows:
+    p.setLength(16)
+    assert p.noteGetIntervals() == {60: [(0, 2), (8, 10)], 64: [(2, 3), (10, 11)]}
+    assert list(p.getRow(10))[:2] == [64, -1]
+
+print('patternstorage: ok')
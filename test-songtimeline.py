@@ -0,0 +1,85 @@
+import random
+from sequencer.model import *
+
+# compiled playback must output the same as the interpreted Song.tick(),
+# including when the song and its patterns are edited while playing
+
+class PlayHeadObserver(object):
+    def __init__(self):
+        self.changes = []
+
+    def onPatternChange(self, trackIndex, patternIndex, changes):
+        pass
+
+    def onPlayHeadChange(self, trackIndex, patternIndex, playHeadRow):
+        self.changes.append((trackIndex, patternIndex, playHeadRow))
+
+def buildSong(compiled):
+    s = Song(numTracks=3, defaultRowDuration=1)
+    s.setLength(3)
+    for trackIndex, track in enumerate(s.tracks):
+        track.setNoteColumns([0, 1, 2])
+        for patternIndex in range(3):
+            pattern = track.patterns[patternIndex]
+            pattern.setLength(4 + patternIndex)
+            pattern.setSpeedReduction(1 + patternIndex)
+            for row in range(0, pattern.getLength(), 2):
+                pattern.noteAdd(row, 40 + 3 * trackIndex + row, 1 + row % 3)
+    for row in range(3):
+        for trackIndex in range(3):
+            s.set(row, trackIndex, [row % 3, (row + trackIndex) % 3])
+    s.setCompiledPlayback(compiled)
+    observer = PlayHeadObserver()
+    for track in s.tracks:
+        for pattern in track.patterns:
+            pattern.addObserver(observer)
+    return s, observer
+
+def edit(s, rnd):
+    op = rnd.randrange(6)
+    track = s.tracks[rnd.randrange(3)]
+    pattern = track.patterns[rnd.randrange(3)]
+    if op == 0:
+        s.setRowDuration(s.currentRow, rnd.randrange(1, 3))
+    elif op == 1:
+        pattern.setSpeedReduction(rnd.randrange(1, 5))
+    elif op == 2:
+        pattern.setLength(rnd.randrange(2, 9))
+    elif op == 3:
+        pattern.noteAdd(rnd.randrange(pattern.getLength()), rnd.randrange(30, 90), rnd.randrange(1, 4))
+    elif op == 4:
+        pattern.clearRowRange(rnd.randrange(pattern.getLength()))
+    else:
+        s.set(rnd.randrange(3), track.trackIndex, [rnd.randrange(3)])
+
+def normalize(output):
+    return dict((trackIndex, list(row)) for trackIndex, row in output.items() if len(row))
+
+for seed in range(50):
+    interpreted, interpretedObserver = buildSong(False)
+    compiled, compiledObserver = buildSong(True)
+    rnds = random.Random(seed), random.Random(seed)
+    rnd = random.Random(1000 + seed)
+    for i in range(400):
+        if rnd.random() < 0.1:
+            edit(interpreted, rnds[0])
+            edit(compiled, rnds[1])
+        a = interpreted.tick()
+        b = compiled.tick()
+        assert a[:2] == b[:2], (seed, i, a[:2], b[:2])
+        assert normalize(a[2]) == normalize(b[2]), (seed, i, normalize(a[2]), normalize(b[2]))
+        assert interpretedObserver.changes == compiledObserver.changes, (seed, i, interpretedObserver.changes, compiledObserver.changes)
+        del interpretedObserver.changes[:], compiledObserver.changes[:]
+        if rnd.random() < 0.1:
+            # ticks skipped when scheduling on events:
+            n = min(interpreted.getSilentTicks(), compiled.getSilentTicks())
+            interpreted.skipTicks(n)
+            compiled.skipTicks(n)
+        if rnd.random() < 0.02:
+            # switching modes while playing hands the play heads over:
+            interpreted.setCompiledPlayback(not interpreted.isCompiledPlayback())
+            compiled.setCompiledPlayback(not compiled.isCompiledPlayback())
+            interpreted, compiled = compiled, interpreted
+            interpretedObserver, compiledObserver = compiledObserver, interpretedObserver
+
+print('songtimeline: ok')
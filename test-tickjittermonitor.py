@@ -0,0 +1,40 @@
+from sequencer.util import TickJitterMonitor
+
+m = TickJitterMonitor()
+m.lateThreshold = 1.
+
+# on time ticks:
+for tick in range(10):
+    due = tick * 10.
+    m.addTick(tick, due, due + 0.5, due + 1.)
+assert m.numTicks == 10 and m.numLate == 0 and m.blame == {}
+
+# a late tick is blamed on the handlers which ran while it was due:
+m.addHandler('midi', 99., 103.)
+m.addHandler('redraw', 103., 104.)
+m.addTick(10, 100., 104., 105.)
+assert m.numLate == 1
+assert m.blame == {'midi': [1, 3.], 'redraw': [1, 1.]}, m.blame
+assert m.offenders == [(4., 10, 1., 'midi')]
+
+# or on 'other' if none did:
+m.addTick(11, 110., 112., 113.)
+assert m.blame['other'] == [1, 2.]
+
+# the worst offenders are kept, latest first:
+for tick in range(12, 30):
+    m.addTick(tick, tick * 10., tick * 10. + tick - 10, tick * 10. + tick - 9)
+assert len(m.offenders) == m.numOffenders
+assert [tick for lateness, tick, execution, handler in m.offenders] == list(range(29, 21, -1))
+assert m.maxLateness == 19. and m.maxExecution == 1.
+
+# percentiles over the last window of ticks:
+assert m.getPercentiles(m.execution, (0, 50, 100)) == [0.5, 1., 1.]
+p50, p99 = m.getPercentiles(m.lateness, (50, 99))
+assert p50 <= p99 <= m.maxLateness
+
+m.reset()
+assert m.numTicks == 0 and m.offenders == [] and m.blame == {}
+assert m.getPercentiles(m.lateness, (50,)) == [0.]
+
+print('tickjittermonitor: ok')
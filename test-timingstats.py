@@ -0,0 +1,68 @@
+import gc
+from sequencer.util import TimingCounter, TimingStats
+
+# durations are bucketed by powers of two of microseconds:
+counter = TimingCounter('test')
+for elapsed in (0.5e-6, 3e-6, 3e-6, 100e-6, 1.):
+    counter.add(elapsed)
+assert counter.count == 5 and counter.max == 1.
+assert counter.histogram[0] == 1 and counter.histogram[2] == 2 and counter.histogram[7] == 1
+assert counter.histogram[-1] == 1
+assert counter.getPercentile(50) == 4. # 3 us falls in [2, 4)
+assert counter.getPercentile(100) == 1e6 # last bucket: the maximum
+assert abs(counter.getMean() - 1.0001065 / 5) < 1e-9
+counter.reset()
+assert counter.count == 0 and counter.getPercentile(50) == 0. and sum(counter.histogram) == 0
+
+class FakeClock(object):
+    def __init__(self):
+        self.time = 0.
+
+    def __call__(self):
+        return self.time
+
+class Worker(object):
+    def __init__(self, clock):
+        self.clock = clock
+
+    def work(self, n):
+        self.clock.time += 0.001
+        if n: self.work(n - 1) # nested calls are counted in the outer one
+        return n
+
+t = FakeClock()
+stats = TimingStats(t)
+w = Worker(t)
+
+# nothing is instrumented while disabled:
+stats.instrument(w, 'work', 'work')
+assert 'work' not in vars(w)
+
+stats.enable()
+stats.instrument(w, 'work', 'work')
+stats.instrument(w, 'work', 'work') # instrumented once
+assert w.work(2) == 2
+counter = stats.getCounter('work')
+assert counter.count == 1 and abs(counter.total - 0.003) < 1e-9
+
+# classes too; disabling restores the original methods:
+original = vars(Worker)['work']
+stats.instrument(Worker, 'work', 'class')
+Worker(t).work(0)
+assert stats.getCounter('class').count == 1
+stats.disable()
+assert 'work' not in vars(w) and vars(Worker)['work'] is original
+w.work(0)
+assert counter.count == 1
+
+# instrumented objects aren't kept alive:
+stats.enable()
+stats.instrument(Worker(t), 'work', 'work')
+gc.collect()
+assert all(entry[0]() is None for entry in stats.instrumented if not isinstance(entry[0], type))
+stats.disable()
+
+stats.reset()
+assert counter.count == 0
+
+print('timingstats: ok')
@@ -0,0 +1,48 @@
+from sequencer.util import TransportClock
+
+class FakeClock(object):
+    def __init__(self):
+        self.time = 0.
+
+    def __call__(self):
+        return self.time
+
+# ticks are planned on an absolute timeline: lateness doesn't accumulate
+t = FakeClock()
+clock = TransportClock(t)
+assert clock.start(100.) == 100.
+for k in range(1, 6):
+    t.time = k * 0.1 + 0.03 # each tick fires 30 ms late
+    clock.beginTick()
+    assert abs(clock.lateness - 30.) < 1e-6
+    assert abs(clock.nextDelay() - 70.) < 1e-6
+assert clock.numTicks == 5 and clock.numResyncs == 0
+lateness, maxLateness, mean = clock.getDrift()
+assert abs(maxLateness - 30.) < 1e-6 and abs(mean - 30.) < 1e-6
+
+# skipping ticks schedules the one after them
+t.time = 0.6
+clock.beginTick()
+assert abs(clock.nextDelay(4) - 400.) < 1e-6
+
+# a period change takes effect after the next tick, without moving it
+clock.setPeriod(50.)
+assert abs(clock.getTickTime(clock.nextTick) - 1000.) < 1e-6
+assert abs(clock.getTickTime(clock.nextTick + 1) - 1050.) < 1e-6
+
+# a stall re-anchors the timeline instead of catching up
+t.time = 2.
+clock.beginTick()
+assert clock.numResyncs == 1
+assert abs(clock.nextDelay() - 50.) < 1e-6
+
+# so does a step of the clock backwards, instead of waiting for it
+t.time -= 3600.
+clock.beginTick()
+assert clock.numResyncs == 2
+assert abs(clock.nextDelay() - 50.) < 1e-6
+
+clock.resetStats()
+assert clock.getDrift() == (0., 0., 0.)
+
+print('transportclock: ok')
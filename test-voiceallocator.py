@@ -0,0 +1,84 @@
+from sequencer.model import *
+from sequencer.util import VoiceAllocator
+
+# voices are allocated lowest first, and released by source:
+v = VoiceAllocator([3, 4, 5])
+assert v.nextFree() == 3
+assert v.allocate(0, 0) == 3
+assert v.allocate(0, 1) == 4
+assert v.allocate(1, 0) == 5
+assert v.numActive() == 3 and v.nextFree() is None
+assert v.getPatternVoices(0) == {0: 3, 1: 4}
+assert v.release(0, 1) == 4
+assert v.nextFree() == 4
+assert v.allocate(2, 0) == 4
+
+# the state round-trips:
+state = v.getState()
+w = VoiceAllocator([3, 4, 5])
+w.setState(state)
+assert w.getState() == state and w.nextFree() is None and w.get(2, 0) == 4
+
+# when full: a source keeps its voice, and others are dropped or steal one
+assert v.allocate(0, 0) == 3
+assert v.allocate(7, 0) is None
+v.setStealingPolicy('oldest')
+assert v.allocate(7, 0) == 3 and v.get(0, 0) is None
+v.setStealingPolicy('newest')
+assert v.allocate(8, 0) == 3 and v.get(7, 0) is None
+try:
+    v.setStealingPolicy('random')
+    assert False
+except ValueError:
+    pass
+try:
+    VoiceAllocator(range(VoiceAllocator.maxVoices + 1))
+    assert False
+except ValueError:
+    pass
+
+def buildTrack(patterns):
+    s = Song()
+    s.setLength(1)
+    s.setRowDuration(0, 1)
+    t = s.tracks[0]
+    t.setNoteColumns([0, 1])
+    for patternIndex in patterns:
+        t.patterns[patternIndex].setLength(4)
+        t.patterns[patternIndex].setSpeedReduction(1)
+    s.set(0, 0, patterns)
+    return s, t
+
+def play(s, n):
+    return [list(s.tick()[2][0]) for i in range(n)]
+
+# patterns playing at once in a track share its note columns:
+s, t = buildTrack([0, 1])
+t.patterns[0].noteAdd(0, 60, 2)
+t.patterns[0].noteAdd(0, 61, 1)
+t.patterns[0].set(0, 3, 99) # control column
+t.patterns[1].noteAdd(1, 70, 2)
+outputs = play(s, 4)
+assert outputs == [
+    [60, 61, -1, 99],
+    [-2, 70],   # 61 ends, and its voice goes to 70
+    [-1, -2],
+    [-1, -1],
+], outputs
+
+# with no free voice, notes are dropped unless stealing is enabled:
+expected = {
+    'none': [[60, 61], [-2, -1], [-1, -1]],
+    'oldest': [[80, 61], [-2, -1], [-2, -1]],
+    'newest': [[60, 80], [-2, -2], [-1, -2]],
+}
+for policy in ('none', 'oldest', 'newest'):
+    s, t = buildTrack([0, 2])
+    t.patterns[0].noteAdd(0, 60, 2)
+    t.patterns[0].noteAdd(0, 61, 1)
+    t.patterns[2].noteAdd(0, 80, 4)
+    t.outputMerger.setStealingPolicy(policy)
+    outputs = play(s, 3)
+    assert outputs == expected[policy], (policy, outputs)
+
+print('voiceallocator: ok')